@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+"""
+Headless benchmark of the acquisition pipeline driven by the Simulated camera.
+
+The CameraWrapper Process with the SimulatedCamera is run in the live stream mode for all combinations of the provided frame
+sizes, pixel types and exposure times. For each combination the following stages are measured: transport of frames to this
+script (shared memory ring + descriptors Queue), conversion of frames for displaying and recording by each recording backend.
+Throughput, p50 / p99 latency (acquisition -> frame available in this script), CPU and memory usage are reported and saved
+as JSON, which can be compared with the previously saved results (--compare flag).
+
+Usage example: python benchmark_mwpc.py --sizes 480x640 1024x1024 --dtypes uint8 uint16 --exposures 1 10 --output results.json
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from queue import Empty
+import numpy as np
+
+# psutil is optional, without it the CPU and memory usage is measured only for this script (and on Linux for the camera Process)
+try:
+    import psutil
+    psutil_installed = True
+except ModuleNotFoundError:
+    psutil_installed = False
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    from camera.camera_wrapper import CameraWrapper
+    from camera.camera_worker import CameraChannels
+    from display.frame_preparation import FrameDisplayPreparer
+    from camera.tracing import StageTracer, export_chrome_trace
+    from camera.recorders import recording_formats
+else:
+    from .camera.camera_wrapper import CameraWrapper
+    from .camera.camera_worker import CameraChannels
+    from .display.frame_preparation import FrameDisplayPreparer
+    from .camera.tracing import StageTracer, export_chrome_trace
+    from .camera.recorders import recording_formats
+
+# %% Module parameters
+compared_metrics = ("throughput_fps", "latency_p50_ms", "latency_p99_ms")  # metrics printed by comparison with a baseline
+
+
+# %% Resources usage
+class ResourcesMonitor():
+    """Measure CPU time and resident memory of this script and the camera Process between start() and stop() calls."""
+
+    def __init__(self, camera_pid: int):
+        self.camera_pid = camera_pid; self.processes = {}
+        if psutil_installed:
+            self.processes = {"script": psutil.Process(os.getpid()), "camera": psutil.Process(camera_pid)}
+
+    def cpu_time_s(self, process_name: str) -> float:
+        """
+        Get consumed CPU time (user + system) of the process.
+
+        Parameters
+        ----------
+        process_name : str
+            "script" or "camera".
+
+        Returns
+        -------
+        float
+            CPU time in seconds or NaN if it can't be measured.
+
+        """
+        if psutil_installed:
+            cpu_times = self.processes[process_name].cpu_times(); return cpu_times.user + cpu_times.system
+        if process_name == "script":
+            return time.process_time()
+        stat_path = Path("/proc").joinpath(str(self.camera_pid), "stat")  # Linux only
+        if stat_path.exists():
+            fields = stat_path.read_text().rsplit(")", 1)[1].split()  # fields after the process name
+            return (int(fields[11]) + int(fields[12]))/os.sysconf("SC_CLK_TCK")  # utime + stime
+        return float("nan")
+
+    def rss_mb(self, process_name: str) -> float:
+        """
+        Get resident memory size of the process.
+
+        Parameters
+        ----------
+        process_name : str
+            "script" or "camera".
+
+        Returns
+        -------
+        float
+            Memory in MB or NaN if it can't be measured.
+
+        """
+        if psutil_installed:
+            return round(self.processes[process_name].memory_info().rss/1E6, 2)
+        status_path = Path("/proc").joinpath(str(os.getpid() if process_name == "script" else self.camera_pid), "status")
+        if status_path.exists():
+            for line in status_path.read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1])/1E3, 2)  # value in kB
+        return float("nan")
+
+    def start(self):
+        """
+        Store the initial CPU times and wall time.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.t_start = time.perf_counter(); self.cpu_start = {name: self.cpu_time_s(name) for name in ("script", "camera")}
+
+    def stop(self) -> dict:
+        """
+        Calculate CPU usage since the start() call and get current memory usage.
+
+        Returns
+        -------
+        dict
+            CPU usage in % of a single core and memory in MB for both processes.
+
+        """
+        elapsed_s = max(time.perf_counter() - self.t_start, 1E-9); usage = {}
+        for name in ("script", "camera"):
+            usage[f"cpu_{name}_percent"] = round(100.0*(self.cpu_time_s(name) - self.cpu_start[name])/elapsed_s, 2)
+            usage[f"rss_{name}_mb"] = self.rss_mb(name)
+        return usage
+
+
+# %% Benchmark runner
+class PipelineBenchmark():
+    """Run the CameraWrapper Process with the Simulated camera and measure stages of the acquisition pipeline."""
+
+    def __init__(self, duration_s: float = 2.0, warmup_s: float = 0.3, data_queue_size: int = 10, tracing: bool = False):
+        self.duration_s = duration_s; self.warmup_s = warmup_s; self.timeout_s = 5.0
+        self.tracer = StageTracer("Benchmark", enabled=tracing)
+        self.channels = CameraChannels(data_queue_size=data_queue_size)
+        self.camera_process = CameraWrapper(camera_type=None, **self.channels.wrapper_kwargs())
+        self.camera_process.daemon = True; self.camera_process.start()
+        self.channels.send_command(("Open Camera", "Simulated")); reply = self.wait_reply(str)
+        if reply != "Opened":
+            raise RuntimeError(f"Simulated camera not opened, received reply: {reply}")
+        if tracing:
+            self.channels.send_command(("Enable Tracing", True))
+        self.monitor = ResourcesMonitor(self.camera_process.pid)
+
+    def wait_reply(self, reply_type: type, timeout_s: float = None):
+        """
+        Wait for the reply from the camera of the specified type, skipping frames descriptors.
+
+        Parameters
+        ----------
+        reply_type : type
+            Type of the expected reply (str or tuple).
+        timeout_s : float, optional
+            Timeout of waiting. The default is None (self.timeout_s is used).
+
+        Returns
+        -------
+        str or tuple or None
+            Reply or None if the timeout happened.
+
+        """
+        t_limit = time.perf_counter() + (self.timeout_s if timeout_s is None else timeout_s)
+        while time.perf_counter() < t_limit:
+            try:
+                reply = self.channels.data_from_camera.get(timeout=0.05)
+            except Empty:
+                continue
+            if isinstance(reply, reply_type):
+                return reply
+        return None
+
+    def get_stats(self) -> dict:
+        """
+        Request counters of the acquisition watchdog.
+
+        Returns
+        -------
+        dict
+            Counters, empty dictionary if the camera not replied.
+
+        """
+        self.channels.send_command("Get Stats"); reply = self.wait_reply(tuple)
+        if reply is not None and reply[0] == "Stats":
+            return reply[1]
+        return {}
+
+    def configure(self, image_size: tuple, pixel_type: str, exposure_ms: int):
+        """
+        Set parameters of images generated by the Simulated camera.
+
+        Parameters
+        ----------
+        image_size : tuple
+            (height, width) of images.
+        pixel_type : str
+            Pixel type (dtype) of images.
+        exposure_ms : int
+            Exposure time in ms.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.channels.send_command(("Set Image Size", image_size)); self.channels.send_command(("Set Pixel Type", pixel_type))
+        self.channels.send_command(("Set Exposure Time", exposure_ms)); time.sleep(0.05)
+        self.channels.clean()
+
+    def run_stage(self, stage: str, recording_path: Path = None, recording_format: str = "mov") -> dict:
+        """
+        Acquire frames in the live stream mode for the specified duration and measure the stage.
+
+        Parameters
+        ----------
+        stage : str
+            "transport" - frames are only read from the shared memory, "display" - frames are also converted for displaying,
+            "recording" - frames are read and recorded by the camera Process to the provided file.
+        recording_path : Path, optional
+            Path to the file for the "recording" stage. The default is None.
+        recording_format : str, optional
+            Format of the recorded file, see the camera.recorders module. The default is "mov".
+
+        Returns
+        -------
+        dict
+            Measured metrics.
+
+        """
+        latencies_ms = []; read_times_ms = []; conversion_times_ms = []; n_frames = 0; n_discarded = 0; frame_buffer = None
+        frame_preparer = FrameDisplayPreparer(contrast="minmax")  # the same display path as used by UI scripts
+        auto_contrast = FrameDisplayPreparer(contrast="auto"); auto_contrast_times_ms = []  # measured separately from latency
+        self.channels.send_command("Start Live Stream"); time.sleep(self.warmup_s)
+        self.channels.clean()  # frames acquired during warming up are discarded
+        if recording_path is not None:
+            self.channels.send_command(("Start Recording", {"path": str(recording_path), "format": recording_format}))
+        stats_start = self.get_stats(); self.monitor.start(); t_limit = time.perf_counter() + self.duration_s
+        while time.perf_counter() < t_limit:
+            try:
+                descriptor = self.channels.frames_from_camera.get(timeout=0.05)
+            except Empty:
+                continue
+            t_read = time.perf_counter(); t_trace = self.tracer.start()
+            frame = self.channels.frames_ring.read(descriptor, out=frame_buffer); self.tracer.stop("read", t_trace, descriptor.frame_id)
+            if frame is None:
+                n_discarded += 1; continue
+            frame_buffer = frame; t_received = time.perf_counter()
+            read_times_ms.append(1000.0*(t_received - t_read)); n_frames += 1
+            if stage == "display":
+                t_trace = self.tracer.start(); frame_preparer.prepare(frame); t_converted = time.perf_counter()
+                self.tracer.stop("conversion", t_trace, descriptor.frame_id)
+                conversion_times_ms.append(1000.0*(t_converted - t_received)); t_received = t_converted
+                auto_contrast.prepare(frame); auto_contrast_times_ms.append(1000.0*(time.perf_counter() - t_converted))
+            # time.perf_counter() uses the system-wide monotonic clock, so the timestamps from the camera Process are comparable
+            latencies_ms.append(1000.0*(t_received - descriptor.timestamp))
+        elapsed_s = self.duration_s; usage = self.monitor.stop()
+        # The live stream is stopped and pending frames are discarded before requesting the final counters
+        self.channels.send_command("Stop Live Stream"); time.sleep(0.05); self.channels.clean()
+        if recording_path is not None:
+            self.channels.send_command("Stop Recording"); time.sleep(0.3)
+        stats_end = self.get_stats()
+        results = {"frames_received": n_frames, "frames_discarded": n_discarded,
+                   "throughput_fps": round(n_frames/elapsed_s, 2), "throughput_mb_s": 0.0,
+                   "frames_acquired": stats_end.get("frames_acquired", 0) - stats_start.get("frames_acquired", 0),
+                   "frames_dropped": stats_end.get("frames_dropped", 0) - stats_start.get("frames_dropped", 0)}
+        if frame_buffer is not None:
+            results["throughput_mb_s"] = round(n_frames*frame_buffer.nbytes/elapsed_s/1E6, 2)
+        results.update(summarize_times(latencies_ms, "latency")); results.update(summarize_times(read_times_ms, "read"))
+        if stage == "display":
+            results.update(summarize_times(conversion_times_ms, "conversion"))
+            results.update(summarize_times(auto_contrast_times_ms, "auto_contrast"))
+        if recording_path is not None:
+            n_recorded = stats_end.get("frames_recorded", 0)
+            results["frames_recorded"] = n_recorded; results["recording_fps"] = round(n_recorded/elapsed_s, 2)
+            results["file_size_mb"] = round(recording_path.stat().st_size/1E6, 3) if recording_path.exists() else 0.0
+        results.update(usage)
+        return results
+
+    def export_trace(self, file_path: str):
+        """
+        Save the traced stages of this script and of the camera Process in the Chrome trace format.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the JSON file.
+
+        Returns
+        -------
+        None.
+
+        """
+        snapshots = [self.tracer.snapshot()]; self.channels.send_command("Get Trace"); reply = self.wait_reply(tuple)
+        if reply is not None and reply[0] == "Trace":
+            snapshots.append(reply[1])
+        print("Trace saved to:", export_chrome_trace(file_path, snapshots), flush=True)
+
+    def shutdown(self):
+        """
+        Stop the camera Process and close the channels.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.camera_process.is_alive():
+            self.channels.send_command("Quit"); self.camera_process.join(2.0)
+            if self.camera_process.is_alive():
+                self.camera_process.kill()
+        self.channels.close()
+
+
+# %% Utility functions
+def summarize_times(times_ms: list, prefix: str) -> dict:
+    """
+    Calculate percentiles of measured times.
+
+    Parameters
+    ----------
+    times_ms : list
+        Measured times in ms.
+    prefix : str
+        Prefix of the keys in the returned dictionary.
+
+    Returns
+    -------
+    dict
+        Median (p50), p99 and max values, NaN if nothing measured.
+
+    """
+    if len(times_ms) == 0:
+        return {f"{prefix}_p50_ms": float("nan"), f"{prefix}_p99_ms": float("nan"), f"{prefix}_max_ms": float("nan")}
+    p50, p99 = np.percentile(times_ms, [50, 99])
+    return {f"{prefix}_p50_ms": round(float(p50), 3), f"{prefix}_p99_ms": round(float(p99), 3),
+            f"{prefix}_max_ms": round(float(np.max(times_ms)), 3)}
+
+
+def parse_size(size_str: str) -> tuple:
+    """
+    Parse the frame size provided as "HEIGHTxWIDTH" string.
+
+    Parameters
+    ----------
+    size_str : str
+        Frame size, e.g. "480x640".
+
+    Returns
+    -------
+    tuple
+        (height, width).
+
+    """
+    height, width = size_str.lower().split("x")
+    return int(height), int(width)
+
+
+def case_key(case: dict) -> tuple:
+    """Key for matching the same measurements in the current and the baseline results."""
+    return (case["stage"], case["image_size"], case["pixel_type"], case["exposure_ms"])
+
+
+def compare_results(results: dict, baseline: dict):
+    """
+    Print relative changes of metrics compared to the baseline results.
+
+    Parameters
+    ----------
+    results : dict
+        Current results.
+    baseline : dict
+        Previously saved results.
+
+    Returns
+    -------
+    None.
+
+    """
+    baseline_cases = {case_key(case): case for case in baseline.get("cases", [])}
+    print("Comparison with the baseline (current / baseline):", flush=True)
+    for case in results["cases"]:
+        baseline_case = baseline_cases.get(case_key(case), None)
+        if baseline_case is None:
+            print(case_key(case), "- not presented in the baseline", flush=True); continue
+        changes = []
+        for metric in compared_metrics:
+            current_value = case.get(metric, float("nan")); baseline_value = baseline_case.get(metric, float("nan"))
+            if baseline_value and not np.isnan(baseline_value) and not np.isnan(current_value):
+                changes.append(f"{metric}: {current_value} / {baseline_value} ({100.0*(current_value/baseline_value - 1.0):+.1f}%)")
+        print(case_key(case), "- " + "; ".join(changes), flush=True)
+
+
+def run_benchmark(args) -> dict:
+    """
+    Run all combinations of the provided parameters.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed command line arguments.
+
+    Returns
+    -------
+    dict
+        Results with the environment description and the measured cases.
+
+    """
+    results = {"created": datetime.now().isoformat(timespec='seconds'), "platform": platform.platform(),
+               "python": sys.version.split()[0], "numpy": np.__version__, "psutil": psutil_installed,
+               "duration_s": args.duration, "cases": []}
+    stages = ["transport", "display"] + [f"recording:{backend}" for backend in args.recording_backends]
+    benchmark = PipelineBenchmark(duration_s=args.duration, tracing=args.trace is not None)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size_str in args.sizes:
+                for pixel_type in args.dtypes:
+                    for exposure_ms in args.exposures:
+                        image_size = parse_size(size_str); benchmark.configure(image_size, pixel_type, exposure_ms)
+                        for stage in stages:
+                            recording_path = None; backend = "mov"
+                            if stage.startswith("recording"):
+                                backend = stage.split(":")[1]
+                                recording_path = Path(tmp_dir).joinpath(f"{size_str}_{pixel_type}_{exposure_ms}ms"
+                                                                        + recording_formats[backend][0])
+                            case = {"stage": stage, "image_size": size_str, "pixel_type": pixel_type, "exposure_ms": exposure_ms}
+                            case.update(benchmark.run_stage(stage.split(":")[0], recording_path, backend))
+                            results["cases"].append(case)
+                            print(f"{stage} {size_str} {pixel_type} {exposure_ms}ms: {case['throughput_fps']} fps, "
+                                  + f"latency p50/p99: {case['latency_p50_ms']}/{case['latency_p99_ms']} ms", flush=True)
+        if args.trace is not None:
+            benchmark.export_trace(args.trace)
+    finally:
+        benchmark.shutdown()
+    return results
+
+
+# %% Launch benchmark
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the acquisition pipeline with the Simulated camera")
+    parser.add_argument("--sizes", nargs="+", default=["480x640", "1024x1024", "2048x2048"], help="frame sizes as HEIGHTxWIDTH")
+    parser.add_argument("--dtypes", nargs="+", default=["uint8", "uint16"], choices=["uint8", "uint16", "float32"])
+    parser.add_argument("--exposures", nargs="+", type=int, default=[1, 10], help="exposure times in ms")
+    parser.add_argument("--duration", type=float, default=2.0, help="duration of each measurement in seconds")
+    parser.add_argument("--recording-backends", nargs="*", default=list(recording_formats.keys()),
+                        choices=list(recording_formats.keys()), help="recording backends, provide none for skipping recording")
+    parser.add_argument("--output", default=None, help="path to the JSON file for saving results")
+    parser.add_argument("--compare", default=None, help="path to the JSON file with the baseline results")
+    parser.add_argument("--trace", default=None, help="path to the JSON file for saving traced stages (Chrome trace format)")
+    args = parser.parse_args(); results = run_benchmark(args)
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print("Results saved to:", args.output, flush=True)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            compare_results(results, json.load(file))
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 """Export from this module."""
 
-__all__ = ['camera_wrapper', 'utility_funcs']
+__all__ = ['accumulators', 'acq_scheduler', 'buffers_pool', 'camera_wrapper', 'camera_worker', 'frame_stats',
+           'frames_streaming', 'frames_transport', 'pretrigger', 'processing', 'recorders', 'tracing', 'utility_funcs',
+           'watchdog']
 
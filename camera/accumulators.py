@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Accumulation of acquired frames in place (averaging, running mean, maximum projection) in the camera Process.
+
+Only one accumulated frame per N acquired ones is published, so display / record bandwidth is reduced by N.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+from typing import Union
+import numpy as np
+
+# %% Module parameters
+acquisition_modes = ("Single", "Average N", "Running Mean", "Max Projection")
+
+
+# %% Class def.
+class FrameAccumulator():
+    """Accumulate frames into the preallocated buffer and return the result each N frames."""
+
+    def __init__(self, mode: str = "Single", n_frames: int = 1):
+        """
+        Set the accumulation mode.
+
+        Parameters
+        ----------
+        mode : str, optional
+            One of the acquisition_modes. The default is "Single" (frames aren't accumulated).
+        n_frames : int, optional
+            Number of frames accumulated for a single result (time constant for "Running Mean"). The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.set_mode(mode, n_frames)
+
+    def set_mode(self, mode: str, n_frames: int = 1):
+        """
+        Change the accumulation mode, accumulated frames are discarded.
+
+        Parameters
+        ----------
+        mode : str
+            One of the acquisition_modes.
+        n_frames : int, optional
+            Number of frames accumulated for a single result. The default is 1.
+
+        Raises
+        ------
+        ValueError
+            If the mode isn't supported.
+
+        Returns
+        -------
+        None.
+
+        """
+        if mode not in acquisition_modes:
+            raise ValueError(f"Acquisition mode '{mode}' isn't supported, use one of: {acquisition_modes}")
+        self.mode = mode; self.n_frames = max(int(n_frames), 1); self.reset()
+
+    def reset(self):
+        """
+        Discard accumulated frames, buffers are allocated again by the next frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.accumulator = None; self.buffer = None; self.n_accumulated = 0; self.n_added = 0; self.source_dtype = None
+
+    def allocate(self, image: np.ndarray):
+        """
+        Allocate the buffers for frames with the shape and dtype of the provided image.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            First accumulated frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.source_dtype = image.dtype  # float results keep the range of values of source frames (e.g., 0..255 for uint8)
+        if self.mode == "Average N":
+            # 32 bit sum of 8 / 16 bit frames is used while it can't overflow (e.g., up to 65537 uint16 frames), otherwise
+            # int64 one, float frames are summed as float64
+            if np.issubdtype(image.dtype, np.integer):
+                accumulator_dtype = np.uint32 if np.issubdtype(image.dtype, np.unsignedinteger) else np.int32
+                max_abs_value = max(abs(int(np.iinfo(image.dtype).min)), int(np.iinfo(image.dtype).max))
+                if self.n_frames*max_abs_value > int(np.iinfo(accumulator_dtype).max):
+                    accumulator_dtype = np.int64
+            else:
+                accumulator_dtype = np.float64
+            self.accumulator = np.zeros(image.shape, dtype=accumulator_dtype)
+        elif self.mode == "Running Mean":
+            self.accumulator = image.astype(np.float32)  # initialized by the first frame
+            self.buffer = np.zeros(image.shape, dtype=np.float32)  # for the difference with a new frame
+        elif self.mode == "Max Projection":
+            self.accumulator = image.copy()
+
+    def add(self, image: np.ndarray) -> Union[np.ndarray, None]:
+        """
+        Accumulate the frame.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired frame.
+
+        Returns
+        -------
+        np.ndarray or None
+            Result (new array, safe to be stored) each N frames, None otherwise. In the "Single" mode the frame itself.
+
+        """
+        if self.mode == "Single" or image is None:
+            return image
+        if self.accumulator is None or self.accumulator.shape != image.shape:
+            self.reset(); self.allocate(image)  # partially accumulated frames of the previous shape are discarded
+            if self.mode == "Running Mean":
+                self.n_added = 1; return self.result_if_ready()
+        self.n_added += 1
+        if self.mode == "Average N":
+            np.add(self.accumulator, image, out=self.accumulator, casting='unsafe'); self.n_accumulated += 1
+            if self.n_accumulated >= self.n_frames:
+                result = np.divide(self.accumulator, self.n_accumulated, dtype=np.float32)
+                self.accumulator.fill(0); self.n_accumulated = 0
+                return result
+            return None
+        elif self.mode == "Running Mean":
+            # Exponential moving average with the time constant N frames: acc += (image - acc)/N
+            np.subtract(image, self.accumulator, out=self.buffer, casting='unsafe')
+            np.multiply(self.buffer, 1.0/self.n_frames, out=self.buffer); np.add(self.accumulator, self.buffer, out=self.accumulator)
+            return self.result_if_ready()
+        else:  # "Max Projection"
+            if self.n_accumulated == 0:
+                np.copyto(self.accumulator, image)
+            else:
+                np.maximum(self.accumulator, image, out=self.accumulator)
+            self.n_accumulated += 1
+            if self.n_accumulated >= self.n_frames:
+                self.n_accumulated = 0
+                return self.accumulator.copy()
+            return None
+
+    def result_if_ready(self) -> Union[np.ndarray, None]:
+        """Copy of the running mean each N added frames."""
+        if self.n_added % self.n_frames == 0:
+            return self.accumulator.copy()
+        return None
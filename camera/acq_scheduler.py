@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduler of the time-lapse acquisition: bursts of frames acquired at the fixed intervals during the total duration.
+
+The plan is provided as the dict, e.g. {"interval_s": 60.0, "duration_s": 3600.0, "steps": [{"exposure_ms": 10, "burst_length": 5},
+{"exposure_ms": 50, "burst_length": 1}]}: each interval all steps are made one after another, for each step the exposure time
+is set and the burst of frames is acquired. Starts of bursts are computed from the start of the plan (start + index*interval),
+not from the end of the previous burst, so the time spent on acquisition, setting of exposure and writing of frames doesn't
+accumulate (drift compensation). If the burst takes longer than the interval, missed starts are skipped and counted, not
+executed in a row. Waiting for the start is made by the Event (interruptible) and finished by the short busy loop for precise
+timing. The scheduler is executed by the Thread of the CameraWrapper Process, so the timing doesn't depend on the GUI load.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import math
+import time
+from threading import Event
+import numpy as np
+
+# %% Module parameters
+spin_time_s = 0.002  # the last part of waiting for the start of a burst is made by the busy loop
+
+
+# %% Class def.
+class AcquisitionScheduler():
+    """Compute starts of bursts of the time-lapse plan, wait for them and measure their lateness."""
+
+    def __init__(self, plan: dict):
+        """
+        Check and store the plan.
+
+        Parameters
+        ----------
+        plan : dict
+            Keys: "interval_s" - interval between starts of bursts, "duration_s" - total duration or "n_bursts" - number of
+            bursts, "steps" - list of dicts with "exposure_ms" (optional, None - not changed) and "burst_length" (number of
+            frames). Instead of "steps", single "exposure_ms" and "burst_length" can be provided.
+
+        Raises
+        ------
+        ValueError
+            If the plan isn't consistent.
+
+        Returns
+        -------
+        None.
+
+        """
+        if not isinstance(plan, dict):
+            raise ValueError(f"Acquisition plan should be provided as dict, provided: {type(plan).__name__}")
+        try:
+            self.interval_s = float(plan["interval_s"])
+            if "steps" in plan:
+                self.steps = [(step.get("exposure_ms", None), int(step.get("burst_length", 1))) for step in plan["steps"]]
+            else:
+                self.steps = [(plan.get("exposure_ms", None), int(plan.get("burst_length", 1)))]
+            if "n_bursts" in plan:
+                self.n_bursts = int(plan["n_bursts"])
+            else:
+                self.n_bursts = int(math.ceil(float(plan["duration_s"])/self.interval_s - 1E-9)) if self.interval_s > 0.0 else 0
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Acquisition plan isn't consistent, missing or wrong parameter: {e}") from e
+        if self.interval_s <= 0.0 or self.n_bursts <= 0 or len(self.steps) == 0:
+            raise ValueError("Interval, duration (number of bursts) and list of steps of the acquisition plan should be positive")
+        for exposure_ms, burst_length in self.steps:
+            if burst_length <= 0 or (exposure_ms is not None and float(exposure_ms) <= 0.0):
+                raise ValueError(f"Burst length and exposure time should be positive, provided: {burst_length}, {exposure_ms}")
+        self.stop_event = Event(); self.lateness_s = np.zeros((self.n_bursts, )); self.start_t = 0.0; self.reset()
+
+    def reset(self):
+        """
+        Set counters to the default values.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.burst_index = 0; self.n_executed = 0; self.n_missed = 0; self.n_frames = 0; self.n_failed = 0; self.stop_event.clear()
+
+    def start(self, start_t: float = None):
+        """
+        Set the start of the plan, the first burst is started immediately.
+
+        Parameters
+        ----------
+        start_t : float, optional
+            time.perf_counter() value of the start. The default is None (now).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.reset(); self.start_t = time.perf_counter() if start_t is None else start_t
+
+    def stop(self):
+        """
+        Interrupt waiting and finish the plan.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        """Plan has been interrupted by the stop() call."""
+        return self.stop_event.is_set()
+
+    def next_burst_t(self) -> float:
+        """
+        Find the start of the next burst, starts already passed are skipped.
+
+        Returns
+        -------
+        float
+            time.perf_counter() value of the start or None if the plan is finished.
+
+        """
+        now = time.perf_counter()
+        if self.burst_index > 0:  # missed starts are possible only after the burst overrunning the interval
+            index = max(self.burst_index, int(math.ceil((now - self.start_t)/self.interval_s)))
+            self.n_missed += min(index, self.n_bursts) - self.burst_index; self.burst_index = index
+        if self.burst_index >= self.n_bursts or self.stopped:
+            return None
+        return self.start_t + self.burst_index*self.interval_s
+
+    def wait_until(self, scheduled_t: float) -> bool:
+        """
+        Wait for the start of the burst.
+
+        Parameters
+        ----------
+        scheduled_t : float
+            time.perf_counter() value of the start.
+
+        Returns
+        -------
+        bool
+            False if the plan has been stopped during waiting.
+
+        """
+        remaining_s = scheduled_t - time.perf_counter()
+        if remaining_s > spin_time_s and self.stop_event.wait(remaining_s - spin_time_s):
+            return False
+        while time.perf_counter() < scheduled_t:
+            pass
+        return not self.stopped
+
+    def burst_started(self, scheduled_t: float, started_t: float):
+        """
+        Register the start of the burst.
+
+        Parameters
+        ----------
+        scheduled_t : float
+            Planned start.
+        started_t : float
+            time.perf_counter() value on the start of acquisition of the first frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.lateness_s[self.n_executed] = started_t - scheduled_t; self.n_executed += 1; self.burst_index += 1
+
+    def stats(self) -> dict:
+        """
+        Provide counters and lateness of bursts relative to the plan.
+
+        Returns
+        -------
+        dict
+            Numbers of planned, executed and missed bursts, acquired and failed frames, mean and max lateness in ms.
+
+        """
+        lateness_ms = 1000.0*self.lateness_s[:self.n_executed]
+        return {"n_bursts": self.n_bursts, "n_executed": self.n_executed, "n_missed": self.n_missed, "n_frames": self.n_frames,
+                "n_failed": self.n_failed, "stopped": self.stopped, "elapsed_s": round(time.perf_counter() - self.start_t, 3),
+                "lateness_mean_ms": round(float(np.mean(lateness_ms)), 3) if self.n_executed > 0 else 0.0,
+                "lateness_max_ms": round(float(np.max(lateness_ms)), 3) if self.n_executed > 0 else 0.0}
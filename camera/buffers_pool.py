@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Pool of frame buffers with the fixed memory budget shared by the stages of the acquisition pipeline.
+
+Cameras acquire frames into buffers borrowed from the pool, the stages keeping a frame longer than the acquisition loop
+iteration (recording queue, last frame for statistics) retain it and release it when it's processed, the buffer returns
+to the pool when it's released by all holders. So in the steady state buffers are only reused and the memory consumption
+stays flat during long runs. If the budget is exhausted, acquire() returns None and the caller decides what to do
+(e.g., to allocate the not pooled array or to drop the frame).
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+from threading import Lock
+import numpy as np
+
+# %% Module parameters
+default_budget_mb = 256.0
+
+
+# %% Class def.
+class FrameBuffersPool():
+    """Reference counted buffers reused for frames with the same shape and dtype within the memory budget."""
+
+    def __init__(self, budget_mb: float = default_budget_mb):
+        """
+        Set the memory budget.
+
+        Parameters
+        ----------
+        budget_mb : float, optional
+            Maximum memory allocated for all buffers (in use and free) in MB. The default is 256.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._lock = Lock(); self._free = {}; self._in_use = {}; self.allocated_bytes = 0
+        self.n_allocated = 0; self.n_reused = 0; self.n_exhausted = 0; self.set_budget(budget_mb)
+
+    def __getstate__(self) -> dict:
+        """Exclude the lock and buffers from pickling (passing to the Process), the pool starts empty there."""
+        state = self.__dict__.copy(); state['_lock'] = None; state['_free'] = {}; state['_in_use'] = {}; state['allocated_bytes'] = 0
+        return state
+
+    def __setstate__(self, state: dict):
+        """Restore the pool in the Process with the new lock."""
+        self.__dict__.update(state); self._lock = Lock()
+
+    def set_budget(self, budget_mb: float):
+        """
+        Change the memory budget, free buffers exceeding the new one are discarded.
+
+        Parameters
+        ----------
+        budget_mb : float
+            Maximum memory allocated for all buffers in MB.
+
+        Raises
+        ------
+        ValueError
+            If the budget isn't positive.
+
+        Returns
+        -------
+        None.
+
+        """
+        if float(budget_mb) <= 0.0:
+            raise ValueError(f"Memory budget should be positive, provided: {budget_mb} MB")
+        with self._lock:
+            self.budget_bytes = int(float(budget_mb)*1E6); self._discard_free(self.allocated_bytes - self.budget_bytes)
+
+    def _discard_free(self, n_bytes: int):
+        """Discard free buffers (of any shape) until n_bytes are released, should be called under the lock."""
+        for key in list(self._free.keys()):
+            buffers = self._free[key]
+            while n_bytes > 0 and len(buffers) > 0:
+                buffer = buffers.pop(); self.allocated_bytes -= buffer.nbytes; n_bytes -= buffer.nbytes
+            if len(buffers) == 0:
+                del self._free[key]
+            if n_bytes <= 0:
+                break
+
+    def acquire(self, shape: tuple, dtype) -> np.ndarray:
+        """
+        Borrow the buffer for the frame, its content is undefined.
+
+        Parameters
+        ----------
+        shape : tuple
+            Shape of the frame.
+        dtype : numpy dtype or str
+            Type of pixels.
+
+        Returns
+        -------
+        np.ndarray or None
+            Buffer held by the caller (should be released), None if the budget is exhausted by buffers in use.
+
+        """
+        dtype = np.dtype(dtype); key = (tuple(shape), dtype.str)
+        with self._lock:
+            buffers = self._free.get(key, None)
+            if buffers:
+                buffer = buffers.pop(); self.n_reused += 1
+            else:
+                n_bytes = int(np.prod(shape))*dtype.itemsize
+                if self.allocated_bytes + n_bytes > self.budget_bytes:
+                    self._discard_free(self.allocated_bytes + n_bytes - self.budget_bytes)  # e.g., buffers of the previous size
+                if self.allocated_bytes + n_bytes > self.budget_bytes:
+                    self.n_exhausted += 1; return None
+                buffer = np.empty(shape, dtype=dtype); self.allocated_bytes += n_bytes; self.n_allocated += 1
+            self._in_use[id(buffer)] = [buffer, 1]
+        return buffer
+
+    def retain(self, buffer: np.ndarray) -> bool:
+        """
+        Register one more holder of the buffer (e.g., the recording queue).
+
+        Parameters
+        ----------
+        buffer : np.ndarray
+            Buffer acquired from this pool or any other array (ignored).
+
+        Returns
+        -------
+        bool
+            True if the buffer belongs to this pool.
+
+        """
+        with self._lock:
+            record = self._in_use.get(id(buffer), None)
+            if record is None or record[0] is not buffer:
+                return False
+            record[1] += 1
+        return True
+
+    def release(self, buffer: np.ndarray) -> bool:
+        """
+        Unregister the holder of the buffer, the buffer returns to the pool when it's released by all holders.
+
+        Parameters
+        ----------
+        buffer : np.ndarray
+            Buffer acquired from this pool or any other array (ignored, e.g. results of accumulation of frames).
+
+        Returns
+        -------
+        bool
+            True if the buffer belongs to this pool.
+
+        """
+        with self._lock:
+            record = self._in_use.get(id(buffer), None)
+            if record is None or record[0] is not buffer:
+                return False
+            record[1] -= 1
+            if record[1] <= 0:
+                del self._in_use[id(buffer)]
+                if self.allocated_bytes > self.budget_bytes:  # the budget has been decreased
+                    self.allocated_bytes -= buffer.nbytes
+                else:
+                    self._free.setdefault((buffer.shape, buffer.dtype.str), []).append(buffer)
+        return True
+
+    def clear(self):
+        """
+        Discard all free buffers (e.g., after changing the frame size), buffers in use return to the pool on release.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            self._discard_free(self.allocated_bytes)
+
+    def stats(self) -> dict:
+        """
+        Provide counters of the pool.
+
+        Returns
+        -------
+        dict
+            Budget and allocated memory in MB, numbers of buffers in use and free, counters of allocations, reuses and
+            requests rejected because of the exhausted budget.
+
+        """
+        with self._lock:
+            n_free = sum(len(buffers) for buffers in self._free.values())
+            return {"budget_mb": round(self.budget_bytes/1E6, 3), "allocated_mb": round(self.allocated_bytes/1E6, 3),
+                    "buffers_in_use": len(self._in_use), "buffers_free": n_free, "n_allocated": self.n_allocated,
+                    "n_reused": self.n_reused, "n_exhausted": self.n_exhausted}
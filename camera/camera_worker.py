@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-started CameraWrapper Processes for fast opening and switching of cameras.
+
+This module imports only the camera wrapper and standard modules, so it can be used as the minimal entry point for
+the camera Processes (without GUI libraries).
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+from threading import Thread, Lock
+from pathlib import Path
+from typing import Union
+import time
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    from camera_wrapper import CameraWrapper, mp_context
+    from utility_funcs import clean_mp_queue
+    from frames_transport import SharedFramesRing
+else:
+    from .camera_wrapper import CameraWrapper, mp_context
+    from .utility_funcs import clean_mp_queue
+    from .frames_transport import SharedFramesRing
+
+
+# %% Communication channels
+class CameraChannels():
+    """Bundle of the Queues and Events used for communication with a single CameraWrapper Process."""
+
+    def __init__(self, commands_queue_size: int = 5, data_queue_size: int = 10, frames_queue_size: int = 10,
+                 frames_budget_mb: float = 64.0):
+        self.commands2camera = mp_context.Queue(maxsize=commands_queue_size); self.trigger_commands = mp_context.Event()
+        self.data_from_camera = mp_context.Queue(maxsize=data_queue_size); self.trigger_camera_data = mp_context.Event()
+        # Frames descriptors are sent separately from replies, so a burst of frames can't delay a reply (e.g., on "Stop").
+        # The camera drops a frame if the pending ones occupy the memory budget, so less large frames are buffered
+        self.frames_from_camera = mp_context.Queue(maxsize=frames_queue_size); self.frames_budget_mb = frames_budget_mb
+        self.frames_ring = SharedFramesRing(n_slots=frames_queue_size + 2)  # + slots for frames being read and written
+        self.sleep_time_actions_ms = 4*1E-3  # delay between putting a command and setting the trigger, same as on UI
+        self.closed = False
+
+    def wrapper_kwargs(self) -> dict:
+        """
+        Provide the channels as the keyword arguments for the CameraWrapper initialization.
+
+        Returns
+        -------
+        dict
+            Keyword arguments with Queues, Events, the frames ring and the memory budget of pending frames.
+
+        """
+        return {"commands2camera": self.commands2camera, "trigger_commands": self.trigger_commands,
+                "data_camera": self.data_from_camera, "trigger_data_camera": self.trigger_camera_data, "frames_ring": self.frames_ring,
+                "frames_camera": self.frames_from_camera, "frames_budget_mb": self.frames_budget_mb}
+
+    def send_command(self, command: Union[str, tuple]):
+        """
+        Send command to a camera and set trigger for letting camera class to read it.
+
+        Parameters
+        ----------
+        command : Union[str, tuple]
+            Command as string or tuple(string command, parameter).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.commands2camera.put_nowait(command); time.sleep(self.sleep_time_actions_ms/1.65)
+        self.trigger_commands.set(); time.sleep(self.sleep_time_actions_ms/1.65)
+
+    def clean(self):
+        """
+        Discard pending frames, clean up queues and set Events to the default state.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.frames_ring.reset()  # pending frames are discarded without reading them
+        self.data_from_camera = clean_mp_queue(self.data_from_camera); self.commands2camera = clean_mp_queue(self.commands2camera)
+        self.frames_from_camera = clean_mp_queue(self.frames_from_camera)
+        self.trigger_commands.clear(); self.trigger_camera_data.clear()
+
+    def close(self):
+        """
+        Clean up and close queues, should be called after the associated Process is stopped.
+
+        Returns
+        -------
+        None.
+
+        """
+        if not self.closed:
+            self.clean(); self.data_from_camera.close(); self.frames_from_camera.close(); self.commands2camera.close()
+            self.frames_ring.close(); self.closed = True
+
+
+# %% Pool of Processes
+class CameraWorkersPool():
+    """Keeps the pre-started idle CameraWrapper Processes, which open a camera on request without starting a new Process."""
+
+    def __init__(self, n_spare_workers: int = 1):
+        self.n_spare_workers = n_spare_workers; self.spare_workers = []; self._lock = Lock()
+        self.prestart()  # start the first idle Process immediately
+
+    def start_worker(self) -> tuple:
+        """
+        Start new CameraWrapper Process without opened camera.
+
+        Returns
+        -------
+        tuple
+            (CameraWrapper, CameraChannels) pair.
+
+        """
+        channels = CameraChannels(); worker = CameraWrapper(camera_type=None, **channels.wrapper_kwargs())
+        worker.daemon = True  # pre-started Process shouldn't remain if the main script crashed
+        worker.start(); return worker, channels
+
+    def prestart(self):
+        """
+        Start idle Processes until the required number of spare ones is reached.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            self.spare_workers = [(worker, channels) for (worker, channels) in self.spare_workers if worker.is_alive()]
+            while len(self.spare_workers) < self.n_spare_workers:
+                self.spare_workers.append(self.start_worker())
+
+    def prestart_async(self):
+        """
+        Start idle Processes in the background Thread, not blocking the calling (UI) thread.
+
+        Returns
+        -------
+        None.
+
+        """
+        Thread(target=self.prestart, daemon=True).start()
+
+    def acquire(self, camera_type: str) -> tuple:
+        """
+        Get the pre-started Process (or start new one if no spare available) and request it to open the camera.
+
+        The result of opening ("Opened" or the problem report) should be awaited by the caller on the returned channels.
+
+        Parameters
+        ----------
+        camera_type : str
+            Camera type from the supported ones.
+
+        Returns
+        -------
+        tuple
+            (CameraWrapper, CameraChannels) pair. The worker is removed from the pool and should be stopped by the caller.
+
+        """
+        worker = None
+        with self._lock:
+            while len(self.spare_workers) > 0 and worker is None:
+                worker, channels = self.spare_workers.pop(0)
+                if not worker.is_alive():
+                    channels.close(); worker = None
+            if worker is None:
+                worker, channels = self.start_worker()
+        channels.send_command(("Open Camera", camera_type))
+        return worker, channels
+
+    def shutdown(self):
+        """
+        Stop all spare Processes.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            for worker, channels in self.spare_workers:
+                if worker.is_alive():
+                    channels.send_command("Quit"); worker.join(1.0)
+                    if worker.is_alive():
+                        worker.kill()
+                channels.close()
+            self.spare_workers = []
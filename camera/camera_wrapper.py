@@ -6,58 +6,77 @@ Wrapper for the camera control.
 
 """
 # %% Global imports
-from multiprocessing import Process, Queue, Event
+from multiprocessing import Queue, Event
 from queue import Empty, Full
 from queue import Queue as thQueue
-from threading import Thread
+from threading import Thread, Lock
 from pathlib import Path
 from typing import Sequence
 import time
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
 import numpy as np
-import cv2
 import traceback
+# Note: cv2 is imported by the video recorders only if recording is requested - for faster start of the Process
 
 # %% Local imports
 if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
-    from cameras import *
-    from utility_funcs import clean_mp_queue
+    from cameras import get_camera_types, get_camera_class
+    from utility_funcs import clean_mp_queue, get_mp_context
+    from frames_transport import SharedFramesRing
+    from watchdog import AcquisitionWatchdog
+    from tracing import StageTracer
+    from recorders import recording_formats, create_recorder, default_file_path
+    from frames_streaming import FramesStreamServer
+    from accumulators import FrameAccumulator
+    from frame_stats import FrameStatistics
+    from buffers_pool import FrameBuffersPool
+    from acq_scheduler import AcquisitionScheduler
+    from pretrigger import PreTriggerRing
 else:
-    from .cameras import *
-    from .utility_funcs import clean_mp_queue
-local_modules = locals()  # get as a dictionary the locally imported modules for defining the content of "cameras" module
-# Below the automatic exploring of the imported modules and Associated names. Class definition should contain "Camera" in a class name
-cameras_cls_names = [camera_class for camera_class in local_modules.keys() if "Camera" in camera_class]
-# Collect actual classes for using them below on UI
-cameras_ctrl_classes = [local_modules[camera_name] for camera_name in cameras_cls_names]
-cameras_ctrl_types = [ctrl_class.camera_type() for ctrl_class in cameras_ctrl_classes]
-cameras_settings = [ctrl_class.camera_settings(ctrl_class) for ctrl_class in cameras_ctrl_classes]
+    from .cameras import get_camera_types, get_camera_class
+    from .utility_funcs import clean_mp_queue, get_mp_context
+    from .frames_transport import SharedFramesRing
+    from .watchdog import AcquisitionWatchdog
+    from .tracing import StageTracer
+    from .recorders import recording_formats, create_recorder, default_file_path
+    from .frames_streaming import FramesStreamServer
+    from .accumulators import FrameAccumulator
+    from .frame_stats import FrameStatistics
+    from .buffers_pool import FrameBuffersPool
+    from .acq_scheduler import AcquisitionScheduler
+    from .pretrigger import PreTriggerRing
+# Only the names of the supported cameras are collected, the controlling classes are imported on demand (see cameras.__init__)
+cameras_ctrl_types = get_camera_types()
+mp_context = get_mp_context()  # Queues and Events provided to the CameraWrapper should be created by this context as well
 
 
 # %% Camera class
-class CameraWrapper(Process):
+class CameraWrapper(mp_context.Process):
     """Class for wrapping camera controlling functions in the additional to the main script Process() instance."""
 
     # Dev. note: it's not necessary to make the variables below private explicitly, since they are embedded to the Process
     initialized: bool = False  # flag - initialized or not the camera
     camera_ref = None  # handle to the camera (API specific)
     camera_type: str = "Simulated"  # provided by the calling program
+    awaiting_camera: bool = False  # flag for the Process without opened camera, which waits for the "Open Camera" command
     live_stream_flag: bool = False; commands_queue: Queue; trigger_commands: Event
     data_queue: Queue; trigger_data: Event; lifo_queues = None; supported_cameras: list = []
     data_triggered_queues = None; queues_triggers = None; camera_supported: bool = False
     camera_initialized: bool = False  # flag for explicit recognition that the camera is initialized (opened)
-    gray_scaled_img: bool = False  # flag for designating type of acquired image on a camera
+    camera_lock: Lock = None  # lock for accessing the camera from the commands loop and the live stream Thread
+    last_frame_lock: Lock = None  # lock for replacing the last frame (live stream Thread) and computing its statistics
 
     def __init__(self, camera_type: str, commands2camera: Queue, trigger_commands: Event, data_camera: Queue, trigger_data_camera: Queue,
-                 data_triggered_queues: Sequence[Queue] = None, queues_triggers: Sequence[Event] = None, lifo_queues: Sequence[Queue] = None):
+                 data_triggered_queues: Sequence[Queue] = None, queues_triggers: Sequence[Event] = None, lifo_queues: Sequence[Queue] = None,
+                 frames_ring: SharedFramesRing = None, frames_camera: Queue = None, frames_budget_mb: float = 64.0):
         """
         CameraWrapper(Process) instance initialization.
 
         Parameters
         ----------
         camera_type : str
-            Provided type of a camera.
+            Provided type of a camera. If None, the Process is pre-started without a camera and waits for the command
+            ("Open Camera", camera_type).
         commands2camera : Queue
             Queue with sent from the main script commands, like "Snap".
         trigger_commands : Event
@@ -72,6 +91,14 @@ class CameraWrapper(Process):
             Sequence with several more Events for duplicating triggers for the independent processes. The default is None.
         lifo_queues : Sequence[Queue], optional
             Queues for independent processes which just subscribe for them. The default is None.
+        frames_ring : SharedFramesRing, optional
+            Ring in the shared memory for transferring images, only their descriptors are put in the frames Queue.
+            The default is None, then the ring is created by this class.
+        frames_camera : Queue, optional
+            Queue for descriptors of frames, separated from replies in the data_camera Queue. The default is None
+            (descriptors are put in the data_camera Queue).
+        frames_budget_mb : float, optional
+            Memory budget of frames pending in the frames Queue, frames exceeding it are dropped. The default is 64.0.
 
         Raises
         ------
@@ -85,13 +112,33 @@ class CameraWrapper(Process):
         """
         self.commands_queue = commands2camera; self.trigger_commands = trigger_commands
         self.data_queue = data_camera; self.trigger_data = trigger_data_camera
+        self.frames_queue = frames_camera if frames_camera is not None else data_camera
+        self.frames_budget_bytes = int(float(frames_budget_mb)*1E6)
         self.script_path = Path(__file__).parent.parent.absolute()  # for possible access the API python wrappers
         self.sleep_time_actions_ms = 0.004  # for putting artificial delay between setting the trigger and sending the data
         self.record_flag = False  # flag for start recording streamed single snapped images
         self.fps = 0  # will automatically measure and correct FPS, used for recording by relying on cv2.VideoWriter methods
         self.images2record = None  # placeholder for queue with images for recording
         self.video_file_path = None  # placeholder for a video file path used for recording
+        self.record_format = "mov"  # format of the recorded file, see the recorders module
+        self.record_options = {}  # additional parameters of the recorder (codec, number of encoding Threads, JPEG quality)
+        self.recorded_frames = 0  # number of frames written by the last or ongoing recording
+        # Frames waiting for recording are limited by the memory budget, not by their number, frames exceeding it are dropped
+        self.record_budget_bytes = int(256E6); self.record_pending_bytes = 0; self.record_dropped = 0
         self.n_images_fps_buffer = 10; self.ring_fps_buffer = np.zeros((self.n_images_fps_buffer, )); self.index_fps_buffer = 0
+        self.frames_ring = frames_ring if frames_ring is not None else SharedFramesRing()
+        self.watchdog = AcquisitionWatchdog()  # counters of acquired / dropped frames, detection of camera stalls
+        self.live_thread = None  # Thread for continuous acquisition ("Live" mode) in this Process
+        self.tracer = StageTracer("CameraWrapper")  # disabled by default, see the tracing module
+        self.stream_server = None  # server for streaming frames to the remote viewers, started by the "Start Streaming" command
+        self.accumulator = FrameAccumulator()  # averaging / max projection of frames, set by the "Set Acquisition Mode" command
+        self.frame_stats = FrameStatistics()  # histogram and ROI statistics, computed on the "Get Frame Stats" command
+        self.last_frame = None; self.last_frame_id = -1  # reference to the last delivered frame (not copied)
+        # Frames are acquired into the buffers borrowed from the pool, each stage holding a frame retains / releases it
+        self.buffers_pool = FrameBuffersPool()  # the budget is set by the "Set Buffers Budget" command
+        self.scheduler = None; self.schedule_thread = None  # time-lapse acquisition, started by the "Start Schedule" command
+        # Last frames of the live stream kept for saving them on the "Trigger Save" command, see the pretrigger module
+        self.pretrigger = None; self.pretrigger_thread = None; self.pretrigger_parameters = {}
         # Checking input parameters
         if data_triggered_queues is not None and queues_triggers is not None:
             if len(data_triggered_queues) > 0 and len(queues_triggers) > 0 and len(data_triggered_queues) == len(queues_triggers):
@@ -101,13 +148,18 @@ class CameraWrapper(Process):
                 self.lifo_queues = lifo_queues
         # Check that the camera type is supported (could be duplicated from the main script)
         self.supported_cameras = cameras_ctrl_types  # can be checked / loaded from the configuration
-        if camera_type in self.supported_cameras:
+        if camera_type is None:
+            self.camera_type = None; self.awaiting_camera = True; self.camera_supported = True
+            self.camera_settings = {}  # settings should be requested by the "Get Updated Settings" command after opening a camera
+        elif camera_type in self.supported_cameras:
             self.camera_type = camera_type; self.camera_supported = True
-            self.camera_settings = cameras_settings[self.supported_cameras.index(self.camera_type)]
+            camera_class = get_camera_class(self.camera_type)  # import of the selected camera module only
+            self.camera_settings = camera_class.camera_settings(camera_class)
         # Checking provided parameters to be consistent and empty
-        if self.commands_queue.empty() and self.data_queue.empty() and not self.trigger_data.is_set() and not self.trigger_commands.is_set():
+        if (self.commands_queue.empty() and self.data_queue.empty() and self.frames_queue.empty() and not self.trigger_data.is_set()
+                and not self.trigger_commands.is_set()):
             if self.camera_supported:
-                Process.__init__(self)  # Initialize this class on the separate process with its own memory and core
+                mp_context.Process.__init__(self)  # Initialize this class on the separate process with its own memory and core
                 self.initialized = True  # Process class initialized
             else:
                 raise ValueError("Provided camera type isn't supported (not specified as the supported one)")
@@ -126,108 +178,812 @@ class CameraWrapper(Process):
         None.
 
         """
-        # Starting the Process loop. The camera connection should be initialized here.
-        if self.initialized:
-            if self.camera_type in self.supported_cameras:  # automatic discovery of the imported classes
-                camera_index = self.supported_cameras.index(self.camera_type)
-                self.camera_ref = cameras_ctrl_classes[camera_index]()  # initialize the camera controlling class
-                self.camera_initialized = self.camera_ref.initialize()  # explicit initialization method
-                # Dev Note about putting time.sleep() below - if the scripts launched in Python debugger by Visual Studio Code
-                if self.camera_initialized:
-                    self.data_queue.put_nowait("Opened"); time.sleep(self.sleep_time_actions_ms); self.trigger_data.set()
-                else:
-                    report = self.camera_ref.initialization_status()
-                    self.data_queue.put_nowait("Camera NOT Opened. Problem report:\n" + report)
-                    time.sleep(self.sleep_time_actions_ms); self.trigger_data.set()
-            else:
-                self.initialized = False; self.data_queue.put_nowait("Camera not supported"); self.trigger_data.set()
+        self.camera_lock = Lock(); self.last_frame_lock = Lock()  # created in this Process, since Lock can't be pickled
+        self.record_lock = Lock()  # for counting the memory occupied by frames waiting for recording
+        # Starting the Process loop. The camera connection should be initialized here (or by the "Open Camera" command)
+        if self.initialized and not self.awaiting_camera:
+            self.open_camera(self.camera_type)
 
         # Loop for checking the commands from the controlling script and handling them
-        while self.initialized and self.camera_initialized:
+        while self.initialized and (self.camera_initialized or self.awaiting_camera):
             self.trigger_commands.wait()  # wait for the externally set (by the main script) trigger
             if self.trigger_commands.is_set():
                 self.trigger_commands.clear()  # return trigger, which starts logic below, to a default value (False)
-            # Getting the commands from a queue
-            if not self.commands_queue.empty():
-                try:
-                    command = self.commands_queue.get_nowait()  # Handling the commands from the main script
-                    # print("Camera received a command:", command)
-                    if isinstance(command, str):  # command provided as a simple string
-                        if command == "Snap" or command == "Snap Image":
-                            t1 = time.perf_counter()  # will be used for counting FPS
-                            image = self.camera_ref.snap_image()  # calling the implemented method from an abstract class
-                            passed_s = round((time.perf_counter() - t1), 9)
-                            if self.fps == 0:
-                                self.fps = int(round(1.0/passed_s, 0))  # first estimation of FPS
-                                self.index_fps_buffer = 0  # set to the default value
-                                self.ring_fps_buffer[self.index_fps_buffer] = self.fps; self.index_fps_buffer += 1
-                            if self.record_flag:
-                                timestamp_str = datetime.fromtimestamp(time.time()).strftime('%H:%M:%S.%f')[:-3]
-                                if not self.images2record.full():
-                                    self.images2record.put_nowait((image, timestamp_str))  # put numpy array and timestamp str for record
-                            else:
-                                # below - averaging ... stored measured FPS for more stable estimation of it
-                                fps = int(round(1.0/passed_s, 0))  # FPS calculation for averaging
-                                if self.index_fps_buffer < len(self.ring_fps_buffer) - 1:
-                                    self.ring_fps_buffer[self.index_fps_buffer] = fps; self.index_fps_buffer += 1
-                                elif self.index_fps_buffer == len(self.ring_fps_buffer) - 1:
-                                    self.ring_fps_buffer[self.index_fps_buffer] = fps
-                                    self.fps = int(round(np.mean(self.ring_fps_buffer))); self.index_fps_buffer = 0
-                            if image is not None:
-                                self.data_queue.put_nowait(image)
-                            else:
-                                self.data_queue.put_nowait("String placeholder Image")
-                            self.trigger_data.set()  # set the trigger that the data is available for the calling main module
-                        elif command == "Start Recording":
-                            self.record_flag = True; self.images2record = thQueue(maxsize=20)
-                            self.record_thread = Thread(target=self.record); self.record_thread.start()
-                            print("Start recording", flush=True)
-                        elif command == "Stop Recording":
-                            self.record_flag = False; time.sleep(2.5*self.sleep_time_actions_ms)
-                            if self.record_thread.is_alive():
-                                self.record_thread.join(timeout=0.2)
-                            self.images2record = clean_mp_queue(self.images2record); del self.images2record; self.images2record = None
-                            print("Stop recording", flush=True)
-                        elif command == "Get FPS":
-                            self.data_queue.put_nowait(self.fps); self.trigger_data.set()  # set a trigger - some data is available for read
-                        elif command == "Open Settings":
-                            self.camera_ref.access_camera_settings(); self.fps = 0  # call native method for applying camera settings (OpenCV)
-                        elif command == "Stop" or command == "Quit":
-                            self.close()  # close the camera wrapper
-                            self.initialized = False; self.fps = 0  # set the flag for the loop to stop it
-                            self.data_queue.put_nowait("Stopped"); time.sleep(self.sleep_time_actions_ms); self.trigger_data.set()
-                        elif command == "Get Updated Settings":
-                            self.data_queue.put_nowait(self.camera_ref.available_camera_settings); self.trigger_data.set()
+            # Getting the command from the Queue, it can still be transferred by the feeder Thread after setting the trigger
+            try:
+                command = self.commands_queue.get(timeout=0.02)
+            except Empty:
+                continue  # spurious wake-up, e.g. the command has been already handled after the re-check below
+            try:
+                # Handling the commands from the main script
+                # print("Camera received a command:", command)
+                if isinstance(command, str):  # command provided as a simple string
+                    if command == "Snap" or command == "Snap Image":
+                        image, t1 = self.snap_accumulated()  # calling the implemented method from an abstract class
+                        passed_s = max(round((time.perf_counter() - t1), 9), 1E-9)
+                        if self.fps == 0:
+                            self.fps = int(round(1.0/passed_s, 0))  # first estimation of FPS
+                            self.index_fps_buffer = 0  # set to the default value
+                            self.ring_fps_buffer[self.index_fps_buffer] = self.fps; self.index_fps_buffer += 1
+                        if self.record_flag:
+                            self.record_image(image, t1)
                         else:
-                            print("Camera NOT RECOGNIZED the command:", command, flush=True)
-                    # Commands with parameters
-                    elif isinstance(command, tuple):
-                        (command_str, parameters) = command  # unpacking tuple
-                        if command_str == "Set Exposure Time":
-                            if callable(getattr(self.camera_ref, "set_exposure_time", None)):
-                                try:
-                                    self.camera_ref.set_exposure_time(parameters); self.fps = 0
-                                except Exception as e:
-                                    exception_metadata = (type(e).__name__, str(e), traceback.format_exc())
-                                    print("Encountered Exception:", exception_metadata, flush=True)
-                                self.trigger_data.set()
+                            # below - averaging ... stored measured FPS for more stable estimation of it
+                            fps = int(round(1.0/passed_s, 0))  # FPS calculation for averaging
+                            if self.index_fps_buffer < len(self.ring_fps_buffer) - 1:
+                                self.ring_fps_buffer[self.index_fps_buffer] = fps; self.index_fps_buffer += 1
+                            elif self.index_fps_buffer == len(self.ring_fps_buffer) - 1:
+                                self.ring_fps_buffer[self.index_fps_buffer] = fps
+                                self.fps = int(round(np.mean(self.ring_fps_buffer))); self.index_fps_buffer = 0
+                        descriptor = None
+                        if image is not None and not self.frames_queue_full(image.nbytes):
+                            t_trace = self.tracer.start(); descriptor = self.frames_ring.publish(image, t1)
+                            try:
+                                self.frames_queue.put_nowait(descriptor)  # image copied to the shared memory
+                            except Full:
+                                descriptor = None
+                        if image is not None and descriptor is None:
+                            # Frames Queue is full (e.g., pending frames of the live stream), the snap is dropped, not the Process
+                            self.watchdog.frame_dropped(); self.buffers_pool.release(image)
+                            self.send_reply(("Snap Dropped", "the frames Queue is full"))
+                        elif image is not None:
+                            self.set_last_frame(image, descriptor.frame_id)
+                            self.tracer.stop("publish", t_trace, descriptor.frame_id); self.watchdog.frame_delivered()
+                            if self.stream_server is not None:
+                                self.stream_server.publish(image.copy(), t1, self.watchdog.frames_acquired)  # kept by viewers
+                            self.buffers_pool.release(image)  # the frame is kept only by the other holders (if any)
                         else:
-                            print("Camera NOT RECOGNIZED the command:", command, flush=True)
-                    # Some reporting of not recognized commands
+                            self.data_queue.put_nowait("String placeholder Image")
+                        self.trigger_data.set()  # set the trigger that the data is available for the calling main module
+                        if self.watchdog.needs_recovery(check_stall=False):
+                            self.recover_camera()  # re-open the camera after several failed snaps
+                    elif command == "Start Live Stream":
+                        self.start_live_stream()
+                    elif command == "Stop Live Stream":
+                        self.stop_live_stream()
+                    elif command == "Get Stats":
+                        stats = self.watchdog.counters(); stats["frames_recorded"] = self.recorded_frames
+                        stats["frames_record_dropped"] = self.record_dropped
+                        stats["buffers_pool"] = self.buffers_pool.stats()
+                        if self.stream_server is not None:
+                            stats["streaming"] = self.stream_server.stats()
+                        self.send_reply(("Stats", stats))
+                    elif command == "Start Recording":
+                        self.start_recording()
+                    elif command == "Stop Recording":
+                        self.record_flag = False; time.sleep(2.5*self.sleep_time_actions_ms)
+                        if self.record_thread.is_alive():
+                            self.record_thread.join(timeout=2.0)  # pending frames are written before closing the file
+                        self.release_images2record()
+                        self.images2record = clean_mp_queue(self.images2record); del self.images2record; self.images2record = None
+                        print(f"Stop recording, frames dropped by the recording queue: {self.record_dropped}", flush=True)
+                    elif command == "Get Frame Stats":
+                        self.send_frame_stats()
+                    elif command == "Get Trace":
+                        self.data_queue.put_nowait(("Trace", self.tracer.snapshot())); self.trigger_data.set()
+                    elif command == "Get FPS":
+                        self.data_queue.put_nowait(self.fps); self.trigger_data.set()  # set a trigger - some data is available for read
+                    elif command == "Open Settings":
+                        self.camera_ref.access_camera_settings(); self.fps = 0  # call native method for applying camera settings (OpenCV)
+                    elif command == "Stop Streaming":
+                        self.stop_streaming()
+                    elif command == "Stop Schedule":
+                        self.stop_schedule()
+                    elif command == "Trigger Save":
+                        self.trigger_save()
+                    elif command == "Stop Pre-Trigger":
+                        self.stop_pretrigger()
+                    elif command == "Stop" or command == "Quit":
+                        self.stop_schedule(); self.stop_live_stream(); self.stop_pretrigger(); self.stop_streaming()
+                        if self.camera_ref is not None:
+                            self.close()  # close the camera wrapper
+                        self.frames_ring.release()  # free the shared memory
+                        self.initialized = False; self.fps = 0  # set the flag for the loop to stop it
+                        self.data_queue.put_nowait("Stopped"); time.sleep(self.sleep_time_actions_ms); self.trigger_data.set()
+                    elif command == "Get Updated Settings":
+                        self.data_queue.put_nowait(self.camera_ref.available_camera_settings); self.trigger_data.set()
                     else:
                         print("Camera NOT RECOGNIZED the command:", command, flush=True)
-                # Handling exceptions by the getting the commands from the queue
-                except (Empty, Full):
-                    self.data_queue.put_nowait(Exception("Queue with commands or empty, either full. The CameraWrapper Process stopped"))
-                    self.trigger_data.set(); self.initialized = False
-            else:
-                self.data_queue.put_nowait(Exception("Await to receive the command, but the Queue with commands is empty"))
+                # Commands with parameters
+                elif isinstance(command, tuple):
+                    (command_str, parameters) = command  # unpacking tuple
+                    if command_str == "Open Camera":
+                        self.open_camera(parameters)  # opens the camera on idle Process or switches the opened one
+                    elif command_str == "Set Exposure Time":
+                        if callable(getattr(self.camera_ref, "set_exposure_time", None)):
+                            try:
+                                with self.camera_lock:
+                                    self.camera_ref.set_exposure_time(parameters)
+                                self.fps = 0; self.update_expected_interval()
+                            except Exception as e:
+                                exception_metadata = (type(e).__name__, str(e), traceback.format_exc())
+                                print("Encountered Exception:", exception_metadata, flush=True)
+                            self.trigger_data.set()
+                    elif command_str == "Set Image Size" or command_str == "Set Pixel Type":
+                        # Optional methods, e.g. for changing generated images by the Simulated camera
+                        method_name = "set_image_size" if command_str == "Set Image Size" else "set_pixel_type"
+                        if callable(getattr(self.camera_ref, method_name, None)):
+                            with self.camera_lock:
+                                getattr(self.camera_ref, method_name)(parameters)
+                        else:
+                            print(f"The {self.camera_type} camera doesn't support the command:", command, flush=True)
+                        self.trigger_data.set()
+                    elif command_str == "Start Recording":
+                        self.start_recording(parameters)
+                    elif command_str == "Set Acquisition Mode":
+                        # parameters: (mode, number of frames), e.g. ("Average N", 10)
+                        try:
+                            mode, n_frames = parameters if isinstance(parameters, (tuple, list)) else (parameters, 1)
+                            with self.camera_lock:
+                                self.accumulator.set_mode(mode, n_frames)
+                        except ValueError as e:
+                            print("Acquisition mode not changed:", str(e), flush=True)
+                        self.trigger_data.set()
+                    elif command_str == "Set Frame Stats":
+                        # parameters: dict with "roi" (row, column, height, width), "subsample", "n_bins", "saturation_level"
+                        try:
+                            self.frame_stats.set_parameters(parameters)
+                        except (ValueError, TypeError) as e:
+                            print("Parameters of frame statistics not changed:", str(e), flush=True)
+                    elif command_str == "Set Frames Budget":
+                        try:
+                            if float(parameters) <= 0.0:
+                                raise ValueError(f"Budget should be positive, provided: {parameters} MB")
+                            self.frames_budget_bytes = int(float(parameters)*1E6)  # in MB
+                        except (ValueError, TypeError) as e:
+                            print("Budget of pending frames not changed:", str(e), flush=True)
+                    elif command_str == "Set Buffers Budget":
+                        try:
+                            self.buffers_pool.set_budget(parameters)  # in MB
+                        except (ValueError, TypeError) as e:
+                            print("Budget of frame buffers not changed:", str(e), flush=True)
+                    elif command_str == "Start Streaming":
+                        self.start_streaming(parameters)
+                    elif command_str == "Start Schedule":
+                        self.start_schedule(parameters)
+                    elif command_str == "Start Pre-Trigger":
+                        self.start_pretrigger(parameters)
+                    elif command_str == "Enable Tracing":
+                        self.tracer.enable(bool(parameters))
+                    else:
+                        print("Camera NOT RECOGNIZED the command:", command, flush=True)
+                # Some reporting of not recognized commands
+                else:
+                    print("Camera NOT RECOGNIZED the command:", command, flush=True)
+            # Handling exceptions by the getting the commands from the queue
+            except (Empty, Full):
+                self.data_queue.put_nowait(Exception("Queue with commands or empty, either full. The CameraWrapper Process stopped"))
                 self.trigger_data.set(); self.initialized = False
+            if self.initialized:
+                self.trigger_commands.set()  # re-check the Queue, several commands can be sent during handling of the previous one
+
+    def open_camera(self, camera_type: str):
+        """
+        Initialize the controlling class of the camera and report the result to the main script.
+
+        If some camera is already opened, it will be closed before, but this Process with the Queues, Events and recording
+        infrastructure is kept running (hot switching of cameras). If a camera isn't opened, the Process waits for
+        the next "Open Camera" command.
+
+        Parameters
+        ----------
+        camera_type : str
+            Camera type from the supported ones.
+
+        Returns
+        -------
+        None.
+
+        """
+        if camera_type in self.supported_cameras:  # automatic discovery of the registered classes
+            self.stop_live_stream()
+            if self.camera_ref is not None:
+                try:
+                    self.close()  # close the previously opened camera
+                except Exception as e:
+                    print("Exception during closing the camera:", type(e).__name__, str(e), flush=True)
+                self.camera_ref = None; self.camera_initialized = False; self.fps = 0; self.index_fps_buffer = 0
+            self.camera_type = camera_type
+            self.camera_ref = get_camera_class(self.camera_type)()  # initialize the camera controlling class
+            self.camera_ref.set_buffers_pool(self.buffers_pool); self.buffers_pool.clear()  # frames of other camera aren't reused
+            self.camera_initialized = self.camera_ref.initialize()  # explicit initialization method
+            self.awaiting_camera = not self.camera_initialized  # if camera not opened, the other one could be requested
+            # Dev Note about putting time.sleep() below - if the scripts launched in Python debugger by Visual Studio Code
+            if self.camera_initialized:
+                self.data_queue.put_nowait("Opened"); time.sleep(self.sleep_time_actions_ms); self.trigger_data.set()
+            else:
+                report = self.camera_ref.initialization_status(); self.camera_ref = None
+                self.data_queue.put_nowait("Camera NOT Opened. Problem report:\n" + report)
+                time.sleep(self.sleep_time_actions_ms); self.trigger_data.set()
+        elif self.camera_initialized:
+            self.data_queue.put_nowait(f"Camera NOT Opened. Problem report:\n'{camera_type}' not supported, active camera is kept")
+            time.sleep(self.sleep_time_actions_ms); self.trigger_data.set()
+        else:
+            self.initialized = False; self.data_queue.put_nowait("Camera not supported"); self.trigger_data.set()
+
+    # %% Acquisition methods
+    def snap_with_watchdog(self) -> tuple:
+        """
+        Snap image from the camera and register the result on the watchdog.
+
+        Returns
+        -------
+        tuple
+            (image or None if snap failed, time.perf_counter() value on the start of acquisition).
+
+        """
+        t_trace = self.tracer.start(); t1 = time.perf_counter(); image = None
+        try:
+            with self.camera_lock:
+                image = self.camera_ref.snap_image()
+        except Exception as e:
+            print("Exception during snapping image:", type(e).__name__, str(e), flush=True)
+        self.tracer.stop("snap", t_trace)
+        if image is None:
+            self.watchdog.snap_failed()
+        else:
+            self.watchdog.frame_acquired(t1)
+        return image, t1
+
+    def snap_accumulated(self) -> tuple:
+        """
+        Snap images until the accumulator provides the result (single image in the "Single" acquisition mode).
+
+        Returns
+        -------
+        tuple
+            (accumulated image or None if snap failed, time.perf_counter() value on the start of the first acquisition).
+
+        """
+        image, t1 = self.snap_with_watchdog(); t_first = t1
+        with self.camera_lock:
+            result = self.accumulator.add(image)
+        while image is not None and result is None:
+            self.buffers_pool.release(image)  # accumulated frame isn't needed anymore
+            image, t1 = self.snap_with_watchdog()
+            with self.camera_lock:
+                result = self.accumulator.add(image)
+        if result is not image:
+            self.buffers_pool.release(image)  # the result of accumulation is the separate (not pooled) array
+        return result, t_first
+
+    def record_image(self, image, acquisition_t: float = 0.0):
+        """
+        Put image with timestamp to the queue for recording.
+
+        Parameters
+        ----------
+        image : np.ndarray or None
+            Acquired image.
+        acquisition_t : float, optional
+            time.perf_counter() value on the moment of acquisition. The default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        if image is not None and self.images2record is not None:
+            timestamp_str = datetime.fromtimestamp(time.time()).strftime('%H:%M:%S.%f')[:-3]
+            with self.record_lock:
+                if self.record_pending_bytes + image.nbytes > self.record_budget_bytes:
+                    self.record_dropped += 1; return  # the recorder falls behind the acquisition
+                self.record_pending_bytes += image.nbytes
+            self.buffers_pool.retain(image)  # released by the recording Thread after writing
+            self.images2record.put_nowait((image, timestamp_str, acquisition_t))  # put numpy array and timestamps for record
+
+    def release_images2record(self):
+        """
+        Release frames not written by the stopped recording Thread back to the pool, they are counted as dropped.
+
+        Returns
+        -------
+        None.
+
+        """
+        while self.images2record is not None and not self.images2record.empty():
+            try:
+                self.buffers_pool.release(self.images2record.get_nowait()[0]); self.record_dropped += 1
+            except Empty:
+                break
+        with self.record_lock:
+            self.record_pending_bytes = 0
+
+    def set_last_frame(self, image: np.ndarray, frame_id: int):
+        """
+        Keep the delivered frame for computing its statistics, the previous one is released.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Delivered frame.
+        frame_id : int
+            Number of the frame in the shared memory ring.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.buffers_pool.retain(image)
+        with self.last_frame_lock:
+            previous_frame = self.last_frame; self.last_frame = image; self.last_frame_id = frame_id
+        if previous_frame is not None:
+            self.buffers_pool.release(previous_frame)
+
+    def frames_queue_full(self, frame_nbytes: int) -> bool:
+        """
+        Check that the frames Queue is full or the pending frames occupy the memory budget.
+
+        Parameters
+        ----------
+        frame_nbytes : int
+            Size of the frame in bytes.
+
+        Returns
+        -------
+        bool
+            True if the frame should be dropped.
+
+        """
+        if self.frames_queue.full():
+            return True
+        try:
+            n_pending = self.frames_queue.qsize()
+        except NotImplementedError:  # not implemented on macOS, only the size of the Queue limits pending frames
+            return False
+        return (n_pending + 1)*frame_nbytes > self.frames_budget_bytes and n_pending > 0  # single frame is always sent
+
+    def deliver_frame(self, image: np.ndarray, acquisition_t: float):
+        """
+        Send the frame from live stream to the main script, the frame is dropped if the frames Queue is full (or the budget).
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired image.
+        acquisition_t : float
+            time.perf_counter() value on the moment of acquisition.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.frames_queue_full(image.nbytes):
+            self.watchdog.frame_dropped(); return  # the ring slot with the not yet read frame shouldn't be overwritten
+        if self.stream_server is not None:  # viewers get frames dropped for UI too, they keep frames, so the copy is sent
+            self.stream_server.publish(image.copy(), acquisition_t, self.watchdog.frames_acquired)
+        t_trace = self.tracer.start()
+        try:
+            descriptor = self.frames_ring.publish(image, acquisition_t); self.frames_queue.put_nowait(descriptor)
+        except Full:
+            self.watchdog.frame_dropped(); return
+        self.tracer.stop("publish", t_trace, descriptor.frame_id); self.set_last_frame(image, descriptor.frame_id)
+        try:
+            queue_occupancy = self.frames_queue.qsize()
+        except NotImplementedError:  # not implemented on macOS
+            queue_occupancy = 0
+        self.watchdog.frame_delivered(queue_occupancy)
+        if self.frames_queue is self.data_queue:
+            self.trigger_data.set()  # frames and replies share the Queue, otherwise the trigger is set only for replies and snaps
+
+    def send_frame_stats(self):
+        """
+        Send the histogram and ROI statistics of the last delivered frame as ("Frame Stats", dict or None) to the main script.
+
+        Returns
+        -------
+        None.
+
+        """
+        t_trace = self.tracer.start(); frame_stats = None
+        with self.last_frame_lock:
+            last_frame = self.last_frame; last_frame_id = self.last_frame_id
+            self.buffers_pool.retain(last_frame)  # the buffer isn't reused while the statistics is computed
+        if last_frame is not None:
+            # Averaged frames are float ones, their saturation level is defined by the source frames
+            frame_stats = self.frame_stats.compute(last_frame, self.accumulator.source_dtype)  # None if ROI is outside of frame
+            if frame_stats is not None:
+                frame_stats["frame_id"] = last_frame_id
+            self.buffers_pool.release(last_frame)
+        self.tracer.stop("frame_stats", t_trace); self.send_reply(("Frame Stats", frame_stats))
+
+    def send_reply(self, reply: tuple):
+        """
+        Send the reply to the main script, which may be requested during the live stream (the Queue could be full of frames).
+
+        Parameters
+        ----------
+        reply : tuple
+            (reply name, data).
+
+        Returns
+        -------
+        None.
+
+        """
+        try:
+            self.data_queue.put(reply, timeout=0.5)  # waiting for the main script reading replies (or frames in the shared Queue)
+        except Full:
+            print(f"Reply '{reply[0]}' not sent, the data Queue is full", flush=True); return
+        self.trigger_data.set()
+
+    def update_expected_interval(self):
+        """
+        Set the expected interval between frames on the watchdog from the exposure time (if it's available).
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.camera_ref is not None and "Exposure Time" in self.camera_ref.available_camera_settings:
+            exposure_t = self.camera_ref.available_camera_settings["Exposure Time"]
+            factor = 1E-3 if exposure_t.get("unit", "ms") == "ms" else 1E-6
+            self.watchdog.set_expected_interval(factor*float(exposure_t["current"]))
+
+    def start_live_stream(self):
+        """
+        Start the Thread with continuous acquisition of images.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.schedule_thread is not None and self.schedule_thread.is_alive():
+            print("Live stream not started, the acquisition plan is running", flush=True); return
+        if not self.live_stream_flag and self.camera_initialized:
+            self.watchdog.reset(); self.update_expected_interval(); self.live_stream_flag = True
+            self.live_thread = Thread(target=self.live_stream, daemon=True); self.live_thread.start()
+
+    def stop_live_stream(self):
+        """
+        Stop the Thread with continuous acquisition of images.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.live_stream_flag = False
+        if self.live_thread is not None:
+            if self.live_thread.is_alive():
+                self.live_thread.join(timeout=self.watchdog.stall_timeout_s())
+            self.live_thread = None
+
+    def live_stream(self):
+        """
+        Acquire continuously images and send them to the main script, re-open the camera if it stalls.
+
+        Returns
+        -------
+        None.
+
+        """
+        n_frames = 0
+        while self.live_stream_flag:
+            image, t1 = self.snap_with_watchdog()
+            if image is not None:
+                with self.camera_lock:
+                    result = self.accumulator.add(image)  # None until N frames are accumulated (in not "Single" mode)
+                if result is not image:
+                    self.buffers_pool.release(image)  # accumulated frame isn't needed anymore
+                if result is None:
+                    continue
+                image = result
+                if self.pretrigger is not None:
+                    self.pretrigger.add(image, t1)  # copied to the ring, kept until the trigger
+                if self.record_flag:
+                    self.record_image(image, t1)
+                self.deliver_frame(image, t1); n_frames += 1
+                self.buffers_pool.release(image)  # the frame is kept only by the recording queue and as the last frame
+                if n_frames % self.n_images_fps_buffer == 0 and self.watchdog.mean_interval_s() > 0.0:
+                    self.fps = int(round(1.0/self.watchdog.mean_interval_s()))  # FPS for recording
+            else:
+                time.sleep(self.sleep_time_actions_ms)  # prevent busy loop if the camera returns nothing
+            if self.live_stream_flag and self.watchdog.needs_recovery():
+                self.recover_camera()
+
+    def recover_camera(self):
+        """
+        Re-open the stalled or failed camera of the same type.
+
+        Returns
+        -------
+        None.
+
+        """
+        print(f"The {self.camera_type} camera stalled or failed, re-opening it", flush=True); success = False
+        with self.camera_lock:
+            try:
+                self.camera_ref.close()
+            except Exception as e:
+                print("Exception during closing the camera:", type(e).__name__, str(e), flush=True)
+            try:
+                self.camera_ref = get_camera_class(self.camera_type)(); self.camera_ref.set_buffers_pool(self.buffers_pool)
+                success = self.camera_ref.initialize()
+            except Exception as e:
+                print("Exception during re-opening the camera:", type(e).__name__, str(e), flush=True)
+        self.watchdog.recovery_finished(success)
+        if not success:
+            print(f"The {self.camera_type} camera not re-opened, next attempt will be made", flush=True)
+            time.sleep(50*self.sleep_time_actions_ms)
+
+    # %% Time-lapse acquisition methods
+    def start_schedule(self, plan: dict):
+        """
+        Start the Thread executing the time-lapse acquisition plan, frames are written directly to the recorder.
+
+        Parameters
+        ----------
+        plan : dict
+            Plan for the AcquisitionScheduler (see the acq_scheduler module), additional keys: "path" - path to the file,
+            "format" - one of "mov", "avi", "raw" (the default is "raw").
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.live_stream_flag or (self.schedule_thread is not None and self.schedule_thread.is_alive()):
+            print("Acquisition plan not started, stop the live stream or the running plan before", flush=True); return
+        try:
+            self.scheduler = AcquisitionScheduler(plan)
+        except ValueError as e:
+            print("Acquisition plan not started:", str(e), flush=True); self.send_reply(("Schedule Failed", str(e))); return
+        record_format = plan.get("format", "raw") if plan.get("format", "raw") in recording_formats else "raw"
+        file_path = plan["path"] if plan.get("path", None) is not None else default_file_path(self.script_path, record_format)
+        fps = max(int(round(1.0/self.scheduler.interval_s)), 1)  # only the video recorders use it
+        recorder = create_recorder(record_format, str(file_path), fps, buffers_pool=self.buffers_pool)
+        self.schedule_thread = Thread(target=self.run_schedule, args=(self.scheduler, recorder), daemon=True)
+        self.watchdog.reset(); self.schedule_thread.start(); print("Start acquisition plan, recording to:", file_path, flush=True)
+
+    def run_schedule(self, scheduler: AcquisitionScheduler, recorder):
+        """
+        Execute the acquisition plan: wait for starts of bursts, set exposure times and acquire frames of each step.
+
+        Parameters
+        ----------
+        scheduler : AcquisitionScheduler
+            Timing of the plan.
+        recorder : VideoRecorder or RawRecorder
+            Recorder for writing acquired frames.
+
+        Returns
+        -------
+        None.
+
+        """
+        exposure_settings = self.camera_ref.available_camera_settings.get("Exposure Time", {})
+        initial_exposure = exposure_settings.get("current", None); current_exposure = initial_exposure
+        scheduler.start(); scheduled_t = scheduler.next_burst_t()
+        try:
+            while scheduled_t is not None and scheduler.wait_until(scheduled_t):
+                for i, (exposure_ms, burst_length) in enumerate(scheduler.steps):
+                    if exposure_ms is not None and exposure_ms != current_exposure:
+                        with self.camera_lock:
+                            self.camera_ref.set_exposure_time(exposure_ms)
+                        current_exposure = exposure_ms
+                    for j in range(burst_length):
+                        if scheduler.stopped:
+                            break
+                        image, t1 = self.snap_accumulated()
+                        if i == 0 and j == 0:
+                            scheduler.burst_started(scheduled_t, t1)
+                        if image is None:
+                            scheduler.n_failed += 1; continue
+                        timestamp_str = datetime.fromtimestamp(time.time()).strftime('%H:%M:%S.%f')[:-3]
+                        recorder.write(image, timestamp_str, t1); scheduler.n_frames += 1; self.recorded_frames += 1
+                        self.deliver_frame(image, t1)  # preview, dropped if the main script doesn't read frames
+                        self.buffers_pool.release(image)
+                scheduled_t = scheduler.next_burst_t()
+        except Exception as e:
+            print("Exception during the acquisition plan:", type(e).__name__, str(e), flush=True); scheduler.stop()
+        finally:
+            recorder.close()
+            if initial_exposure is not None and current_exposure != initial_exposure:
+                with self.camera_lock:
+                    self.camera_ref.set_exposure_time(initial_exposure)
+            print("Acquisition plan finished:", scheduler.stats(), flush=True); self.send_reply(("Schedule Finished", scheduler.stats()))
+
+    def stop_schedule(self):
+        """
+        Interrupt the acquisition plan and wait for the finishing of its Thread.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        if self.schedule_thread is not None:
+            if self.schedule_thread.is_alive():
+                self.schedule_thread.join(timeout=self.watchdog.stall_timeout_s())
+            self.schedule_thread = None
+
+    # %% Pre-trigger recording methods
+    def start_pretrigger(self, parameters: dict = None):
+        """
+        Start keeping the last frames of the live stream in the ring for saving them on the "Trigger Save" command.
+
+        Parameters
+        ----------
+        parameters : dict, optional
+            Supported keys: "pre_trigger_s", "post_trigger_frames", "budget_mb" (see PreTriggerRing), "folder" - folder for
+            saved files, "format" - one of "mov", "avi", "raw". The default is None (2 s, 100 frames, 128 MB, "raw" files in
+            the folder with the scripts).
+
+        Returns
+        -------
+        None.
+
+        """
+        parameters = parameters if parameters is not None else {}
+        self.stop_pretrigger()
+        try:
+            self.pretrigger = PreTriggerRing(parameters.get("pre_trigger_s", 2.0), parameters.get("post_trigger_frames", 100),
+                                             parameters.get("budget_mb", 128.0))
+        except (ValueError, TypeError) as e:
+            print("Pre-trigger recording not started:", str(e), flush=True); return
+        self.pretrigger_parameters = parameters; print("Pre-trigger recording started", flush=True)
+
+    def trigger_save(self):
+        """
+        Start the Thread saving the pre-trigger frames and the following post-trigger frames to the new file.
+
+        Returns
+        -------
+        None.
+
+        """
+        pretrigger = self.pretrigger
+        if pretrigger is None or not pretrigger.trigger():
+            print("Trigger ignored: pre-trigger recording isn't started, has no frames or is still saving", flush=True)
+            self.send_reply(("Trigger Ignored", None if pretrigger is None else pretrigger.stats())); return
+        record_format = self.pretrigger_parameters.get("format", "raw")
+        record_format = record_format if record_format in recording_formats else "raw"
+        folder = Path(self.pretrigger_parameters.get("folder", self.script_path))
+        file_path = str(folder.joinpath(f"pretrigger_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{pretrigger.n_triggers:03d}"
+                                        + recording_formats[record_format][0]))
+        recorder = create_recorder(record_format, file_path, max(self.fps, 1), buffers_pool=self.buffers_pool)
+        self.pretrigger_thread = Thread(target=self.flush_pretrigger, args=(pretrigger, recorder, file_path), daemon=True)
+        self.pretrigger_thread.start()
+
+    def flush_pretrigger(self, pretrigger: PreTriggerRing, recorder, file_path: str):
+        """
+        Write the triggered frames from the ring slots to the recorder (without copying) until post-trigger frames are saved.
+
+        Parameters
+        ----------
+        pretrigger : PreTriggerRing
+            Ring with the triggered frames.
+        recorder : VideoRecorder or RawRecorder
+            Recorder for writing frames.
+        file_path : str
+            Path to the file, sent in the reply.
+
+        Returns
+        -------
+        None.
+
+        """
+        last_frame_t = time.perf_counter()
+        try:
+            while True:
+                next_frame = pretrigger.next_frame()
+                if next_frame is None:
+                    if not pretrigger.saving:
+                        break
+                    if not self.live_stream_flag or time.perf_counter() - last_frame_t > self.watchdog.stall_timeout_s():
+                        pretrigger.finish()  # post-trigger frames won't be acquired
+                    time.sleep(self.sleep_time_actions_ms); continue
+                frame, acquisition_t, wall_t = next_frame; t_trace = self.tracer.start()
+                recorder.write(frame, datetime.fromtimestamp(wall_t).strftime('%H:%M:%S.%f')[:-3], acquisition_t)
+                del frame, next_frame; pretrigger.frame_flushed(); last_frame_t = time.perf_counter()
+                self.tracer.stop("pretrigger_write", t_trace)
+        except Exception as e:
+            print("Exception during saving of pre-trigger frames:", type(e).__name__, str(e), flush=True)
+            pretrigger.finish(); pretrigger.saving = False
+        finally:
+            recorder.close()
+        stats = pretrigger.stats(); stats["path"] = file_path
+        print("Pre-trigger frames saved:", stats, flush=True); self.send_reply(("Trigger Saved", stats))
+
+    def stop_pretrigger(self):
+        """
+        Stop keeping frames, wait for saving of the triggered frames and free the ring.
+
+        Returns
+        -------
+        None.
+
+        """
+        pretrigger = self.pretrigger; self.pretrigger = None
+        if pretrigger is not None:
+            pretrigger.finish()
+            if self.pretrigger_thread is not None and self.pretrigger_thread.is_alive():
+                self.pretrigger_thread.join(timeout=max(self.watchdog.stall_timeout_s(), 5.0))
+            pretrigger.release()
+        self.pretrigger_thread = None
+
+    # %% Streaming methods
+    def start_streaming(self, parameters: dict = None):
+        """
+        Start the server for streaming frames to the remote viewers.
+
+        Parameters
+        ----------
+        parameters : dict, optional
+            Supported keys: "address" - "host:port" or "unix:/path", "compression_level" - zlib level (0 - no compression).
+            The default is None (the server is started on "127.0.0.1:5555" without compression).
+
+        Returns
+        -------
+        None.
+
+        """
+        parameters = parameters if parameters is not None else {}
+        self.stop_streaming()
+        try:
+            self.stream_server = FramesStreamServer(address=parameters.get("address", "127.0.0.1:5555"),
+                                                    compression_level=int(parameters.get("compression_level", 0)))
+            self.stream_server.start()
+        except (OSError, ValueError) as e:
+            print("Frames streaming server not started:", type(e).__name__, str(e), flush=True); self.stream_server = None
+
+    def stop_streaming(self):
+        """
+        Stop the server for streaming frames.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.stream_server is not None:
+            self.stream_server.stop(); self.stream_server = None
 
     # %% Record method (can be moved in an additional Process isntead of Thread)
+    def start_recording(self, parameters: dict = None):
+        """
+        Start the Thread for recording of snapped images.
+
+        Parameters
+        ----------
+        parameters : dict, optional
+            Recording parameters, supported keys: "path" - path to the file, "format" - one of "mov", "avi", "mp4", "mjpeg",
+            "raw", "codec" - fourcc code of the video codec, "threads" - number of Threads encoding the "mjpeg" format,
+            "quality" - JPEG quality of the "mjpeg" format, "buffer_mb" - memory budget of frames waiting for recording
+            (256 MB by default). The default is None (".mov" file saved in the folder with the scripts).
+
+        Returns
+        -------
+        None.
+
+        """
+        if parameters is not None and parameters.get("path", None) is not None:
+            self.video_file_path = str(parameters["path"])
+        self.record_format = "mov"
+        if parameters is not None and parameters.get("format", None) in recording_formats:
+            self.record_format = parameters["format"]
+        self.record_options = {}  # codec, number of encoding Threads, JPEG quality
+        if parameters is not None:
+            for key, option in (("codec", "codec"), ("threads", "n_threads"), ("quality", "quality")):
+                if parameters.get(key, None) is not None:
+                    self.record_options[option] = parameters[key]
+        if parameters is not None and parameters.get("buffer_mb", None) is not None:
+            self.record_budget_bytes = int(max(float(parameters["buffer_mb"]), 1.0)*1E6)
+        self.record_pending_bytes = 0; self.record_dropped = 0
+        self.record_flag = True; self.images2record = thQueue(); self.recorded_frames = 0  # limited by the memory budget
+        self.record_thread = Thread(target=self.record); self.record_thread.start()
+        print("Start recording", flush=True)
+
     def record(self):
         """
-        Start record of snaps stream in video with ".mov" format.
+        Record images from the queue by the recorder for the selected format (".mov" video by default).
 
         Returns
         -------
@@ -236,42 +992,40 @@ class CameraWrapper(Process):
         """
         print("Start recording Thread", flush=True)
         if self.video_file_path is None:
-            timestamp = datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d_%H-%M-%S")
-            self.video_file_path = str(self.script_path.joinpath("test_video_" + timestamp + ".mov"))
-        first_step = True  # flag to create the video file handler
-        while self.record_flag:
-            if self.images2record is not None and not self.images2record.empty():
-                image, timestamp_str = self.images2record.get_nowait()
-                pil_img = Image.fromarray(image)  # conversion numpy array to PIL image
-                draw_handle = ImageDraw.Draw(pil_img)  # draw handle for put text
-                font = ImageFont.truetype(font='arial.ttf', size=22)  # embedded fonts
-                position = (25, 25)  # (x, y) position of writing
-                draw_handle.text(position, timestamp_str, fill=0, font=font)  # Add black text to a gray image
-                image2record = np.array(pil_img)  # conversion PIL image to np.ndarray
-                if first_step:  # prepare video file to write in
-                    self.cv2_codec = cv2.VideoWriter_fourcc(*'jpeg')  # 'mp4v', 'jpeg' for .mov file
-                    # self.cv2_codec = cv2.VideoWriter_fourcc(*'MJPG')  # for .avi file: xvid, mp4, mj
-                    img_shape_len = len(image2record.shape)  # length of image shape, assuming 2 for grayscaled image, 3 - for RGB (BGR)
-                    if img_shape_len == 2:
-                        h, w = image2record.shape
-                        # HINT: VideoWriter not supporting gray-scaled images, convert it before
-                        image2record = cv2.cvtColor(image2record, cv2.COLOR_GRAY2BGR)
-                        self.gray_scaled_img = True  # for designating of acquired image type
-                    elif img_shape_len == 3:
-                        h, w, _ = image2record.shape
-                        self.gray_scaled_img = False
-                        image2record = cv2.cvtColor(image2record, cv2.COLOR_RGB2BGR)  # required back conversion for pyopencv
-                    self.video_writer = cv2.VideoWriter(self.video_file_path, self.cv2_codec, self.fps, (w, h))
-                    self.video_writer.write(image2record); first_step = False
+            self.video_file_path = default_file_path(self.script_path, self.record_format)
+        # Frame rate written in the file is measured on the first recorded frames, the exposure time isn't used, since it
+        # doesn't include the readout / processing time. Exact timestamps of all frames are saved in the metadata file
+        images2record = self.images2record; first_frames = []; t_limit = time.perf_counter() + 1.0
+        while self.record_flag and len(first_frames) < 30 and time.perf_counter() < t_limit:
+            try:
+                first_frames.append(images2record.get(timeout=0.05))
+            except Empty:
+                pass
+        fps = self.fps
+        if len(first_frames) > 1 and first_frames[-1][2] > first_frames[0][2]:
+            fps = (len(first_frames) - 1)/(first_frames[-1][2] - first_frames[0][2])
+        recorder = None
+        try:
+            recorder = create_recorder(self.record_format, self.video_file_path, fps, buffers_pool=self.buffers_pool,
+                                       **self.record_options)
+            while self.record_flag or len(first_frames) > 0 or not images2record.empty():
+                if len(first_frames) > 0 or not images2record.empty():
+                    t_trace = self.tracer.start()
+                    image, timestamp_str, acquisition_t = first_frames.pop(0) if len(first_frames) > 0 else images2record.get_nowait()
+                    recorder.write(image, timestamp_str, acquisition_t); self.buffers_pool.release(image)
+                    with self.record_lock:
+                        self.record_pending_bytes -= image.nbytes
+                    self.recorded_frames += 1; self.tracer.stop("record_write", t_trace)
                 else:
-                    if self.gray_scaled_img:
-                        image2record = cv2.cvtColor(image2record, cv2.COLOR_GRAY2BGR)  # conversion from grayscale image to BGR format
-                    image2record = cv2.cvtColor(image2record, cv2.COLOR_RGB2BGR)  # required back conversion for pyopencv
-                    self.video_writer.write(image2record)  # write a frame
-            else:
-                time.sleep(self.sleep_time_actions_ms)
-        if not self.record_flag:
-            self.video_writer.release()  # close a file
+                    time.sleep(self.sleep_time_actions_ms)
+        except Exception as e:
+            print("Exception during recording:", type(e).__name__, str(e), flush=True); self.record_flag = False
+            self.send_reply(("Recording Failed", f"{type(e).__name__}: {e}"))  # e.g., the video file isn't opened by cv2
+        finally:
+            for image, _, _ in first_frames:
+                self.buffers_pool.release(image); self.record_dropped += 1
+            if recorder is not None:
+                recorder.close()  # close a file
             self.video_file_path = None; print("Stop recording Thread", flush=True)
 
     # %% Utility methods
@@ -1,20 +1,87 @@
 # -*- coding: utf-8 -*-
-"""Export from 'cameras' module."""
+"""
+Export from 'cameras' module.
 
-# For automatic discovery of the camera controlling classes, add the imports of camera class below next to SimulatedCamera
-# like from .simulated import MyCamera
+Camera controlling classes are resolved lazily through the registry below: the module with a camera class is imported
+only when the camera is selected, so the heavy API libraries (cv2, pypylon) aren't imported on the start of UI / Process.
 
-__description__ = "Automatic Import Resolving"
+"""
+# %% Global imports
+from importlib import import_module
+from importlib.metadata import entry_points
 
-__all__ = ['__description__']
+__description__ = "Lazy Import Resolving"
 
-if __name__ != "__main__" and __name__ != "__mp_main__":
-    # ADD below camera controlling classes which should implement methods from the abstract class 'AbstractCamera'
-    # See default 'SimulatedCamera' for example of implementation
-    from .simulated import SimulatedCamera
-    from .laptop_embedded import EmbeddedLaptopCamera
-    from .basler_area_cam import BaslerAreaCamera
-    # Automatuc augmentation of __all__ attribute for auto-exporting classes
-    cameras_cls_names = [camera_class for camera_class in locals().keys() if "Camera" in camera_class]
-    if len(cameras_cls_names) > 0:
-        __all__[1:] = cameras_cls_names[:]
+__all__ = ['__description__', 'cameras_registry', 'get_camera_types', 'get_camera_class']
+
+# %% Registry
+# ADD below camera type (name shown on UI) and the path "module:ClassName" to the controlling class which should implement
+# methods from the abstract class 'AbstractCamera'. See default 'SimulatedCamera' for example of implementation
+# The key should be the same as returned by the camera_type() method of the class
+cameras_registry = {"Simulated": "simulated:SimulatedCamera",
+                    "Laptop_Emb": "laptop_embedded:EmbeddedLaptopCamera",
+                    "Basler_Area": "basler_area_cam:BaslerAreaCamera"}
+# External packages can provide camera classes by the entry points group below, e.g. in pyproject.toml:
+# [project.entry-points."multip_wins_bpc.cameras"]  MyCamera = "my_package.my_camera:MyCamera"
+entry_points_group = "multip_wins_bpc.cameras"
+_loaded_classes = {}  # cache for already imported camera controlling classes
+
+
+# %% Functions
+def get_camera_types() -> list:
+    """
+    Get the list with supported camera types without importing the controlling classes.
+
+    Returns
+    -------
+    list
+        Camera types (names) from the registry and the discovered entry points.
+
+    """
+    camera_types = list(cameras_registry.keys())
+    try:
+        for entry_point in entry_points(group=entry_points_group):
+            if entry_point.name not in camera_types:
+                camera_types.append(entry_point.name)
+    except Exception:  # broken metadata of some installed package shouldn't break the UI
+        pass
+    return camera_types
+
+
+def get_camera_class(camera_type: str):
+    """
+    Import (only once) and return the controlling class for the provided camera type.
+
+    Parameters
+    ----------
+    camera_type : str
+        Camera type as it's shown on UI.
+
+    Raises
+    ------
+    ValueError
+        If the camera type isn't registered.
+
+    Returns
+    -------
+    class
+        Camera controlling class, child of AbstractCamera.
+
+    """
+    if camera_type in _loaded_classes:
+        return _loaded_classes[camera_type]
+    if camera_type in cameras_registry:
+        module_name, class_name = cameras_registry[camera_type].split(":")
+        camera_class = getattr(import_module("." + module_name, package=__name__), class_name)
+    else:
+        camera_class = None
+        try:
+            for entry_point in entry_points(group=entry_points_group):
+                if entry_point.name == camera_type:
+                    camera_class = entry_point.load(); break
+        except Exception:
+            camera_class = None
+        if camera_class is None:
+            raise ValueError(f"Provided camera type '{camera_type}' isn't registered")
+    _loaded_classes[camera_type] = camera_class
+    return camera_class
@@ -7,12 +7,15 @@ Camera abstract class that should be inherited by the actual camera controlling
 """
 # %% Global imports
 from abc import ABC, abstractmethod
+import numpy as np
 
 
 # %% Class def.
 class AbstractCamera(ABC):
     """Abstract class with methods what should be implemented by the camera controlling classes."""
 
+    buffers_pool = None  # pool of frame buffers set by the CameraWrapper, see the camera.buffers_pool module
+
     @abstractmethod
     def __init__(self):
         """Add placeholder for possible imports."""
@@ -94,6 +97,42 @@ class AbstractCamera(ABC):
         class_name = self.__class__.__name__  # getting the actual runtime class name for an instance (child class)
         return "Camera" in class_name  # returns True if the camera class name is valid (contains "Camera" in it)
 
+    def set_buffers_pool(self, buffers_pool):
+        """
+        Set the pool, from which buffers for acquired frames are borrowed.
+
+        Parameters
+        ----------
+        buffers_pool : FrameBuffersPool or None
+            Pool shared with other stages of the acquisition pipeline.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.buffers_pool = buffers_pool
+
+    def frame_buffer(self, shape: tuple, dtype) -> np.ndarray:
+        """
+        Provide the buffer for the acquired frame: borrowed from the pool or allocated, if the pool isn't set or exhausted.
+
+        Parameters
+        ----------
+        shape : tuple
+            Shape of the frame.
+        dtype : numpy dtype or str
+            Type of pixels.
+
+        Returns
+        -------
+        np.ndarray
+            Buffer for writing the frame.
+
+        """
+        buffer = self.buffers_pool.acquire(shape, dtype) if self.buffers_pool is not None else None
+        return buffer if buffer is not None else np.empty(shape, dtype=dtype)
+
     @abstractmethod
     def access_camera_settings(self):
         """
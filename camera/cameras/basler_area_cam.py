@@ -127,7 +127,7 @@ class BaslerAreaCamera(AbstractCamera):
         """
         current_image = None  # default value
         with self.camera_handle.GrabOne(1000) as res:
-            current_image = res.Array.copy()
+            current_image = self.frame_buffer(res.Array.shape, res.Array.dtype); np.copyto(current_image, res.Array)
         return current_image
 
     def set_exposure_time(self, exp_time_ms: float):
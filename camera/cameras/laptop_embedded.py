@@ -10,6 +10,8 @@ import numpy as np
 from pathlib import Path
 import platform
 import warnings
+import json
+import tempfile
 from typing import Union
 
 # Basic check that pyopencv library installed
@@ -37,10 +39,13 @@ class EmbeddedLaptopCamera(AbstractCamera):
     """Embedded in Laptop camera control."""
 
     available_camera_settings : dict = {}  # placeholder for a compatibility, all settings controlled through external window
+    max_probed_index: int = 5  # camera indices 0, 1, ... max_probed_index are checked for an available camera
+    # File for caching the index of the previously opened camera, allowing to skip probing of all indices next time
+    probe_cache_path: Path = Path(tempfile.gettempdir()).joinpath("multip_wins_bpc_laptop_cam.json")
 
     def __init__(self):
         self.camera_index = 0  # default camera index
-        self.camera_handle = None; self.lock_camera_settings = False
+        self.camera_handle = None; self.lock_camera_settings = False; self.bgr_frame = None  # reused by reading frames
         self.exp_t_ms = 0; self.img_width = 0; self.img_height = 0
         self.camera_report = ""  # default - empty report (no problems)
         self.platform = str(platform.system()).lower()
@@ -88,13 +93,20 @@ class EmbeddedLaptopCamera(AbstractCamera):
 
         """
         if pyopencv_installed:
-            # Search for a camera from indices 0, 1, ... 5
-            for i in range(0, 6, 1):
-                camera = cv2.VideoCapture(i, self.backend)
-                if camera.isOpened():
-                    print(f"Camera with index {i} is opened on OS '{self.platform}' with used backend: {camera.getBackendName()}", flush=True)
-                    self.camera_handle = camera; self.img_width = camera.get(cv2.CAP_PROP_FRAME_WIDTH)
-                    self.img_height = camera.get(cv2.CAP_PROP_FRAME_HEIGHT); break
+            # Check first the cached index of the previously opened camera (fast path), after - indices 0, 1, ... 5 one by one,
+            # probing stops on the first available camera, so other cameras aren't opened
+            cached_index = self.read_cached_index()
+            if cached_index is not None:
+                camera = self.open_capture(cached_index)
+                if camera is not None:
+                    self.set_camera_handle(camera, cached_index)
+            if self.camera_handle is None:
+                for i in range(0, self.max_probed_index + 1, 1):
+                    if i == cached_index:
+                        continue
+                    camera = self.open_capture(i)
+                    if camera is not None:
+                        self.set_camera_handle(camera, i); self.write_cached_index(i); break
             if self.camera_handle is not None and self.camera_handle.isOpened():
                 self.camera_report = ""; return True
             else:
@@ -102,6 +114,89 @@ class EmbeddedLaptopCamera(AbstractCamera):
         else:
             self.camera_report = "Required library 'pyopencv' not installed"; return False
 
+    def open_capture(self, index: int):
+        """
+        Try to open the camera with the provided index.
+
+        Parameters
+        ----------
+        index : int
+            Camera index for OpenCV VideoCapture.
+
+        Returns
+        -------
+        cv2.VideoCapture or None
+            Opened camera or None if it isn't available.
+
+        """
+        try:
+            camera = cv2.VideoCapture(index, self.backend)
+            if camera.isOpened():
+                return camera
+            camera.release()
+        except Exception:
+            pass
+        return None
+
+    def set_camera_handle(self, camera, index: int):
+        """
+        Store the opened camera handle along with its properties.
+
+        Parameters
+        ----------
+        camera : cv2.VideoCapture
+            Opened camera.
+        index : int
+            Camera index.
+
+        Returns
+        -------
+        None.
+
+        """
+        print(f"Camera with index {index} is opened on OS '{self.platform}' with used backend: {camera.getBackendName()}", flush=True)
+        self.camera_handle = camera; self.camera_index = index; self.img_width = camera.get(cv2.CAP_PROP_FRAME_WIDTH)
+        self.img_height = camera.get(cv2.CAP_PROP_FRAME_HEIGHT)
+
+    def read_cached_index(self) -> Union[int, None]:
+        """
+        Read the cached index of the previously opened camera.
+
+        Returns
+        -------
+        int or None
+            Cached index or None if it isn't stored.
+
+        """
+        try:
+            with open(self.probe_cache_path, 'r') as cache_file:
+                cached_index = json.load(cache_file).get(self.platform, None)
+            if isinstance(cached_index, int) and 0 <= cached_index <= self.max_probed_index:
+                return cached_index
+        except (OSError, ValueError, AttributeError):
+            pass
+        return None
+
+    def write_cached_index(self, index: int):
+        """
+        Store the index of the opened camera for the next initialization.
+
+        Parameters
+        ----------
+        index : int
+            Camera index.
+
+        Returns
+        -------
+        None.
+
+        """
+        try:
+            with open(self.probe_cache_path, 'w') as cache_file:
+                json.dump({self.platform: index}, cache_file)
+        except OSError:
+            pass
+
     def initialization_status(self) -> str:
         """
         Return stored problem report during initialization.
@@ -124,9 +219,10 @@ class EmbeddedLaptopCamera(AbstractCamera):
             2D matrix as the image.
 
         """
-        read_flag, frame = self.camera_handle.read()  # read single frame
+        read_flag, self.bgr_frame = self.camera_handle.read(self.bgr_frame)  # read single frame into the same array
         if read_flag:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)  # required conversion from BGR to RGB, because default is BGR
+            frame = self.frame_buffer(self.bgr_frame.shape, self.bgr_frame.dtype)
+            cv2.cvtColor(self.bgr_frame, cv2.COLOR_BGR2RGB, dst=frame)  # required conversion from BGR to RGB, because default is BGR
             return frame
         else:
             return None
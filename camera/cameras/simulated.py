@@ -30,10 +30,14 @@ class SimulatedCamera(AbstractCamera):
     available_camera_settings : dict = {"Exposure Time": {"min": 1, "max": 2000, "type": "int", "current": 40, "unit": "ms", "step": 1},
                                         "Max Acq. Random Delay": {"min": 0, "max": 11, "type": "int", "current": 0, "unit": "ms", "step": 1}}
 
+    supported_pixel_types: tuple = ("uint8", "uint16", "float32")  # uint16 images simulate 12 bit camera (values 0 ... 4095)
+
     def __init__(self):
         self.exposure_time = self.available_camera_settings["Exposure Time"]["current"]
         self.acq_random_delay = self.available_camera_settings["Max Acq. Random Delay"]["current"]
         self.lock_camera_settings = False  # flag for locking possibility to set anything
+        self.img_height = 480; self.img_width = 640; self.pixel_type = "uint8"  # default parameters of generated images
+        self.generator = np.random.default_rng(); self.noise_buffer = None  # noise is generated in-place, without allocations
         time.sleep(self.exposure_time/1000)
 
     def camera_type() -> str:
@@ -97,7 +101,15 @@ class SimulatedCamera(AbstractCamera):
         if self.acq_random_delay > 0:
             exp_time_offset = random.randint(0, self.acq_random_delay)  # random selection of integer delay for acquisition
         time.sleep((self.exposure_time + exp_time_offset)/1000)  # wait for an exposure time + some overhead
-        return np.random.randint(0, high=255, size=(480, 640), dtype='uint8')
+        shape = (self.img_height, self.img_width); image = self.frame_buffer(shape, self.pixel_type)
+        if self.pixel_type == "float32":
+            self.generator.random(dtype=np.float32, out=image); return image
+        # Integer noise: uniform [0, 1) values scaled to [0, 4094] (uint16, 12 bit camera) or [0, 254] (uint8) ranges
+        if self.noise_buffer is None or self.noise_buffer.shape != shape:
+            self.noise_buffer = np.empty(shape, dtype=np.float32)
+        self.generator.random(dtype=np.float32, out=self.noise_buffer)
+        np.multiply(self.noise_buffer, 4095.0 if self.pixel_type == "uint16" else 255.0, out=image, casting='unsafe')
+        return image
 
     def access_camera_settings(self):
         """
@@ -131,6 +143,41 @@ class SimulatedCamera(AbstractCamera):
         self.available_camera_settings["Exposure Time"]["current"] = exp_time_ms
         self.lock_camera_settings = False
 
+    def set_image_size(self, image_size: tuple):
+        """
+        Set height and width of generated images.
+
+        Parameters
+        ----------
+        image_size : tuple
+            (height, width) of images in pixels.
+
+        Returns
+        -------
+        None.
+
+        """
+        height, width = image_size
+        if int(height) >= 2 and int(width) >= 2:
+            self.img_height = int(height); self.img_width = int(width)
+
+    def set_pixel_type(self, pixel_type: str):
+        """
+        Set pixel type (dtype) of generated images.
+
+        Parameters
+        ----------
+        pixel_type : str
+            One of the supported pixel types: "uint8", "uint16", "float32".
+
+        Returns
+        -------
+        None.
+
+        """
+        if pixel_type in self.supported_pixel_types:
+            self.pixel_type = pixel_type
+
     def lock_unlock_settings(self, lock_state: bool):
         """
         Set lock / unlock state explicitly.
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Histogram and ROI statistics (mean, std, saturation fraction) of frames computed in the camera Process.
+
+Unsigned integer frames are counted by np.bincount on the (optionally subsampled) pixels of the ROI, all statistics are derived
+from the counts, so only the small histogram array and few numbers are sent to the UI instead of the full frame.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import math
+from typing import Union
+import numpy as np
+
+
+# %% Class def.
+class FrameStatistics():
+    """Compute the histogram and statistics of the ROI of a frame."""
+
+    def __init__(self, n_bins: int = 256, subsample: int = 1, roi: tuple = None, saturation_level: Union[int, float] = None):
+        """
+        Set the parameters of computation.
+
+        Parameters
+        ----------
+        n_bins : int, optional
+            Number of bins of the returned histogram. The default is 256.
+        subsample : int, optional
+            Only each n-th pixel along both axes is counted. The default is 1 (all pixels).
+        roi : tuple, optional
+            (row, column, height, width) of the region of interest. The default is None (full frame).
+        saturation_level : int or float, optional
+            Pixels with values >= this level are counted as saturated. The default is None: the maximum value of the range
+            of a frame (255 for uint8, 2^bit_depth - 1 for uint16 frames with the bit depth estimated from the maximum value
+            of frames). For float frames - the maximum of the source dtype (see the compute method) or, if it isn't provided,
+            1.0 for frames with values <= 1.0 and 2^bit_depth - 1 estimated from the maximum value for other ones.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.n_bins = 256; self.subsample = 1; self.roi = None; self.saturation_level = None; self.value_range = 256
+        self.set_parameters({"n_bins": n_bins, "subsample": subsample, "roi": roi, "saturation_level": saturation_level})
+
+    def set_parameters(self, parameters: dict):
+        """
+        Update the parameters provided in the dictionary, not provided ones are kept.
+
+        Parameters
+        ----------
+        parameters : dict
+            Keys "n_bins", "subsample", "roi", "saturation_level" - see the __init__ method.
+
+        Raises
+        ------
+        ValueError
+            If the number of bins or subsampling is less than 1 or ROI isn't specified as 4 integers.
+
+        Returns
+        -------
+        None.
+
+        """
+        if "n_bins" in parameters:
+            if int(parameters["n_bins"]) < 1:
+                raise ValueError("Number of bins should be positive")
+            self.n_bins = int(parameters["n_bins"])
+        if "subsample" in parameters:
+            if int(parameters["subsample"]) < 1:
+                raise ValueError("Subsampling should be positive")
+            self.subsample = int(parameters["subsample"])
+        if "roi" in parameters:
+            roi = parameters["roi"]
+            if roi is not None:
+                if len(roi) != 4 or min(roi[2:]) < 1 or min(roi[:2]) < 0:
+                    raise ValueError("ROI should be specified as (row, column, height, width) with positive sizes")
+                roi = tuple(int(value) for value in roi)
+            self.roi = roi
+        if "saturation_level" in parameters:
+            self.saturation_level = parameters["saturation_level"]
+        self.value_range = 256  # estimated again from the next frame
+
+    def select_pixels(self, image: np.ndarray) -> np.ndarray:
+        """
+        Take the ROI and subsample pixels of the image (views, the image isn't copied).
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Frame.
+
+        Returns
+        -------
+        np.ndarray
+            Selected pixels.
+
+        """
+        if self.roi is not None:
+            row, col, height, width = self.roi; image = image[row:row+height, col:col+width]
+        if self.subsample > 1:
+            image = image[::self.subsample, ::self.subsample]
+        return image
+
+    def compute(self, image: np.ndarray, source_dtype=None) -> Union[dict, None]:
+        """
+        Compute the histogram and statistics of the frame.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Frame (gray or RGB).
+        source_dtype : numpy dtype, optional
+            Type of pixels of frames, from which the float frame is accumulated (e.g., uint8 for the average of 8 bit frames),
+            defines the saturation level of float frames. The default is None.
+
+        Returns
+        -------
+        dict or None
+            "histogram" (np.ndarray with n_bins counts), "range" (values covered by the histogram), "mean", "std", "min", "max",
+            "saturated_fraction", "n_pixels". None if the ROI is outside of the frame.
+
+        """
+        pixels = self.select_pixels(image)
+        if pixels.size == 0:
+            return None
+        if np.issubdtype(pixels.dtype, np.unsignedinteger) and pixels.dtype.itemsize <= 2:
+            counts = np.bincount(pixels.ravel()); n_pixels = pixels.size
+            # Range of values: 256 for uint8, for uint16 - the power of 2 covering the max. value (bit depth of a camera)
+            if pixels.dtype == np.uint8:
+                self.value_range = 256
+            else:
+                self.value_range = max(self.value_range, 1 << max(8, int(counts.size - 1).bit_length()))
+            levels = np.arange(counts.size, dtype=np.float64); mean = float(np.dot(counts, levels)/n_pixels)
+            std = float(np.sqrt(max(np.dot(counts, levels*levels)/n_pixels - mean*mean, 0.0)))
+            non_zero = np.flatnonzero(counts); min_value = int(non_zero[0]); max_value = int(non_zero[-1])
+            saturation_level = self.saturation_level if self.saturation_level is not None else self.value_range - 1
+            saturated = int(np.sum(counts[int(saturation_level):])) if saturation_level < counts.size else 0
+            # Counts are summed into n_bins equal bins covering the range of values
+            n_bins = min(self.n_bins, self.value_range)  # bins aren't narrower than a single value
+            bins_starts = np.linspace(0, self.value_range, n_bins + 1).astype(np.int64)[:-1]
+            full_counts = np.zeros(self.value_range, dtype=np.int64); full_counts[:counts.size] = counts
+            histogram = np.add.reduceat(full_counts, bins_starts); values_range = (0, self.value_range)
+        else:
+            min_value = float(np.min(pixels)); max_value = float(np.max(pixels)); n_pixels = pixels.size
+            mean = float(np.mean(pixels)); std = float(np.std(pixels))
+            saturation_level = self.saturation_level
+            if saturation_level is None:
+                if source_dtype is not None and np.issubdtype(source_dtype, np.integer):
+                    saturation_level = float(np.iinfo(source_dtype).max)
+                elif max_value <= 1.0:
+                    saturation_level = 1.0  # normalized frame
+                else:  # values of integer frames, e.g. averaged ones, the bit depth is estimated as for uint16 frames
+                    saturation_level = float((1 << max(8, int(math.ceil(max_value)).bit_length())) - 1)
+            saturated = int(np.count_nonzero(pixels >= saturation_level))
+            values_range = (min_value, max_value if max_value > min_value else min_value + 1.0)
+            histogram, _ = np.histogram(pixels, bins=self.n_bins, range=values_range)
+        return {"histogram": histogram.astype(np.uint32), "range": values_range, "mean": mean, "std": std, "min": min_value,
+                "max": max_value, "saturated_fraction": saturated/n_pixels, "n_pixels": n_pixels}
+
+    def __call__(self, image: np.ndarray) -> Union[dict, None]:
+        """Compute the statistics, so the instance can be used as the processor in the camera.processing module."""
+        return self.compute(image)
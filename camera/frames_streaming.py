@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming of acquired frames over the local TCP or Unix socket for the remote (lightweight) viewers.
+
+Protocol: each message is prefixed by two unsigned 32 bit integers (network byte order) - lengths of the JSON header and
+of the payload. The header contains metadata of a frame (frame_id, timestamp, shape, dtype, compression), the payload -
+pixel values (optionally compressed by zlib). A viewer sends the single length-prefixed JSON message with its options
+after connecting: subsampling of frames ("subsample"), compression ("compression_level") and the maximum frame rate ("max_fps").
+
+The server only stores the reference to the latest frame for each viewer on publishing, subsampling, compression and sending
+are performed by the Thread of each viewer, so slow viewers skip frames instead of slowing down the acquisition.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import json
+import select
+import socket
+import struct
+import time
+import zlib
+from pathlib import Path
+from threading import Thread, Condition, Lock
+from typing import Union
+import numpy as np
+
+# %% Module parameters
+header_struct = struct.Struct("!II")  # lengths of the JSON header and the payload
+hello_struct = struct.Struct("!I")  # length of the JSON message with the viewer options
+max_header_nbytes = 64*1024  # protection against garbage received instead of the header
+
+
+# %% Functions
+def parse_address(address: str) -> tuple:
+    """
+    Parse the address of the streaming server.
+
+    Parameters
+    ----------
+    address : str
+        "host:port", "tcp://host:port" or "unix:/path/to/socket" (the last one only on OS supporting Unix sockets).
+
+    Raises
+    ------
+    ValueError
+        If the address can't be parsed or Unix sockets aren't supported.
+
+    Returns
+    -------
+    tuple
+        (socket family, address for the bind / connect methods).
+
+    """
+    if address.startswith("unix:"):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets aren't supported on this OS, use 'host:port' address")
+        return socket.AF_UNIX, address[len("unix:"):]
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, _, port = address.rpartition(":")
+    if len(host) == 0 or not port.isdigit():
+        raise ValueError(f"Address '{address}' should be provided as 'host:port'")
+    return socket.AF_INET, (host, int(port))
+
+
+def receive_exactly(sock: socket.socket, nbytes: int) -> bytearray:
+    """
+    Receive exactly the specified number of bytes.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        Connected socket.
+    nbytes : int
+        Number of bytes.
+
+    Raises
+    ------
+    ConnectionError
+        If the connection is closed before receiving all bytes.
+
+    Returns
+    -------
+    bytearray
+        Received bytes.
+
+    """
+    buffer = bytearray(nbytes); view = memoryview(buffer); n_received = 0
+    while n_received < nbytes:
+        n_chunk = sock.recv_into(view[n_received:], nbytes - n_received)
+        if n_chunk == 0:
+            raise ConnectionError("Connection closed by the other side")
+        n_received += n_chunk
+    return buffer
+
+
+def send_frame(sock: socket.socket, image: np.ndarray, metadata: dict, compression_level: int = 0):
+    """
+    Send the frame with the metadata header.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        Connected socket.
+    image : np.ndarray
+        Frame.
+    metadata : dict
+        Metadata of the frame (should be serializable to JSON).
+    compression_level : int, optional
+        Level of the zlib compression, 0 - no compression. The default is 0.
+
+    Returns
+    -------
+    None.
+
+    """
+    image = np.ascontiguousarray(image); payload = memoryview(image).cast('B')
+    metadata = dict(metadata, shape=list(image.shape), dtype=image.dtype.str, compression=None)
+    if compression_level > 0:
+        payload = zlib.compress(payload, compression_level); metadata["compression"] = "zlib"  # zlib releases GIL
+    header = json.dumps(metadata).encode("utf-8")
+    sock.sendall(header_struct.pack(len(header), len(payload)) + header); sock.sendall(payload)
+
+
+def receive_frame(sock: socket.socket) -> tuple:
+    """
+    Receive the frame sent by the send_frame() function.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        Connected socket.
+
+    Raises
+    ------
+    ConnectionError
+        If the connection is closed or the header is corrupted.
+
+    Returns
+    -------
+    tuple
+        (metadata dictionary, frame as np.ndarray).
+
+    """
+    header_nbytes, payload_nbytes = header_struct.unpack(receive_exactly(sock, header_struct.size))
+    if header_nbytes > max_header_nbytes:
+        raise ConnectionError("Corrupted header of the frame received")
+    metadata = json.loads(receive_exactly(sock, header_nbytes).decode("utf-8")); payload = receive_exactly(sock, payload_nbytes)
+    if metadata.get("compression", None) == "zlib":
+        payload = zlib.decompress(payload)
+    image = np.frombuffer(payload, dtype=np.dtype(metadata["dtype"])).reshape(metadata["shape"])
+    return metadata, image
+
+
+# %% Server side
+class ViewerConnection():
+    """Connected viewer with the Thread sending the latest published frame to it."""
+
+    def __init__(self, sock: socket.socket, options: dict, default_compression_level: int = 0):
+        self.sock = sock; self.subsample = max(int(options.get("subsample", 1)), 1)
+        self.compression_level = int(options.get("compression_level", default_compression_level))
+        self.min_interval_s = 1.0/float(options["max_fps"]) if options.get("max_fps", 0) else 0.0
+        self.latest_frame = None; self.frame_available = Condition(); self.running = True
+        self.frames_sent = 0; self.frames_skipped = 0; self.last_sent_t = 0.0
+        self.sender_thread = Thread(target=self.send_frames, daemon=True); self.sender_thread.start()
+
+    def offer(self, image: np.ndarray, metadata: dict):
+        """
+        Store the reference to the frame, not yet sent frame is replaced (skipped).
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Frame.
+        metadata : dict
+            Metadata of the frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.frame_available:
+            if self.latest_frame is not None:
+                self.frames_skipped += 1
+            self.latest_frame = (image, metadata); self.frame_available.notify()
+
+    def send_frames(self):
+        """
+        Send frames to the viewer until it's disconnected or the server stopped.
+
+        Returns
+        -------
+        None.
+
+        """
+        while self.running:
+            with self.frame_available:
+                if self.latest_frame is None:
+                    self.frame_available.wait(timeout=0.5)
+                frame = self.latest_frame; self.latest_frame = None
+            if frame is None:
+                continue
+            if self.min_interval_s > 0.0 and time.perf_counter() - self.last_sent_t < self.min_interval_s:
+                self.frames_skipped += 1; continue  # frame rate limited by the viewer
+            image, metadata = frame
+            if self.subsample > 1:
+                image = image[::self.subsample, ::self.subsample]; metadata = dict(metadata, subsample=self.subsample)
+            try:
+                send_frame(self.sock, image, metadata, self.compression_level)
+                self.frames_sent += 1; self.last_sent_t = time.perf_counter()
+            except OSError:
+                self.running = False  # viewer disconnected
+        self.close()
+
+    def close(self):
+        """
+        Stop sending and close the socket.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.running = False
+        with self.frame_available:
+            self.frame_available.notify()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class FramesStreamServer():
+    """Server accepting viewers and publishing frames to them, runs as Threads in the camera Process."""
+
+    def __init__(self, address: str = "127.0.0.1:5555", compression_level: int = 0, max_viewers: int = 8):
+        """
+        Create the server, the socket is opened by the start() method.
+
+        Parameters
+        ----------
+        address : str, optional
+            "host:port" or "unix:/path/to/socket". The default is "127.0.0.1:5555".
+        compression_level : int, optional
+            Default zlib compression level for viewers not requested it, 0 - no compression. The default is 0.
+        max_viewers : int, optional
+            Maximum number of connected viewers. The default is 8.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.address = address; self.family, self.bind_address = parse_address(address); self.compression_level = compression_level
+        self.max_viewers = max_viewers; self.viewers = []; self.viewers_lock = Lock(); self.server_socket = None
+        self.running = False; self.accept_thread = None
+
+    def start(self):
+        """
+        Open the server socket and start accepting viewers.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.family != socket.AF_INET and Path(self.bind_address).exists():
+            Path(self.bind_address).unlink()  # socket file remained from the previous session
+        self.server_socket = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_INET:
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind(self.bind_address); self.server_socket.listen(self.max_viewers)
+        self.server_socket.settimeout(0.5)  # for checking the running flag
+        self.running = True; self.accept_thread = Thread(target=self.accept_viewers, daemon=True); self.accept_thread.start()
+        print("Frames streaming server started on:", self.address, flush=True)
+
+    def accept_viewers(self):
+        """
+        Accept connections of viewers and read their options.
+
+        Returns
+        -------
+        None.
+
+        """
+        while self.running:
+            try:
+                sock, _ = self.server_socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break  # server socket closed
+            try:
+                sock.settimeout(2.0)  # the viewer options should be sent immediately after connecting
+                (hello_nbytes, ) = hello_struct.unpack(receive_exactly(sock, hello_struct.size))
+                options = json.loads(receive_exactly(sock, min(hello_nbytes, max_header_nbytes)).decode("utf-8"))
+                sock.settimeout(None)
+                if self.family == socket.AF_INET:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except (OSError, ValueError, ConnectionError):
+                sock.close(); continue
+            with self.viewers_lock:
+                self.viewers = [viewer for viewer in self.viewers if viewer.running]
+                if len(self.viewers) < self.max_viewers:
+                    self.viewers.append(ViewerConnection(sock, options, self.compression_level))
+                else:
+                    sock.close()
+
+    def publish(self, image: np.ndarray, timestamp: float = 0.0, frame_id: int = -1):
+        """
+        Offer the frame to all connected viewers, it's not copied, so the image shouldn't be modified in-place afterwards.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired image.
+        timestamp : float, optional
+            time.perf_counter() value on the moment of acquisition. The default is 0.0.
+        frame_id : int, optional
+            Number of a frame. The default is -1.
+
+        Returns
+        -------
+        None.
+
+        """
+        if len(self.viewers) == 0:
+            return
+        metadata = {"frame_id": frame_id, "timestamp": timestamp}
+        with self.viewers_lock:
+            for viewer in self.viewers:
+                if viewer.running:
+                    viewer.offer(image, metadata)
+
+    def stats(self) -> dict:
+        """
+        Provide counters of the sent and skipped frames.
+
+        Returns
+        -------
+        dict
+            Number of connected viewers and summed counters.
+
+        """
+        with self.viewers_lock:
+            viewers = [viewer for viewer in self.viewers if viewer.running]
+            return {"viewers": len(viewers), "frames_sent": sum(viewer.frames_sent for viewer in viewers),
+                    "frames_skipped": sum(viewer.frames_skipped for viewer in viewers)}
+
+    def stop(self):
+        """
+        Disconnect all viewers and close the server socket.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.running = False
+        if self.server_socket is not None:
+            self.server_socket.close(); self.server_socket = None
+        if self.accept_thread is not None:
+            self.accept_thread.join(timeout=1.0); self.accept_thread = None
+        with self.viewers_lock:
+            for viewer in self.viewers:
+                viewer.close()
+            self.viewers = []
+        if self.family != socket.AF_INET and Path(self.bind_address).exists():
+            Path(self.bind_address).unlink()
+        print("Frames streaming server stopped", flush=True)
+
+
+# %% Viewer side
+class FramesStreamClient():
+    """Viewer side connection to the FramesStreamServer."""
+
+    def __init__(self, address: str = "127.0.0.1:5555", subsample: int = 1, compression_level: int = 0, max_fps: float = 0.0):
+        self.address = address; self.family, self.connect_address = parse_address(address); self.sock = None
+        self.options = {"subsample": subsample, "compression_level": compression_level, "max_fps": max_fps}
+
+    def connect(self, timeout_s: float = 5.0):
+        """
+        Connect to the server and send the viewer options.
+
+        Parameters
+        ----------
+        timeout_s : float, optional
+            Timeout for connecting. The default is 5.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.sock = socket.socket(self.family, socket.SOCK_STREAM); self.sock.settimeout(timeout_s)
+        self.sock.connect(self.connect_address); hello = json.dumps(self.options).encode("utf-8")
+        self.sock.sendall(hello_struct.pack(len(hello)) + hello); self.sock.settimeout(None)
+
+    def receive(self, timeout_s: float = None) -> Union[tuple, None]:
+        """
+        Receive the next frame.
+
+        Parameters
+        ----------
+        timeout_s : float, optional
+            Timeout of waiting for the frame. The default is None (blocking call).
+
+        Returns
+        -------
+        tuple or None
+            (metadata, frame) or None if the timeout happened.
+
+        """
+        if timeout_s is not None and len(select.select([self.sock], [], [], timeout_s)[0]) == 0:
+            return None  # the timeout is applied only before the frame, partially received frame would break the stream
+        return receive_frame(self.sock)
+
+    def close(self):
+        """
+        Close the connection.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Transport of acquired frames between Processes through the ring of slots in the shared memory.
+
+Only the small descriptors of frames are sent by the multiprocessing Queues, so pending frames can be discarded without
+unpickling of the images by bumping the generation counter of the ring (see reset() method).
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import NamedTuple, Union
+import numpy as np
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    from utility_funcs import get_mp_context
+else:
+    from .utility_funcs import get_mp_context
+
+
+# %% Frame descriptor
+class FrameDescriptor(NamedTuple):
+    """Descriptor of a frame stored in the shared memory ring, sent instead of an image through the Queues."""
+
+    shm_name: str  # name of the shared memory block
+    slot: int  # index of the slot in the ring
+    offset: int  # offset in bytes of the slot from the beginning of the shared memory block
+    shape: tuple
+    dtype: str
+    generation: int  # generation of the ring on the moment of publishing a frame
+    frame_id: int  # unique (for the ring instance) number of a frame
+    timestamp: float  # time.perf_counter() value on the moment of a frame acquisition
+
+
+# %% Ring of frames
+class SharedFramesRing():
+    """Ring of slots in the shared memory, written by the camera Process (producer) and read by the main script (consumer)."""
+
+    header_alignment: int = 64  # bytes, alignment of the header and slots
+
+    def __init__(self, n_slots: int = 12):
+        """
+        Create the ring, the shared memory is allocated by the producer on the first published frame.
+
+        Parameters
+        ----------
+        n_slots : int, optional
+            Number of slots, should be larger than the maximum size of a Queue with descriptors. The default is 12.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.n_slots = n_slots; self.generation = get_mp_context().Value('Q', 0)  # shared counter, should be created before start
+        self.header_nbytes = self.aligned(8*self.n_slots)  # header - int64 id of a frame stored in each slot
+        self._shm = None; self._slot_nbytes = 0; self._next_slot = 0; self._frame_id = 0; self._slots_ids = None  # producer
+        self._attached = {}  # consumer: shared memory name -> (SharedMemory, array with slots ids)
+
+    def __getstate__(self) -> dict:
+        """Exclude handles to the shared memory blocks from pickling (passing to the Process)."""
+        state = self.__dict__.copy(); state['_shm'] = None; state['_slots_ids'] = None; state['_attached'] = {}
+        return state
+
+    def aligned(self, nbytes: int) -> int:
+        """Round up the number of bytes to the alignment value."""
+        return ((nbytes + self.header_alignment - 1) // self.header_alignment)*self.header_alignment
+
+    # %% Producer methods
+    def allocate(self, frame_nbytes: int):
+        """
+        Allocate the shared memory block with the slots fitting frames with the provided size.
+
+        Previously allocated block is released and the generation is increased, so the not yet read frames are discarded.
+
+        Parameters
+        ----------
+        frame_nbytes : int
+            Size of a frame in bytes.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.release()
+        self._slot_nbytes = self.aligned(max(frame_nbytes, 1))
+        self._shm = shared_memory.SharedMemory(create=True, size=self.header_nbytes + self.n_slots*self._slot_nbytes)
+        self._slots_ids = np.ndarray((self.n_slots, ), dtype=np.int64, buffer=self._shm.buf); self._slots_ids[:] = -1
+        self._next_slot = 0; self.reset()
+
+    def publish(self, image: np.ndarray, timestamp: float = 0.0) -> FrameDescriptor:
+        """
+        Copy the image in the next slot of the ring.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired image.
+        timestamp : float, optional
+            time.perf_counter() value on the moment of acquisition. The default is 0.0.
+
+        Returns
+        -------
+        FrameDescriptor
+            Descriptor of the stored frame for sending it through a Queue.
+
+        """
+        if self._shm is None or image.nbytes > self._slot_nbytes:
+            self.allocate(image.nbytes)
+        slot = self._next_slot; self._next_slot = (self._next_slot + 1) % self.n_slots; self._frame_id += 1
+        offset = self.header_nbytes + slot*self._slot_nbytes
+        self._slots_ids[slot] = -1  # mark the slot as being written
+        slot_view = np.ndarray(image.shape, dtype=image.dtype, buffer=self._shm.buf, offset=offset)
+        np.copyto(slot_view, image); del slot_view  # views shouldn't remain for allowing to close the shared memory
+        self._slots_ids[slot] = self._frame_id
+        return FrameDescriptor(self._shm.name, slot, offset, image.shape, image.dtype.str, self.generation.value,
+                               self._frame_id, timestamp)
+
+    def release(self):
+        """
+        Close and unlink the shared memory block allocated by the producer.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._shm is not None:
+            self._slots_ids = None
+            try:
+                self._shm.close(); self._shm.unlink()
+            except (BufferError, FileNotFoundError):
+                pass
+            self._shm = None
+
+    # %% Consumer methods
+    def reset(self):
+        """
+        Increase the generation, all already published and not read frames will be discarded by the read() method.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.generation.get_lock():
+            self.generation.value += 1
+
+    def attach(self, shm_name: str) -> Union[tuple, None]:
+        """
+        Attach to the shared memory block allocated by the producer, previously attached blocks are closed.
+
+        Parameters
+        ----------
+        shm_name : str
+            Name of the shared memory block.
+
+        Returns
+        -------
+        tuple or None
+            (SharedMemory, array with slots ids) or None if the block isn't available anymore.
+
+        """
+        if shm_name not in self._attached:
+            self.close()
+            # Note: the resource tracker is shared by the camera Process started from this one, so registering
+            # of the block on attaching doesn't lead to its unlinking by this Process, the block is unlinked by the producer
+            try:
+                shm = shared_memory.SharedMemory(name=shm_name, create=False)
+            except FileNotFoundError:
+                return None
+            self._attached[shm_name] = (shm, np.ndarray((self.n_slots, ), dtype=np.int64, buffer=shm.buf))
+        return self._attached[shm_name]
+
+    def read(self, descriptor: FrameDescriptor, out: np.ndarray = None, copy: bool = True) -> Union[np.ndarray, None]:
+        """
+        Read the frame from the ring.
+
+        Parameters
+        ----------
+        descriptor : FrameDescriptor
+            Descriptor received from a Queue.
+        out : np.ndarray, optional
+            Preallocated array for copying the frame into. The default is None.
+        copy : bool, optional
+            If False, the view on the slot is returned, it's valid until the producer overwrites the slot. The default is True.
+
+        Returns
+        -------
+        np.ndarray or None
+            Frame or None if it has been discarded (by reset) or overwritten.
+
+        """
+        if descriptor.generation != self.generation.value:
+            return None
+        attached = self.attach(descriptor.shm_name)
+        if attached is None:
+            return None
+        shm, slots_ids = attached
+        if slots_ids[descriptor.slot] != descriptor.frame_id:
+            return None
+        frame = np.ndarray(descriptor.shape, dtype=np.dtype(descriptor.dtype), buffer=shm.buf, offset=descriptor.offset)
+        if copy:
+            if out is not None and out.shape == frame.shape and out.dtype == frame.dtype:
+                np.copyto(out, frame); frame = out
+            else:
+                frame = frame.copy()
+            if slots_ids[descriptor.slot] != descriptor.frame_id:
+                return None  # the slot has been overwritten during copying
+        return frame
+
+    def close(self):
+        """
+        Close all shared memory blocks attached by the consumer.
+
+        Returns
+        -------
+        None.
+
+        """
+        for shm_name in list(self._attached.keys()):
+            shm, slots_ids = self._attached.pop(shm_name); del slots_ids  # the array should be deleted before closing
+            try:
+                shm.close()
+            except BufferError:
+                pass  # some view returned with copy=False still exists, the block will be closed by garbage collection
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-trigger recording: the last frames of the live stream are kept in the ring preallocated in the shared memory and
+written to the file only on the trigger, along with the defined number of frames acquired after it.
+
+The ring occupies the memory budget (number of slots = budget / size of a frame), on the trigger the frames acquired during
+the pre-trigger time are selected by their timestamps, so the result doesn't depend on the frame rate. Frames are flushed
+from the slots to the recorder without copying (views on the shared memory are written), the acquisition continues during
+flushing: slots not yet flushed aren't overwritten, the frame is dropped instead (counted) if the recorder falls behind.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+from multiprocessing import shared_memory
+from threading import Lock
+import time
+import numpy as np
+
+
+# %% Class def.
+class PreTriggerRing():
+    """Ring of the last frames in the shared memory, flushed with the following frames to the recorder on the trigger."""
+
+    def __init__(self, pre_trigger_s: float = 2.0, post_trigger_frames: int = 100, budget_mb: float = 128.0):
+        """
+        Check parameters, the shared memory is allocated on the first added frame.
+
+        Parameters
+        ----------
+        pre_trigger_s : float, optional
+            Time before the trigger, frames acquired during it are saved. The default is 2.0.
+        post_trigger_frames : int, optional
+            Number of frames acquired after the trigger and saved. The default is 100.
+        budget_mb : float, optional
+            Memory allocated for the ring in MB, limits the number of kept frames. The default is 128.0.
+
+        Raises
+        ------
+        ValueError
+            If parameters aren't positive.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.pre_trigger_s = float(pre_trigger_s); self.post_trigger_frames = int(post_trigger_frames)
+        self.budget_bytes = int(float(budget_mb)*1E6)
+        if self.pre_trigger_s < 0.0 or self.post_trigger_frames < 0 or self.budget_bytes <= 0:
+            raise ValueError("Pre-trigger time, number of post-trigger frames and memory budget should be positive, provided: "
+                             + f"{pre_trigger_s}, {post_trigger_frames}, {budget_mb}")
+        self._lock = Lock(); self._shm = None; self.frames = None; self.n_slots = 0; self.enabled = True
+        self.acquisition_times = None; self.wall_times = None; self.saving = False; self.n_triggers = 0
+        self.n_added = 0; self.n_dropped = 0; self.flush_index = 0; self.end_index = 0; self.n_pre = 0; self.n_flushed = 0
+
+    def allocate(self, shape: tuple, dtype):
+        """
+        Allocate the shared memory block for the ring of frames with the provided shape and dtype, should be called under the lock.
+
+        Parameters
+        ----------
+        shape : tuple
+            Shape of frames.
+        dtype : numpy dtype
+            Type of pixels.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.free(); dtype = np.dtype(dtype); frame_nbytes = max(int(np.prod(shape))*dtype.itemsize, 1)
+        self.n_slots = max(self.budget_bytes // frame_nbytes, 2)
+        self._shm = shared_memory.SharedMemory(create=True, size=self.n_slots*frame_nbytes)
+        self.frames = np.ndarray((self.n_slots, ) + tuple(shape), dtype=dtype, buffer=self._shm.buf)
+        self.acquisition_times = np.zeros((self.n_slots, )); self.wall_times = np.zeros((self.n_slots, )); self.n_added = 0
+
+    def add(self, image: np.ndarray, acquisition_t: float) -> bool:
+        """
+        Copy the frame to the next slot of the ring.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired frame.
+        acquisition_t : float
+            time.perf_counter() value on the moment of acquisition.
+
+        Returns
+        -------
+        bool
+            False if the frame is dropped (the slot isn't flushed yet or the frame shape changed during saving).
+
+        """
+        with self._lock:
+            if not self.enabled:
+                return False
+            if self.frames is None or image.shape != self.frames.shape[1:] or image.dtype != self.frames.dtype:
+                if self.saving:
+                    self.n_dropped += 1; return False
+                self.allocate(image.shape, image.dtype)
+            if self.saving and self.n_added - self.flush_index >= self.n_slots:
+                self.n_dropped += 1; return False  # the oldest slot is still waiting for flushing
+            slot = self.n_added % self.n_slots; np.copyto(self.frames[slot], image)
+            self.acquisition_times[slot] = acquisition_t; self.wall_times[slot] = time.time(); self.n_added += 1
+        return True
+
+    def trigger(self, trigger_t: float = None) -> bool:
+        """
+        Select frames acquired during the pre-trigger time and start waiting for post-trigger frames.
+
+        Parameters
+        ----------
+        trigger_t : float, optional
+            time.perf_counter() value of the trigger. The default is None (now).
+
+        Returns
+        -------
+        bool
+            False if the previous triggered frames are still being saved or there are no frames.
+
+        """
+        trigger_t = time.perf_counter() if trigger_t is None else trigger_t
+        with self._lock:
+            if self.saving or self.frames is None:
+                return False
+            start_index = max(0, self.n_added - self.n_slots)
+            while start_index < self.n_added and self.acquisition_times[start_index % self.n_slots] < trigger_t - self.pre_trigger_s:
+                start_index += 1
+            self.flush_index = start_index; self.n_pre = self.n_added - start_index; self.n_flushed = 0
+            self.end_index = self.n_added + self.post_trigger_frames; self.saving = True; self.n_triggers += 1
+        return True
+
+    def next_frame(self) -> tuple:
+        """
+        Provide the next frame for flushing, it's the view on the slot valid until frame_flushed() is called.
+
+        Returns
+        -------
+        tuple or None
+            (frame, acquisition time, wall clock time) or None if the next frame isn't acquired yet or saving is finished.
+
+        """
+        with self._lock:
+            if not self.saving:
+                return None
+            if self.flush_index >= self.end_index:
+                self.saving = False; return None
+            if self.flush_index >= self.n_added:
+                return None
+            slot = self.flush_index % self.n_slots
+            return self.frames[slot], float(self.acquisition_times[slot]), float(self.wall_times[slot])
+
+    def frame_flushed(self):
+        """
+        Release the slot of the flushed frame for acquisition.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            self.flush_index += 1; self.n_flushed += 1
+
+    def finish(self):
+        """
+        Stop waiting for post-trigger frames (e.g., the live stream stopped), only already acquired ones are flushed.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            self.end_index = min(self.end_index, self.n_added)
+
+    def free(self):
+        """
+        Close and unlink the shared memory block, should be called under the lock.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._shm is not None:
+            self.frames = None
+            try:
+                self._shm.close(); self._shm.unlink()
+            except (BufferError, FileNotFoundError):
+                pass
+            self._shm = None
+
+    def release(self):
+        """
+        Disable adding of frames and free the shared memory, should be called after finishing of flushing.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            self.enabled = False; self.saving = False; self.free()
+
+    def stats(self) -> dict:
+        """
+        Provide counters of the ring and the last trigger.
+
+        Returns
+        -------
+        dict
+            Number of slots, time span of kept frames in s, numbers of triggers, pre-trigger, flushed and dropped frames.
+
+        """
+        with self._lock:
+            n_kept = min(self.n_added, self.n_slots); kept_s = 0.0
+            if n_kept > 1:
+                newest = (self.n_added - 1) % self.n_slots; oldest = (self.n_added - n_kept) % self.n_slots
+                kept_s = float(self.acquisition_times[newest] - self.acquisition_times[oldest])
+            return {"n_slots": self.n_slots, "kept_s": round(kept_s, 3), "n_triggers": self.n_triggers, "n_pre": self.n_pre,
+                    "n_flushed": self.n_flushed, "n_dropped": self.n_dropped, "saving": self.saving}
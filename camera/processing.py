@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Real-time processing of acquired frames by the pool of Processes reading frames from the shared memory ring.
+
+Only the frames descriptors are sent to the workers, each worker reads the frame from the ring and applies the chain of
+processors (picklable callables, e.g. module level functions or instances of the classes below). Each processor receives
+the output array of the previous one (the frame for the first one), if a processor returns not an array (scalar, tuple),
+the next one receives the same array. Results of all processors are returned in the order of submitted frames.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Union
+import os
+import numpy as np
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    from utility_funcs import get_mp_context
+    from frames_transport import FrameDescriptor, SharedFramesRing
+else:
+    from .utility_funcs import get_mp_context
+    from .frames_transport import FrameDescriptor, SharedFramesRing
+
+# %% Worker globals (initialized in each worker Process)
+_worker_ring = None; _worker_processors = None
+
+
+# %% Built-in processors
+class BackgroundSubtraction():
+    """Subtract the background image, negative values are clipped to 0."""
+
+    def __init__(self, background: np.ndarray):
+        self.background = np.asarray(background, dtype=np.float32)
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        result = np.subtract(image, self.background, dtype=np.float32); np.maximum(result, 0.0, out=result)
+        return result
+
+
+class FlatFieldCorrection():
+    """Correct non-uniform illumination: (image - dark) / (flat - dark) * mean(flat - dark)."""
+
+    def __init__(self, flat: np.ndarray, dark: np.ndarray = None):
+        flat = np.asarray(flat, dtype=np.float32)
+        if dark is not None:
+            flat = flat - np.asarray(dark, dtype=np.float32)
+        self.dark = np.asarray(dark, dtype=np.float32) if dark is not None else None
+        np.maximum(flat, 1E-6, out=flat)  # prevent division by zero
+        self.gain = np.float32(np.mean(flat))/flat  # precomputed, so only multiplication is performed per frame
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        result = image.astype(np.float32) if self.dark is None else np.subtract(image, self.dark, dtype=np.float32)
+        np.multiply(result, self.gain, out=result)
+        return result
+
+
+class ThresholdMask():
+    """Binary mask of pixels above the threshold level, if the level is None, mean + 3*std of the image is used."""
+
+    def __init__(self, level: float = None):
+        self.level = level
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        level = self.level if self.level is not None else float(np.mean(image) + 3.0*np.std(image))
+        return (image > level).astype(np.uint8)
+
+
+class IntensityCentroid():
+    """Intensity weighted centroid (row, column) of the image, None if the image has zero intensity (saved as JSON null)."""
+
+    def __call__(self, image: np.ndarray) -> Union[tuple, None]:
+        image = np.asarray(image, dtype=np.float64); total = np.sum(image)
+        if total <= 0.0:
+            return None
+        rows = np.arange(image.shape[0], dtype=np.float64); cols = np.arange(image.shape[1], dtype=np.float64)
+        return (float(np.dot(np.sum(image, axis=1), rows)/total), float(np.dot(np.sum(image, axis=0), cols)/total))
+
+
+def create_processor(spec: str) -> tuple:
+    """
+    Create built-in processor from the string specification.
+
+    Parameters
+    ----------
+    spec : str
+        "background:path.npy", "flatfield:flat.npy[,dark.npy]", "threshold[:level]" or "centroid".
+
+    Raises
+    ------
+    ValueError
+        If the specification isn't recognized.
+
+    Returns
+    -------
+    tuple
+        (name, processor).
+
+    """
+    name, _, argument = spec.partition(":")
+    if name == "background":
+        return name, BackgroundSubtraction(np.load(argument))
+    elif name == "flatfield":
+        paths = argument.split(","); dark = np.load(paths[1]) if len(paths) > 1 else None
+        return name, FlatFieldCorrection(np.load(paths[0]), dark)
+    elif name == "threshold":
+        return name, ThresholdMask(float(argument) if len(argument) > 0 else None)
+    elif name == "centroid":
+        return name, IntensityCentroid()
+    raise ValueError(f"Processor '{spec}' isn't recognized, use: background:path, flatfield:path, threshold[:level], centroid")
+
+
+# %% Worker functions
+def init_worker(frames_ring: SharedFramesRing, processors: list):
+    """Store the ring (attached on the first read) and the processors in the worker Process."""
+    global _worker_ring, _worker_processors
+    _worker_ring = frames_ring; _worker_processors = processors
+
+
+def process_frame(descriptor: FrameDescriptor) -> Union[dict, None]:
+    """
+    Read the frame from the ring and apply the chain of processors.
+
+    Parameters
+    ----------
+    descriptor : FrameDescriptor
+        Descriptor of the frame.
+
+    Returns
+    -------
+    dict or None
+        Processor name -> result or None if the frame has been discarded or overwritten before reading.
+
+    """
+    image = _worker_ring.read(descriptor)
+    if image is None:
+        return None
+    results = {}
+    for name, processor in _worker_processors:
+        result = processor(image); results[name] = result
+        if isinstance(result, np.ndarray):
+            image = result
+    return results
+
+
+# %% Pipeline
+class ProcessingResult(NamedTuple):
+    """Results of processing of a frame, published alongside the frame descriptor."""
+
+    descriptor: FrameDescriptor
+    results: dict  # processor name -> result (array or scalar), empty if the frame has been discarded
+
+
+class ProcessingPipeline():
+    """Pool of Processes applying the chain of processors to frames from the shared memory ring in the submission order."""
+
+    def __init__(self, frames_ring: SharedFramesRing, processors: list, n_workers: int = None, max_in_flight: int = None):
+        """
+        Start the pool of Processes.
+
+        Parameters
+        ----------
+        frames_ring : SharedFramesRing
+            Ring used by the CameraWrapper for publishing frames.
+        processors : list
+            Pairs (name, picklable callable) applied one after another.
+        n_workers : int, optional
+            Number of worker Processes. The default is None (number of cores - 2, at least 1).
+        max_in_flight : int, optional
+            Maximum number of frames submitted and not collected, frames above it are skipped. The default is None
+            (the number of ring slots - 2, so frames aren't overwritten before reading by the workers).
+
+        Returns
+        -------
+        None.
+
+        """
+        if n_workers is None:
+            n_workers = max((os.cpu_count() or 1) - 2, 1)  # cores for the camera Process and UI are kept
+        self.processors = list(processors); self.n_workers = n_workers
+        self.max_in_flight = max_in_flight if max_in_flight is not None else max(frames_ring.n_slots - 2, 1)
+        self.executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=get_mp_context(), initializer=init_worker,
+                                            initargs=(frames_ring, self.processors))
+        self.in_flight = deque(); self.frames_submitted = 0; self.frames_skipped = 0; self.frames_discarded = 0
+        for future in [self.executor.submit(os.getpid) for _ in range(n_workers)]:
+            future.result()  # start the worker Processes before acquisition, otherwise the first frames are discarded
+
+    def submit(self, descriptor: FrameDescriptor) -> bool:
+        """
+        Submit the frame for processing.
+
+        Parameters
+        ----------
+        descriptor : FrameDescriptor
+            Descriptor of the frame received from the CameraWrapper.
+
+        Returns
+        -------
+        bool
+            False if the frame is skipped because the workers are busy.
+
+        """
+        if len(self.in_flight) >= self.max_in_flight:
+            self.frames_skipped += 1; return False
+        self.in_flight.append((descriptor, self.executor.submit(process_frame, descriptor))); self.frames_submitted += 1
+        return True
+
+    def collect(self, wait: bool = False) -> list:
+        """
+        Get the results of processed frames preserving the submission order.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            If True, wait for all submitted frames. The default is False (only already completed ones are returned).
+
+        Returns
+        -------
+        list
+            ProcessingResult instances.
+
+        """
+        processed = []
+        while len(self.in_flight) > 0 and (wait or self.in_flight[0][1].done()):
+            descriptor, future = self.in_flight.popleft()
+            try:
+                results = future.result()
+            except Exception as e:
+                print("Exception during processing of a frame:", type(e).__name__, str(e), flush=True); results = None
+            if results is None:
+                self.frames_discarded += 1; results = {}
+            processed.append(ProcessingResult(descriptor, results))
+        return processed
+
+    def stats(self) -> dict:
+        """
+        Provide counters of processed frames.
+
+        Returns
+        -------
+        dict
+            Number of submitted, skipped (workers busy), discarded (not available in the ring) and in flight frames.
+
+        """
+        return {"frames_submitted": self.frames_submitted, "frames_skipped": self.frames_skipped,
+                "frames_discarded": self.frames_discarded, "frames_in_flight": len(self.in_flight)}
+
+    def shutdown(self):
+        """
+        Stop the worker Processes, not collected results are cancelled.
+
+        Returns
+        -------
+        None.
+
+        """
+        for _, future in self.in_flight:
+            future.cancel()
+        self.in_flight.clear(); self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+"""
+Recorders of acquired frames to the files with different formats, used by the recording Thread of the CameraWrapper.
+
+Video formats ("mov", "avi", "mp4") are written by OpenCV (cv2) with the timestamps drawn on frames, the conversion to 8 bit
+BGR frames is made into the buffers allocated once (borrowed from the FrameBuffersPool, if it's provided). Not 8 bit frames
+are scaled by the range of values of the camera (e.g., 0..4095 for 12 bit), not by the maximum of each frame, so the
+brightness of the recorded frames doesn't flicker. The codec
+(fourcc code) can be changed from the default one for the format. The "mjpeg" format is the stream of JPEG images encoded
+in parallel by the pool of Threads (cv2 releases the GIL during encoding) and written to the file in the order of frames.
+The "raw" format is the binary file with the frames stored one after another without any conversion, it's the fastest
+format for maximum throughput captures. All recorders save the JSON file with metadata along with the recorded file, which
+contains timestamps of each frame, so the actual timing doesn't depend on the frame rate written in the video file.
+cv2 is imported only by the video recorders on opening of a file.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+# %% Module parameters
+# Format name -> (file extension, fourcc code of the video codec or None for not video formats)
+recording_formats = {"mov": (".mov", "jpeg"), "avi": (".avi", "MJPG"), "mp4": (".mp4", "mp4v"), "mjpeg": (".mjpeg", None),
+                     "raw": (".raw", None)}
+
+
+def save_metadata(file_path: str, metadata: dict, timestamps: list, acquisition_times_s: list):
+    """
+    Save the metadata with timestamps of recorded frames to the JSON file next to the recorded one.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the recorded file, the metadata is saved with the same name and ".json" extension.
+    metadata : dict
+        Metadata specific for the format.
+    timestamps : list
+        Timestamps (strings with the wall clock time) of frames.
+    acquisition_times_s : list
+        time.perf_counter() values on the moments of acquisition of frames.
+
+    Returns
+    -------
+    None.
+
+    """
+    metadata = dict(metadata); metadata["timestamps"] = timestamps; metadata["acquisition_times_s"] = acquisition_times_s
+    if len(acquisition_times_s) > 1 and acquisition_times_s[-1] > acquisition_times_s[0]:  # actual frame rate of recorded frames
+        metadata["measured_fps"] = round((len(acquisition_times_s) - 1)/(acquisition_times_s[-1] - acquisition_times_s[0]), 3)
+    with open(str(Path(file_path).with_suffix(".json")), "w") as file:
+        json.dump(metadata, file)
+
+
+def range_max(image: np.ndarray, current_max: float = 0.0) -> float:
+    """
+    Estimate the maximum value of the range of pixel values for the conversion of frames to 8 bit.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        Not 8 bit frame.
+    current_max : float, optional
+        Previous estimation, the range isn't narrowed. The default is 0.0.
+
+    Returns
+    -------
+    float
+        1.0 for normalized float frames, 2^bit_depth - 1 for other ones with the bit depth (>= 8) covering the maximum value.
+
+    """
+    max_value = float(np.max(image))
+    if current_max > 0.0 and max_value <= current_max:
+        return current_max
+    if not np.issubdtype(image.dtype, np.integer) and max_value <= 1.0:
+        return 1.0
+    return float((1 << max(8, int(np.ceil(max_value)).bit_length())) - 1)  # at least 255, also for the black frame
+
+
+# %% Recorders
+class VideoRecorder():
+    """Write frames with the drawn timestamps to the video file by OpenCV."""
+
+    def __init__(self, file_path: str, fps: float, fourcc: str, draw_timestamps: bool = True, buffers_pool=None):
+        self.file_path = file_path; self.fps = max(int(round(fps)), 1); self.fourcc = fourcc; self.draw_timestamps = draw_timestamps
+        self.video_writer = None; self.gray_scaled_img = False; self.n_frames = 0; self.buffers_pool = buffers_pool
+        self.bgr_buffer = None; self.uint8_buffer = None  # conversion buffers, allocated on opening
+        self.range_max = 0.0  # range of pixel values of not 8 bit frames, it's only extended by brighter frames
+        self.timestamps = []; self.acquisition_times_s = []  # saved in the metadata file
+
+    def open(self, image: np.ndarray):
+        """
+        Create the video file handler with the sizes of the first frame.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            First recorded frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        import cv2  # imports only for recording, making start of the Process faster
+        self.cv2 = cv2
+        # length of image shape, assuming 2 for grayscaled image, 3 - for RGB (BGR)
+        h, w = image.shape[:2]; self.gray_scaled_img = len(image.shape) == 2
+        self.bgr_buffer = self.borrow_buffer((h, w, 3), np.uint8)
+        if image.dtype != np.uint8:
+            self.uint8_buffer = self.borrow_buffer(image.shape, np.uint8)
+        # Integer frame rate, since containers (e.g., MPEG-4) reject fractional time bases, the exact one is in the metadata
+        self.video_writer = cv2.VideoWriter(self.file_path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (w, h))
+        if not self.video_writer.isOpened():
+            self.video_writer = None
+            raise ValueError(f"Video file '{self.file_path}' with the codec '{self.fourcc}' not opened by cv2")
+
+    def borrow_buffer(self, shape: tuple, dtype) -> np.ndarray:
+        """
+        Borrow the conversion buffer from the pool or allocate it, if the pool isn't provided or exhausted.
+
+        Parameters
+        ----------
+        shape : tuple
+            Shape of the buffer.
+        dtype : numpy dtype
+            Type of the buffer.
+
+        Returns
+        -------
+        np.ndarray
+            Buffer used until the recorder is closed.
+
+        """
+        buffer = self.buffers_pool.acquire(shape, dtype) if self.buffers_pool is not None else None
+        return buffer if buffer is not None else np.empty(shape, dtype=dtype)
+
+    def write(self, image: np.ndarray, timestamp_str: str, acquisition_t: float = 0.0):
+        """
+        Write the frame to the video file.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired image.
+        timestamp_str : str
+            Timestamp drawn on the frame.
+        acquisition_t : float, optional
+            time.perf_counter() value on the moment of acquisition, saved in the metadata. The default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.video_writer is None:
+            self.open(image)
+        if image.dtype != np.uint8 and self.uint8_buffer is not None and image.shape == self.uint8_buffer.shape:
+            # Video codecs support only 8 bit images, the range of pixel values is scaled into the preallocated buffer
+            self.range_max = range_max(image, self.range_max)
+            image = self.cv2.convertScaleAbs(image, dst=self.uint8_buffer, alpha=255.0/self.range_max)
+        elif image.dtype != np.uint8 or image.shape[:2] != self.bgr_buffer.shape[:2]:
+            print("Frame with changed shape or dtype skipped by the video recorder", flush=True); return
+        # HINT: VideoWriter not supporting gray-scaled images, convert it before. The conversion makes the copy of a frame,
+        # so the timestamp is drawn on it without modifying the frame shared with other stages
+        color_conversion = self.cv2.COLOR_GRAY2BGR if self.gray_scaled_img else self.cv2.COLOR_RGB2BGR
+        self.cv2.cvtColor(image, color_conversion, dst=self.bgr_buffer)
+        if self.draw_timestamps:  # black text
+            self.cv2.putText(self.bgr_buffer, timestamp_str, (25, 40), self.cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+        self.video_writer.write(self.bgr_buffer); self.n_frames += 1
+        self.timestamps.append(timestamp_str); self.acquisition_times_s.append(acquisition_t)
+
+    def close(self):
+        """
+        Close the video file and save the metadata.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.video_writer is not None:
+            self.video_writer.release(); self.video_writer = None
+            save_metadata(self.file_path, {"n_frames": self.n_frames, "fps": self.fps, "codec": self.fourcc},
+                          self.timestamps, self.acquisition_times_s)
+        if self.buffers_pool is not None:
+            for buffer in (self.bgr_buffer, self.uint8_buffer):
+                if buffer is not None:
+                    self.buffers_pool.release(buffer)
+        self.bgr_buffer = None; self.uint8_buffer = None
+
+
+class JpegStreamRecorder():
+    """Encode frames to JPEG images by the pool of Threads and write them to the file in the order of frames."""
+
+    def __init__(self, file_path: str, fps: int = 0, n_threads: int = None, quality: int = 90, draw_timestamps: bool = True,
+                 buffers_pool=None):
+        self.file_path = file_path; self.fps = round(fps, 3); self.quality = int(min(max(quality, 1), 100))
+        self.draw_timestamps = draw_timestamps
+        self.n_threads = max(int(n_threads), 1) if n_threads is not None else max(min((os.cpu_count() or 2) - 1, 8), 1)
+        self.buffers_pool = buffers_pool; self.executor = None; self.file = None; self.pending = deque(); self.n_frames = 0
+        self.offsets = []; self.sizes = []; self.timestamps = []; self.acquisition_times_s = []; self.shape = None
+        self.max_pending = 2*self.n_threads  # frames encoded simultaneously, the writing waits for the oldest one above it
+        self.range_max = 0.0  # range of pixel values of not 8 bit frames, it's only extended by brighter frames
+        self.thread_buffers = threading.local()  # conversion buffers of each encoding Thread, allocated once
+
+    def thread_buffer(self, name: str, shape: tuple) -> np.ndarray:
+        """
+        Get the uint8 conversion buffer of the calling Thread, it's allocated on the first call.
+
+        Parameters
+        ----------
+        name : str
+            Name of the buffer.
+        shape : tuple
+            Shape of the buffer.
+
+        Returns
+        -------
+        np.ndarray
+            Buffer reused by the Thread for next frames.
+
+        """
+        buffer = getattr(self.thread_buffers, name, None)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8); setattr(self.thread_buffers, name, buffer)
+        return buffer
+
+    def encode(self, image: np.ndarray, timestamp_str: str, shared: bool, alpha: float = 1.0) -> bytes:
+        """
+        Convert the frame to 8 bit, draw the timestamp and encode it (called by the Threads of the pool).
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired image.
+        timestamp_str : str
+            Timestamp drawn on the frame.
+        shared : bool
+            True if the frame is retained in the pool (shared with other stages), False if it's the copy owned by this recorder.
+        alpha : float, optional
+            Scale of not 8 bit frames to the 8 bit range. The default is 1.0.
+
+        Returns
+        -------
+        bytes
+            JPEG image.
+
+        """
+        try:
+            # The shared frame isn't modified: the timestamp is drawn on the conversion buffer of the Thread, the RGB frame is
+            # copied only once by the conversion to BGR
+            converted = image
+            if image.dtype != np.uint8:
+                converted = self.cv2.convertScaleAbs(image, dst=self.thread_buffer("uint8", image.shape), alpha=alpha)
+            if len(converted.shape) == 3:
+                converted = self.cv2.cvtColor(converted, self.cv2.COLOR_RGB2BGR, dst=self.thread_buffer("bgr", converted.shape))
+            elif converted is image and self.draw_timestamps and shared:
+                converted = self.thread_buffer("uint8", image.shape); np.copyto(converted, image)
+            if self.draw_timestamps:
+                self.cv2.putText(converted, timestamp_str, (25, 40), self.cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+            success, encoded = self.cv2.imencode(".jpg", converted, (self.cv2.IMWRITE_JPEG_QUALITY, self.quality))
+            if not success:
+                raise ValueError("Frame not encoded to JPEG")
+            return encoded.tobytes()
+        finally:
+            if shared:
+                self.buffers_pool.release(image)  # retained on submitting
+
+    def mux(self, wait_all: bool = False):
+        """
+        Write encoded frames in their order, waiting for the oldest one if too many frames are pending.
+
+        Parameters
+        ----------
+        wait_all : bool, optional
+            Wait for encoding of all pending frames. The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        while len(self.pending) > 0 and (wait_all or len(self.pending) >= self.max_pending or self.pending[0][0].done()):
+            future, timestamp_str, acquisition_t = self.pending.popleft(); encoded = future.result()
+            self.offsets.append(self.file.tell()); self.sizes.append(len(encoded)); self.file.write(encoded)
+            self.timestamps.append(timestamp_str); self.acquisition_times_s.append(acquisition_t); self.n_frames += 1
+
+    def write(self, image: np.ndarray, timestamp_str: str, acquisition_t: float = 0.0):
+        """
+        Submit the frame for encoding and write already encoded frames.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired image, retained in the pool until it's encoded or copied (if it isn't pooled).
+        timestamp_str : str
+            Timestamp of the frame.
+        acquisition_t : float, optional
+            time.perf_counter() value on the moment of acquisition. The default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.file is None:
+            import cv2  # imports only for recording, making start of the Process faster
+            self.cv2 = cv2; self.file = open(self.file_path, "wb"); self.shape = image.shape
+            self.executor = ThreadPoolExecutor(max_workers=self.n_threads, thread_name_prefix="jpeg_encoder")
+        if image.shape != self.shape:
+            print("Frame with changed shape skipped by the JPEG stream recorder", flush=True); return
+        if image.dtype != np.uint8:
+            self.range_max = range_max(image, self.range_max)  # the same scale for frames encoded by different Threads
+        alpha = 255.0/self.range_max if image.dtype != np.uint8 else 1.0
+        shared = self.buffers_pool is not None and self.buffers_pool.retain(image)
+        if not shared:
+            image = image.copy()  # not pooled frame (e.g., the reused buffer) can be changed by the caller after writing
+        self.pending.append((self.executor.submit(self.encode, image, timestamp_str, shared, alpha), timestamp_str, acquisition_t))
+        self.mux()
+
+    def close(self):
+        """
+        Wait for encoding of pending frames, close the file and save the metadata with offsets and sizes of JPEG images.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.file is not None:
+            try:
+                self.mux(wait_all=True)
+            finally:
+                self.executor.shutdown(wait=True); self.file.close(); self.file = None
+                save_metadata(self.file_path, {"frame_shape": list(self.shape), "n_frames": self.n_frames, "fps": self.fps,
+                                               "codec": "jpeg", "quality": self.quality, "offsets": self.offsets, "sizes": self.sizes},
+                              self.timestamps, self.acquisition_times_s)
+
+
+class RawRecorder():
+    """Write frames without any conversion to the binary file and their metadata to the JSON file."""
+
+    def __init__(self, file_path: str, fps: int = 0):
+        self.file_path = file_path; self.fps = round(fps, 3)
+        self.file = None; self.shape = None; self.dtype = None; self.timestamps = []; self.acquisition_times_s = []; self.n_frames = 0
+
+    def write(self, image: np.ndarray, timestamp_str: str, acquisition_t: float = 0.0):
+        """
+        Append the frame to the binary file.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Acquired image.
+        timestamp_str : str
+            Timestamp of the frame.
+        acquisition_t : float, optional
+            time.perf_counter() value on the moment of acquisition. The default is 0.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.file is None:
+            self.file = open(self.file_path, "wb"); self.shape = image.shape; self.dtype = image.dtype.str
+        if image.shape != self.shape or image.dtype.str != self.dtype:
+            print("Frame with changed shape or dtype skipped by the raw recorder", flush=True); return
+        self.file.write(memoryview(np.ascontiguousarray(image)))  # no intermediate bytes copy
+        self.timestamps.append(timestamp_str); self.acquisition_times_s.append(acquisition_t); self.n_frames += 1
+
+    def close(self):
+        """
+        Close the binary file and save the metadata.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.file is not None:
+            self.file.close(); self.file = None
+            shape = list(self.shape) if self.shape is not None else []
+            save_metadata(self.file_path, {"frame_shape": shape, "dtype": self.dtype, "n_frames": self.n_frames, "fps": self.fps},
+                          self.timestamps, self.acquisition_times_s)
+
+
+# %% Functions
+def default_file_path(folder: Path, file_format: str) -> str:
+    """
+    Compose the path to the file with the current date and time in the name.
+
+    Parameters
+    ----------
+    folder : Path
+        Folder for saving the file.
+    file_format : str
+        One of the supported formats.
+
+    Returns
+    -------
+    str
+        Path to the file.
+
+    """
+    timestamp = datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d_%H-%M-%S")
+    return str(Path(folder).joinpath("test_video_" + timestamp + recording_formats[file_format][0]))
+
+
+def create_recorder(file_format: str, file_path: str, fps: float, buffers_pool=None, codec: str = None, n_threads: int = None,
+                    quality: int = 90):
+    """
+    Create the recorder for the provided format.
+
+    Parameters
+    ----------
+    file_format : str
+        One of the supported formats: "mov", "avi", "mp4", "mjpeg", "raw".
+    file_path : str
+        Path to the file.
+    fps : float
+        Frame rate stored in the file.
+    buffers_pool : FrameBuffersPool, optional
+        Pool for borrowing conversion buffers of the video recorders. The default is None.
+    codec : str, optional
+        Fourcc code of the video codec (e.g., "MJPG", "XVID", "mp4v"), used by the video formats only. The default is None
+        (the codec of the format is used).
+    n_threads : int, optional
+        Number of Threads encoding frames of the "mjpeg" format. The default is None (number of CPU cores - 1, max 8).
+    quality : int, optional
+        JPEG quality (1 - 100) of the "mjpeg" format. The default is 90.
+
+    Raises
+    ------
+    ValueError
+        If the format or the codec isn't supported.
+
+    Returns
+    -------
+    VideoRecorder or JpegStreamRecorder or RawRecorder
+        Recorder with the write(image, timestamp_str, acquisition_t) and close() methods.
+
+    """
+    if file_format not in recording_formats:
+        raise ValueError(f"Recording format '{file_format}' isn't supported, use one of: {list(recording_formats.keys())}")
+    if file_format == "raw":
+        return RawRecorder(file_path, fps)
+    if file_format == "mjpeg":
+        return JpegStreamRecorder(file_path, fps, n_threads, quality, buffers_pool=buffers_pool)
+    fourcc = recording_formats[file_format][1] if codec is None else str(codec)
+    if len(fourcc) != 4:
+        raise ValueError(f"Codec should be provided as the fourcc code with 4 characters, provided: '{fourcc}'")
+    return VideoRecorder(file_path, fps, fourcc, buffers_pool=buffers_pool)
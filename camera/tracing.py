@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Low-overhead tracing of the hot-path stages (snap, transport, conversion, drawing, recording) per frame.
+
+Each stage is stored in the preallocated ring buffer as the start stamp and duration measured by time.perf_counter_ns().
+Tracing is disabled by default: the start() method returns immediately and the stop() method only checks the flag.
+It can be enabled by setting the environment variable MWPC_TRACING=1 before launching the scripts or in runtime.
+Stored stages can be exported as the JSON file in the Chrome trace format (open it by chrome://tracing or ui.perfetto.dev).
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import os
+import json
+import time
+import threading
+from itertools import count
+from pathlib import Path
+import numpy as np
+
+# %% Module parameters
+tracing_env_variable = "MWPC_TRACING"  # set it to "1" for enabling tracing in all Processes
+
+
+# %% Class def.
+class StageTracer():
+    """Ring buffer with the stamps of the traced stages, one instance per Process."""
+
+    def __init__(self, process_name: str, capacity: int = 100_000, enabled: bool = None):
+        """
+        Initialize the tracer, the ring buffer is allocated on enabling.
+
+        Parameters
+        ----------
+        process_name : str
+            Name of the Process shown on the trace viewer.
+        capacity : int, optional
+            Maximum number of stored stages, the oldest ones are overwritten. The default is 100_000.
+        enabled : bool, optional
+            Flag for enabling tracing. The default is None (value of the MWPC_TRACING environment variable is used).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.process_name = process_name; self.capacity = capacity; self.enabled = False
+        self.stages = []; self.stages_ids = {}  # names of stages and mapping of them to the stored ids
+        self._stage_ids = None; self._starts_ns = None; self._durations_ns = None; self._frame_ids = None; self._threads_ids = None
+        self._counter = count()  # next() is atomic, so stages can be stored from several Threads
+        if enabled is None:
+            enabled = os.environ.get(tracing_env_variable, "0").strip().lower() in ("1", "true", "yes", "on")
+        self.enable(enabled)
+
+    def __getstate__(self) -> dict:
+        """Exclude the ring buffer and the counter from pickling (passing to the Process), they are reallocated."""
+        state = self.__dict__.copy(); state['_counter'] = None
+        for key in ('_stage_ids', '_starts_ns', '_durations_ns', '_frame_ids', '_threads_ids'):
+            state[key] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        """Restore the tracer in the Process and reallocate the ring buffer if tracing is enabled."""
+        self.__dict__.update(state); self._counter = count()
+        if self.enabled:
+            self.allocate()
+
+    def allocate(self):
+        """
+        Allocate the ring buffer.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._stage_ids = np.full((self.capacity, ), -1, dtype=np.int16); self._starts_ns = np.zeros((self.capacity, ), dtype=np.int64)
+        self._durations_ns = np.zeros((self.capacity, ), dtype=np.int64); self._frame_ids = np.full((self.capacity, ), -1, dtype=np.int64)
+        self._threads_ids = np.zeros((self.capacity, ), dtype=np.int64); self._counter = count()
+
+    def enable(self, enabled: bool = True):
+        """
+        Enable or disable tracing, stored stages are kept.
+
+        Parameters
+        ----------
+        enabled : bool, optional
+            Flag for enabling tracing. The default is True.
+
+        Returns
+        -------
+        None.
+
+        """
+        if enabled and self._stage_ids is None:
+            self.allocate()
+        self.enabled = bool(enabled)
+
+    def clear(self):
+        """
+        Discard all stored stages.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._stage_ids is not None:
+            self._stage_ids[:] = -1; self._counter = count()
+
+    # %% Hot-path methods
+    def start(self) -> int:
+        """
+        Get the start stamp of a stage.
+
+        Returns
+        -------
+        int
+            time.perf_counter_ns() value or 0 if tracing is disabled.
+
+        """
+        if not self.enabled:
+            return 0
+        return time.perf_counter_ns()
+
+    def stop(self, stage: str, start_ns: int, frame_id: int = -1):
+        """
+        Store the stage started on the start_ns stamp and finished now.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage.
+        start_ns : int
+            Value returned by the start() method.
+        frame_id : int, optional
+            Number of a frame associated with the stage. The default is -1.
+
+        Returns
+        -------
+        None.
+
+        """
+        if not self.enabled or start_ns == 0:
+            return
+        stop_ns = time.perf_counter_ns(); stage_id = self.stages_ids.get(stage, None)
+        if stage_id is None:
+            stage_id = len(self.stages); self.stages.append(stage); self.stages_ids[stage] = stage_id
+        index = next(self._counter) % self.capacity
+        self._stage_ids[index] = stage_id; self._starts_ns[index] = start_ns; self._durations_ns[index] = stop_ns - start_ns
+        self._frame_ids[index] = frame_id; self._threads_ids[index] = threading.get_native_id()
+
+    # %% Export methods
+    def snapshot(self) -> dict:
+        """
+        Get stored stages as the compact dictionary (for sending it through a Queue).
+
+        Returns
+        -------
+        dict
+            Process name, id, names of stages and the arrays with stored values in the chronological order.
+
+        """
+        snapshot = {"process_name": self.process_name, "pid": os.getpid(), "stages": self.stages[:]}
+        if self._stage_ids is None:
+            snapshot.update({"stage_ids": np.zeros((0, ), dtype=np.int16), "starts_ns": np.zeros((0, ), dtype=np.int64),
+                             "durations_ns": np.zeros((0, ), dtype=np.int64), "frame_ids": np.zeros((0, ), dtype=np.int64),
+                             "threads_ids": np.zeros((0, ), dtype=np.int64)})
+            return snapshot
+        stored = self._stage_ids >= 0; order = np.argsort(self._starts_ns[stored], kind='stable')
+        for key, values in (("stage_ids", self._stage_ids), ("starts_ns", self._starts_ns), ("durations_ns", self._durations_ns),
+                            ("frame_ids", self._frame_ids), ("threads_ids", self._threads_ids)):
+            snapshot[key] = values[stored][order]
+        return snapshot
+
+    def summary(self) -> dict:
+        """
+        Calculate statistics of durations per stage.
+
+        Returns
+        -------
+        dict
+            Stage name -> dictionary with number of stored stages, mean, p50 and p99 durations in ms.
+
+        """
+        return summarize_snapshot(self.snapshot())
+
+
+# %% Functions
+def summarize_snapshot(snapshot: dict) -> dict:
+    """
+    Calculate statistics of durations per stage of the snapshot.
+
+    Parameters
+    ----------
+    snapshot : dict
+        Returned by the StageTracer.snapshot() method.
+
+    Returns
+    -------
+    dict
+        Stage name -> dictionary with number of stored stages, mean, p50 and p99 durations in ms.
+
+    """
+    summary = {}
+    for stage_id, stage in enumerate(snapshot["stages"]):
+        durations_ms = snapshot["durations_ns"][snapshot["stage_ids"] == stage_id]/1E6
+        if durations_ms.size > 0:
+            p50, p99 = np.percentile(durations_ms, [50, 99])
+            summary[stage] = {"n": int(durations_ms.size), "mean_ms": round(float(np.mean(durations_ms)), 4),
+                              "p50_ms": round(float(p50), 4), "p99_ms": round(float(p99), 4)}
+    return summary
+
+
+def snapshot2events(snapshot: dict) -> list:
+    """
+    Convert the snapshot to the list of the Chrome trace events.
+
+    Parameters
+    ----------
+    snapshot : dict
+        Returned by the StageTracer.snapshot() method.
+
+    Returns
+    -------
+    list
+        Complete ("X") events with timestamps and durations in us and the metadata event with the Process name.
+
+    """
+    pid = snapshot["pid"]; stages = snapshot["stages"]
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": snapshot["process_name"]}}]
+    for stage_id, start_ns, duration_ns, frame_id, thread_id in zip(snapshot["stage_ids"].tolist(), snapshot["starts_ns"].tolist(),
+                                                                    snapshot["durations_ns"].tolist(), snapshot["frame_ids"].tolist(),
+                                                                    snapshot["threads_ids"].tolist()):
+        event = {"name": stages[stage_id], "ph": "X", "pid": pid, "tid": thread_id, "ts": start_ns/1E3, "dur": duration_ns/1E3}
+        if frame_id >= 0:
+            event["args"] = {"frame_id": frame_id}
+        events.append(event)
+    return events
+
+
+def export_chrome_trace(file_path: str, snapshots: list) -> str:
+    """
+    Save snapshots from several Processes as the single file in the Chrome trace format.
+
+    Note that time.perf_counter_ns() uses the system-wide monotonic clock (on Windows and Linux), so the stages from
+    the different Processes are aligned on the timeline.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the JSON file.
+    snapshots : list
+        Snapshots returned by the StageTracer.snapshot() method.
+
+    Returns
+    -------
+    str
+        Path to the saved file.
+
+    """
+    events = []
+    for snapshot in snapshots:
+        events.extend(snapshot2events(snapshot))
+    with open(file_path, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    return str(Path(file_path).resolve())
@@ -6,9 +6,11 @@ Utility functions.
 
 """
 # %% Global imports
-from multiprocessing import Queue
+from multiprocessing import Queue, get_context, get_all_start_methods
 from queue import Empty
-import time
+
+# %% Module parameters
+_mp_context = None  # cached context used for creating the Processes, Queues and Events
 
 
 # %% Functions
@@ -16,10 +18,13 @@ def clean_mp_queue(queue: Queue) -> Queue:
     """
     Remove the stored in the Queue remained messages / data.
 
+    Items are removed without any delays between them. Frames should be sent through Queues as small descriptors
+    (see frames_transport module), so removing even many of them is fast.
+
     Parameters
     ----------
     queue : Queue
-        Instance of Queue class from the multiprocessing module.
+        Instance of Queue class from the multiprocessing or queue modules.
 
     Returns
     -------
@@ -28,9 +33,33 @@ def clean_mp_queue(queue: Queue) -> Queue:
 
     """
     if queue is not None:
-        while not queue.empty():
+        while True:
             try:
-                queue.get_nowait(); time.sleep(0.002)
+                queue.get_nowait()
             except Empty:
                 break
     return queue
+
+
+def get_mp_context():
+    """
+    Get the multiprocessing context used for all camera Processes and communication primitives.
+
+    The 'forkserver' start method is used where it's available: the server Process imports the main script and numpy only once,
+    and all CameraWrapper Processes are forked from it afterwards, so they don't pay the interpreter start and heavy imports.
+    On Windows the only available 'spawn' start method is used.
+
+    Returns
+    -------
+    multiprocessing.context.BaseContext
+        Context for creating Process, Queue and Event instances. Objects from different contexts shouldn't be mixed.
+
+    """
+    global _mp_context
+    if _mp_context is None:
+        if "forkserver" in get_all_start_methods():
+            _mp_context = get_context("forkserver")
+            _mp_context.set_forkserver_preload(["__main__", "numpy"])  # imported once by the server Process
+        else:
+            _mp_context = get_context("spawn")
+    return _mp_context
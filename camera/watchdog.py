@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Watchdog for tracking frames delivery of a camera and detecting its stalls.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import time
+import numpy as np
+
+
+# %% Class def.
+class AcquisitionWatchdog():
+    """Track intervals between acquired frames, drops and failed snaps, and decide when a camera should be re-opened."""
+
+    def __init__(self, stall_factor: float = 10.0, min_stall_timeout_s: float = 2.0, max_failed_snaps: int = 5,
+                 n_stored_intervals: int = 100):
+        """
+        Initialize counters.
+
+        Parameters
+        ----------
+        stall_factor : float, optional
+            Camera is stalled if no frames acquired during stall_factor*expected interval. The default is 10.0.
+        min_stall_timeout_s : float, optional
+            Minimal time without frames for considering a camera stalled. The default is 2.0.
+        max_failed_snaps : int, optional
+            Number of consecutive failed snaps after which a camera should be re-opened. The default is 5.
+        n_stored_intervals : int, optional
+            Number of last intervals between frames used for statistics. The default is 100.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.stall_factor = stall_factor; self.min_stall_timeout_s = min_stall_timeout_s; self.max_failed_snaps = max_failed_snaps
+        self.intervals_s = np.zeros((n_stored_intervals, )); self.n_stored_intervals = n_stored_intervals
+        self.expected_interval_s = 0.0; self.reset()
+
+    def reset(self):
+        """
+        Set all counters to the default values.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.frames_acquired = 0; self.frames_delivered = 0; self.frames_dropped = 0; self.failed_snaps = 0
+        self.consecutive_failures = 0; self.stalls = 0; self.recoveries = 0; self.failed_recoveries = 0
+        self.last_frame_t = None; self.index_interval = 0; self.n_intervals = 0; self.queue_occupancy = 0
+        self.started_t = time.perf_counter(); self.stall_reference_t = self.started_t
+
+    def set_expected_interval(self, interval_s: float):
+        """
+        Set expected interval between frames (e.g., from an exposure time).
+
+        Parameters
+        ----------
+        interval_s : float
+            Interval in seconds.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.expected_interval_s = max(interval_s, 0.0)
+
+    def frame_acquired(self, acquisition_t: float):
+        """
+        Register acquired frame.
+
+        Parameters
+        ----------
+        acquisition_t : float
+            time.perf_counter() value on the moment of acquisition.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.last_frame_t is not None:
+            self.intervals_s[self.index_interval] = acquisition_t - self.last_frame_t
+            self.index_interval = (self.index_interval + 1) % self.n_stored_intervals
+            self.n_intervals = min(self.n_intervals + 1, self.n_stored_intervals)
+        self.last_frame_t = acquisition_t; self.frames_acquired += 1; self.consecutive_failures = 0
+
+    def frame_delivered(self, queue_occupancy: int = 0):
+        """
+        Register frame put to the data Queue.
+
+        Parameters
+        ----------
+        queue_occupancy : int, optional
+            Number of items in the data Queue after putting the frame. The default is 0.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.frames_delivered += 1; self.queue_occupancy = queue_occupancy
+
+    def frame_dropped(self):
+        """
+        Register frame dropped because the data Queue is full.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.frames_dropped += 1
+
+    def snap_failed(self):
+        """
+        Register failed snap (None returned or exception raised by a camera).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.failed_snaps += 1; self.consecutive_failures += 1
+
+    def stall_timeout_s(self) -> float:
+        """
+        Time without new frames after which a camera is considered as stalled.
+
+        Returns
+        -------
+        float
+            Timeout in seconds.
+
+        """
+        return max(self.min_stall_timeout_s, self.stall_factor*max(self.expected_interval_s, self.mean_interval_s()))
+
+    def needs_recovery(self, now: float = None, check_stall: bool = True) -> bool:
+        """
+        Check if a camera should be re-opened because of failed snaps or a stall.
+
+        Parameters
+        ----------
+        now : float, optional
+            time.perf_counter() value. The default is None (current time is used).
+        check_stall : bool, optional
+            If False, only failed snaps are checked (for snaps requested by UI at arbitrary time). The default is True.
+
+        Returns
+        -------
+        bool
+            True if a camera should be re-opened.
+
+        """
+        if self.consecutive_failures >= self.max_failed_snaps:
+            return True
+        if not check_stall:
+            return False
+        if now is None:
+            now = time.perf_counter()
+        last_t = self.last_frame_t if self.last_frame_t is not None else self.stall_reference_t
+        if now - last_t > self.stall_timeout_s():
+            self.stalls += 1; return True
+        return False
+
+    def recovery_finished(self, success: bool):
+        """
+        Register the result of re-opening a camera.
+
+        Parameters
+        ----------
+        success : bool
+            True if the camera has been re-opened.
+
+        Returns
+        -------
+        None.
+
+        """
+        if success:
+            self.recoveries += 1
+        else:
+            self.failed_recoveries += 1
+        self.consecutive_failures = 0; self.last_frame_t = None; self.stall_reference_t = time.perf_counter()
+
+    def mean_interval_s(self) -> float:
+        """
+        Mean interval between the last acquired frames.
+
+        Returns
+        -------
+        float
+            Mean interval in seconds, 0.0 if not measured yet.
+
+        """
+        if self.n_intervals == 0:
+            return 0.0
+        return float(np.mean(self.intervals_s[:self.n_intervals]))
+
+    def counters(self) -> dict:
+        """
+        Provide counters as the dictionary for sending it to UI.
+
+        Returns
+        -------
+        dict
+            Structured counters and statistics of intervals between frames.
+
+        """
+        mean_interval_s = self.mean_interval_s(); max_interval_ms = 0.0
+        if self.n_intervals > 0:
+            max_interval_ms = round(1000.0*float(np.max(self.intervals_s[:self.n_intervals])), 3)
+        return {"frames_acquired": self.frames_acquired, "frames_delivered": self.frames_delivered,
+                "frames_dropped": self.frames_dropped, "failed_snaps": self.failed_snaps, "stalls": self.stalls,
+                "recoveries": self.recoveries, "failed_recoveries": self.failed_recoveries, "queue_occupancy": self.queue_occupancy,
+                "expected_interval_ms": round(1000.0*self.expected_interval_s, 3), "mean_interval_ms": round(1000.0*mean_interval_s, 3),
+                "max_interval_ms": max_interval_ms, "uptime_s": round(time.perf_counter() - self.started_t, 3)}
@@ -5,4 +5,4 @@ Additional windows specification.
 @author: sklykov
 @licence: MIT, @year: 2023
 """
-__all__ = ['adjust_sizes_ctrls_win', 'spinbox_wrapper']
+__all__ = ['adjust_sizes_ctrls_win', 'camera_settings', 'histogram_win', 'spinbox_wrapper']
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Window with the live histogram and ROI statistics of frames (computed in the camera Process, only small arrays are received).
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+from tkinter import Toplevel, Canvas, IntVar, BooleanVar, TOP, LEFT
+from tkinter.ttk import Label, Spinbox, Button, Checkbutton, Frame
+import numpy as np
+
+
+# %% Window specification
+class HistogramWin(Toplevel):
+    """Live histogram drawn as the single line on the Canvas and labels with ROI statistics."""
+
+    def __init__(self, master):
+        super().__init__(master); self.title("Histogram & ROI Statistics"); self.pad = 4
+        self.canvas_w = 384; self.canvas_h = 160
+        # shift this window relative to the master one first vertically, after - horizontally
+        y_shift = master.master.winfo_y() + master.master.winfo_height()//2
+        x_shift = master.master.winfo_x() + master.master.winfo_width() + 10
+        self.geometry(f"+{x_shift}+{y_shift}")
+
+        # Histogram drawn as the polyline, updated by changing its coordinates (no items are re-created)
+        self.canvas = Canvas(master=self, width=self.canvas_w, height=self.canvas_h, background="white")
+        self.histogram_line = self.canvas.create_line(0, self.canvas_h, self.canvas_w, self.canvas_h, fill="#1f3d99")
+        self.range_label = Label(master=self, text="Range: -")
+        self.log_scale = BooleanVar(value=True)
+        self.log_scale_btn = Checkbutton(master=self, text="Log Scale", variable=self.log_scale, onvalue=True, offvalue=False)
+        self.stats_label = Label(master=self, text="Mean: - | Std: - | Min / Max: - | Saturated: -")
+
+        # ROI selectors: row, column, height, width and subsampling of pixels
+        self.roi_frame = Frame(master=self); self.roi_values = []
+        for i, name in enumerate(("Row", "Col", "H", "W")):
+            value = IntVar(value=0 if i < 2 else 100); self.roi_values.append(value)
+            Label(master=self.roi_frame, text=f"{name}:").pack(side=LEFT, padx=1)
+            Spinbox(master=self.roi_frame, from_=0, to=20000, increment=10, width=5, textvariable=value).pack(side=LEFT, padx=2)
+        self.subsample = IntVar(value=2)
+        self.subsample_frame = Frame(master=self)
+        Label(master=self.subsample_frame, text="Subsample pixels:").pack(side=LEFT, padx=2)
+        self.subsample_selector = Spinbox(master=self.subsample_frame, from_=1, to=16, increment=1, width=3, textvariable=self.subsample)
+        self.subsample_selector.pack(side=LEFT, padx=2)
+        self.apply_roi_btn = Button(master=self.subsample_frame, text="Apply ROI", command=self.apply_roi)
+        self.full_frame_btn = Button(master=self.subsample_frame, text="Full Frame", command=self.apply_full_frame)
+        self.apply_roi_btn.pack(side=LEFT, padx=2); self.full_frame_btn.pack(side=LEFT, padx=2)
+
+        # Placing elements
+        self.canvas.pack(side=TOP, padx=self.pad, pady=self.pad); self.range_label.pack(side=TOP, padx=self.pad)
+        self.log_scale_btn.pack(side=TOP, padx=self.pad); self.stats_label.pack(side=TOP, padx=self.pad, pady=self.pad)
+        self.roi_frame.pack(side=TOP, padx=self.pad, pady=self.pad); self.subsample_frame.pack(side=TOP, padx=self.pad, pady=self.pad)
+        self.apply_full_frame(); self.update()
+
+    def apply_roi(self):
+        """
+        Send the ROI and subsampling to the camera.
+
+        Returns
+        -------
+        None.
+
+        """
+        try:
+            roi = tuple(int(value.get()) for value in self.roi_values); subsample = max(int(self.subsample.get()), 1)
+        except ValueError:
+            print("ROI and subsampling should be integer values", flush=True); return
+        self.master.send_cmd2camera(("Set Frame Stats", {"roi": roi, "subsample": subsample}))
+
+    def apply_full_frame(self):
+        """
+        Send the full frame ROI and subsampling to the camera.
+
+        Returns
+        -------
+        None.
+
+        """
+        try:
+            subsample = max(int(self.subsample.get()), 1)
+        except ValueError:
+            subsample = 1
+        self.master.send_cmd2camera(("Set Frame Stats", {"roi": None, "subsample": subsample}))
+
+    def update_stats(self, frame_stats: dict):
+        """
+        Redraw the histogram and update statistics labels.
+
+        Parameters
+        ----------
+        frame_stats : dict
+            Statistics computed by camera.frame_stats.FrameStatistics.
+
+        Returns
+        -------
+        None.
+
+        """
+        histogram = np.asarray(frame_stats["histogram"], dtype=np.float64)
+        if self.log_scale.get():
+            histogram = np.log1p(histogram)
+        max_count = np.max(histogram) if histogram.size > 0 else 0.0
+        if max_count > 0.0:
+            # Steps of the histogram: 2 points per bin, x - bin edges, y - scaled counts (0 at the bottom of the Canvas)
+            edges = np.linspace(0, self.canvas_w, histogram.size + 1); heights = self.canvas_h*(1.0 - histogram/max_count)
+            coordinates = np.empty((2*histogram.size, 2)); coordinates[0::2, 0] = edges[:-1]; coordinates[1::2, 0] = edges[1:]
+            coordinates[0::2, 1] = heights; coordinates[1::2, 1] = heights
+            self.canvas.coords(self.histogram_line, *coordinates.ravel().tolist())
+        self.range_label.config(text=f"Range: {frame_stats['range'][0]:g} - {frame_stats['range'][1]:g}")
+        self.stats_label.config(text=f"Mean: {frame_stats['mean']:.1f} | Std: {frame_stats['std']:.1f} | "
+                                + f"Min / Max: {frame_stats['min']:g} / {frame_stats['max']:g} | "
+                                + f"Saturated: {100.0*frame_stats['saturated_fraction']:.2f}%")
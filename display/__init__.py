@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""Export from this module."""
+
+__all__ = ['auto_contrast', 'frame_preparation', 'pacing', 'perf_recorder']
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Percentile based auto-contrast of frames with temporal smoothing of the display levels.
+
+Levels are estimated each N frames from the histogram of the subsampled pixels (np.bincount for uint8 / uint16 frames),
+smoothed by the exponential moving average, so the displayed contrast doesn't flicker on noisy frames. Integer frames are
+mapped to uint8 by the lookup table in one vectorized pass (np.take), the table is rebuilt only if the levels changed.
+This module doesn't depend on any GUI library.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import numpy as np
+
+
+# %% Class def.
+class AutoContrast():
+    """Map frames to uint8 [0, 255] display range using smoothed percentile levels."""
+
+    def __init__(self, low_percentile: float = 0.5, high_percentile: float = 99.5, update_interval: int = 5,
+                 smoothing: float = 0.3, subsample: int = 4):
+        """
+        Set the parameters of auto-contrast.
+
+        Parameters
+        ----------
+        low_percentile : float, optional
+            Percentile of pixel values mapped to 0. The default is 0.5.
+        high_percentile : float, optional
+            Percentile of pixel values mapped to 255. The default is 99.5.
+        update_interval : int, optional
+            Levels are estimated each N frames. The default is 5.
+        smoothing : float, optional
+            Weight of newly estimated levels in the exponential moving average, 1.0 - without smoothing. The default is 0.3.
+        subsample : int, optional
+            Only each n-th pixel along both axes is used for estimation of levels. The default is 4.
+
+        Raises
+        ------
+        ValueError
+            If the percentiles aren't in the increasing order within [0, 100] range.
+
+        Returns
+        -------
+        None.
+
+        """
+        if not 0.0 <= low_percentile < high_percentile <= 100.0:
+            raise ValueError("Percentiles should satisfy: 0 <= low percentile < high percentile <= 100")
+        self.low_percentile = low_percentile; self.high_percentile = high_percentile
+        self.update_interval = max(int(update_interval), 1); self.smoothing = min(max(float(smoothing), 0.0), 1.0)
+        self.subsample = max(int(subsample), 1); self.reset()
+
+    def reset(self):
+        """
+        Discard the estimated levels and the lookup table (e.g., if the camera is changed).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.levels = None; self.n_frames = 0; self.lut = None; self.lut_levels = None; self.dtype = None
+        self.out_buffer = None; self.float_buffer = None
+
+    def estimate_levels(self, image: np.ndarray) -> tuple:
+        """
+        Estimate the low and high levels from the percentiles of the subsampled pixels.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Gray scaled frame.
+
+        Returns
+        -------
+        tuple
+            (low level, high level).
+
+        """
+        pixels = image[::self.subsample, ::self.subsample]
+        if np.issubdtype(pixels.dtype, np.unsignedinteger) and pixels.dtype.itemsize <= 2:
+            cumulative = np.cumsum(np.bincount(pixels.ravel())); n_pixels = cumulative[-1]
+            low = float(np.searchsorted(cumulative, 0.01*self.low_percentile*n_pixels, side="right"))
+            high = float(np.searchsorted(cumulative, 0.01*self.high_percentile*n_pixels, side="left"))
+        else:
+            low, high = (float(value) for value in np.percentile(pixels, (self.low_percentile, self.high_percentile)))
+        if high <= low:
+            high = low + 1.0  # uniform frame
+        return low, high
+
+    def update_levels(self, image: np.ndarray):
+        """
+        Estimate levels each N frames and smooth them by the exponential moving average.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Gray scaled frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.dtype != image.dtype:
+            self.reset(); self.dtype = image.dtype  # levels of frames with other pixel type aren't comparable
+        if self.levels is None or self.n_frames % self.update_interval == 0:
+            low, high = self.estimate_levels(image)
+            if self.levels is None:
+                self.levels = (low, high)
+            else:
+                self.levels = (self.levels[0] + self.smoothing*(low - self.levels[0]),
+                               self.levels[1] + self.smoothing*(high - self.levels[1]))
+        self.n_frames += 1
+
+    def build_lut(self, n_values: int):
+        """
+        Build the lookup table: value -> uint8 display value for the current levels.
+
+        Parameters
+        ----------
+        n_values : int
+            Number of possible values of frames (256 for uint8, 65536 for uint16).
+
+        Returns
+        -------
+        None.
+
+        """
+        low, high = self.levels; values = np.arange(n_values, dtype=np.float32)
+        np.subtract(values, low, out=values); np.multiply(values, 255.0/(high - low), out=values)
+        np.clip(values, 0.0, 255.0, out=values); self.lut = np.round(values).astype(np.uint8); self.lut_levels = self.levels
+
+    def apply(self, image: np.ndarray, out: np.ndarray = None) -> tuple:
+        """
+        Map the frame to the uint8 display range.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Gray scaled frame.
+        out : np.ndarray, optional
+            uint8 array with the same shape as the frame for storing the result. The default is None (internal buffer is used).
+
+        Returns
+        -------
+        tuple
+            (uint8 image to display - reused buffer, so it's overwritten by the next call, 0, 255).
+
+        """
+        self.update_levels(image)
+        if out is None:
+            if self.out_buffer is None or self.out_buffer.shape != image.shape:
+                self.out_buffer = np.empty(image.shape, dtype=np.uint8)
+            out = self.out_buffer
+        if np.issubdtype(image.dtype, np.unsignedinteger) and image.dtype.itemsize <= 2:
+            # Levels change smoothly, so the table is rebuilt only if they shifted more than by 0.5 of a value
+            if self.lut is None or max(abs(self.levels[0] - self.lut_levels[0]), abs(self.levels[1] - self.lut_levels[1])) >= 0.5:
+                self.build_lut(np.iinfo(image.dtype).max + 1)
+            np.take(self.lut, image, out=out, mode='clip')  # 'clip' mode skips the check of indices
+        else:
+            if self.float_buffer is None or self.float_buffer.shape != image.shape:
+                self.float_buffer = np.empty(image.shape, dtype=np.float32)
+            low, high = self.levels
+            np.subtract(image, low, out=self.float_buffer, casting='unsafe')
+            np.multiply(self.float_buffer, 255.0/(high - low), out=self.float_buffer)
+            np.clip(self.float_buffer, 0.0, 255.0, out=self.float_buffer); np.copyto(out, self.float_buffer, casting='unsafe')
+        return out, 0, 255
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Conversion of acquired frames to the representation used for displaying them on UI.
+
+The FrameDisplayPreparer is the common display path of the tkinter, Qt and wx front ends: frames are decimated to the
+display size, mapped to uint8 by the contrast lookup table (min / max, smoothed percentiles or full range of the pixel
+type) and optionally expanded to RGB, all into buffers reused across frames. UI scripts only pass its output to their
+toolkit (matplotlib AxesImage, pyqtgraph ImageItem, wx.Bitmap). This module doesn't depend on any GUI library, so it can
+be used by UI scripts and the benchmark.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import math
+from pathlib import Path
+import numpy as np
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    from auto_contrast import AutoContrast
+else:
+    from .auto_contrast import AutoContrast
+
+
+# %% Functions
+def reuse_buffer(buffer: np.ndarray, shape: tuple, dtype) -> np.ndarray:
+    """
+    Provide the buffer with the requested shape and type, allocating the new one only if the provided one doesn't fit.
+
+    Parameters
+    ----------
+    buffer : np.ndarray
+        Previously allocated buffer or None.
+    shape : tuple
+        Required shape.
+    dtype : numpy dtype or str
+        Required type.
+
+    Returns
+    -------
+    np.ndarray
+        Buffer.
+
+    """
+    if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != np.dtype(dtype):
+        buffer = np.empty(shape, dtype=dtype)
+    return buffer
+
+
+# %% Class def.
+class FrameDisplayPreparer():
+    """Convert frames to uint8 gray scaled or RGB images for displaying by any UI toolkit, reusing buffers."""
+
+    contrast_modes = ("minmax", "auto", "range")
+
+    def __init__(self, contrast: str = "minmax", rgb_output: bool = False, max_size: tuple = None):
+        """
+        Set the parameters of conversion.
+
+        Parameters
+        ----------
+        contrast : str, optional
+            "minmax" - min and max values of each frame are mapped to 0 and 255, "auto" - smoothed percentiles (AutoContrast),
+            "range" - full range of the pixel type ([0.0, 1.0] for floating point frames). The default is "minmax".
+        rgb_output : bool, optional
+            Expand gray scaled frames to 3 channels (for toolkits drawing only RGB bitmaps). The default is False.
+        max_size : tuple, optional
+            (height, width) of the display, larger frames are decimated by the integer step. The default is None (not limited).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.rgb_output = bool(rgb_output); self.set_max_size(max_size); self.set_contrast(contrast)
+        self.out_buffer = None; self.gray_buffer = None; self.float_buffer = None
+
+    def set_contrast(self, contrast: str):
+        """
+        Change the contrast mode, the estimated levels are discarded.
+
+        Parameters
+        ----------
+        contrast : str
+            One of the "minmax", "auto", "range".
+
+        Raises
+        ------
+        ValueError
+            If the mode isn't supported.
+
+        Returns
+        -------
+        None.
+
+        """
+        if contrast not in self.contrast_modes:
+            raise ValueError(f"Contrast mode should be one of: {self.contrast_modes}, provided: {contrast}")
+        self.contrast = contrast; self.range_lut = None; self.range_levels = None
+        if contrast == "auto":
+            self.contrast_mapper = AutoContrast()
+        elif contrast == "minmax":  # 0 and 100 percentiles of all pixels estimated on each frame are min and max values
+            self.contrast_mapper = AutoContrast(0.0, 100.0, update_interval=1, smoothing=1.0, subsample=1)
+        else:
+            self.contrast_mapper = None
+
+    def set_max_size(self, max_size: tuple = None):
+        """
+        Change the maximum size of displayed frames.
+
+        Parameters
+        ----------
+        max_size : tuple, optional
+            (height, width) of the display. The default is None (not limited).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.max_size = None if max_size is None else (max(int(max_size[0]), 1), max(int(max_size[1]), 1))
+
+    def reset(self):
+        """
+        Discard the estimated levels (e.g., if the camera is changed).
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.contrast_mapper is not None:
+            self.contrast_mapper.reset()
+
+    @property
+    def levels(self) -> tuple:
+        """Pixel values of the last frame mapped to 0 and 255 (None if they aren't estimated yet)."""
+        if self.contrast_mapper is not None:
+            return self.contrast_mapper.levels
+        return self.range_levels
+
+    def decimation_step(self, frame_shape: tuple) -> int:
+        """
+        Calculate the integer step for decimation of the frame, so it doesn't exceed the maximum size.
+
+        Parameters
+        ----------
+        frame_shape : tuple
+            Shape of the frame.
+
+        Returns
+        -------
+        int
+            Step along both axes, 1 - the frame isn't decimated.
+
+        """
+        if self.max_size is None:
+            return 1
+        return max(1, math.ceil(frame_shape[0]/self.max_size[0]), math.ceil(frame_shape[1]/self.max_size[1]))
+
+    def output_shape(self, frame_shape: tuple) -> tuple:
+        """
+        Calculate the shape of prepared frames (e.g., for allocating the buffer provided to the prepare() method).
+
+        Parameters
+        ----------
+        frame_shape : tuple
+            Shape of the frame.
+
+        Returns
+        -------
+        tuple
+            Shape of the uint8 image returned by the prepare() method.
+
+        """
+        step = self.decimation_step(frame_shape); height = -(-frame_shape[0]//step); width = -(-frame_shape[1]//step)
+        return (height, width, 3) if (self.rgb_output or len(frame_shape) == 3) else (height, width)
+
+    def scale_to_uint8(self, image: np.ndarray, offset: float, scale: float, out: np.ndarray):
+        """
+        Map pixel values to uint8: (value - offset)*scale clipped to [0, 255], through the reused float32 buffer.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Frame.
+        offset : float
+            Value mapped to 0.
+        scale : float
+            Multiplier.
+        out : np.ndarray
+            uint8 array for the result.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.float_buffer = reuse_buffer(self.float_buffer, image.shape, np.float32)
+        np.subtract(image, offset, out=self.float_buffer, casting='unsafe'); np.multiply(self.float_buffer, scale, out=self.float_buffer)
+        np.clip(self.float_buffer, 0.0, 255.0, out=self.float_buffer); np.copyto(out, self.float_buffer, casting='unsafe')
+
+    def map_full_range(self, image: np.ndarray, out: np.ndarray):
+        """
+        Map the full range of the pixel type to uint8 (the "range" contrast mode and RGB frames).
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Frame.
+        out : np.ndarray
+            uint8 array for the result.
+
+        Returns
+        -------
+        None.
+
+        """
+        if image.dtype == np.uint8:
+            np.copyto(out, image); self.range_levels = (0, 255)
+        elif np.issubdtype(image.dtype, np.unsignedinteger) and image.dtype.itemsize <= 2:
+            n_values = np.iinfo(image.dtype).max + 1; self.range_levels = (0, n_values - 1)
+            if self.range_lut is None or self.range_lut.shape[0] != n_values:
+                self.range_lut = (np.arange(n_values, dtype=np.uint32)*256//n_values).astype(np.uint8)
+            np.take(self.range_lut, image, out=out, mode='clip')
+        elif np.issubdtype(image.dtype, np.integer):
+            self.range_levels = (0, np.iinfo(image.dtype).max); self.scale_to_uint8(image, 0.0, 255.0/self.range_levels[1], out)
+        else:
+            self.range_levels = (0.0, 1.0); self.scale_to_uint8(image, 0.0, 255.0, out)  # floating point frames within [0.0, 1.0]
+
+    def prepare(self, frame: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Convert the frame to the uint8 image for displaying.
+
+        Parameters
+        ----------
+        frame : np.ndarray
+            Acquired frame, 2D (gray scaled) or 3D (RGB) array of any numeric type.
+        out : np.ndarray, optional
+            uint8 array with the shape returned by the output_shape() method for storing the result (e.g., the buffer shared
+            with the GUI thread). The default is None (internal buffer is used).
+
+        Returns
+        -------
+        np.ndarray
+            uint8 image (reused buffer, so it's overwritten by the next call).
+
+        """
+        step = self.decimation_step(frame.shape)
+        if step > 1:
+            frame = frame[::step, ::step]  # view, the copy is made only by the mapping to uint8
+        if out is None:
+            self.out_buffer = reuse_buffer(self.out_buffer, self.output_shape(frame.shape), np.uint8); out = self.out_buffer
+        if len(frame.shape) == 3:
+            self.map_full_range(frame[:, :, :3], out)
+        elif not self.rgb_output:
+            if self.contrast_mapper is not None:
+                self.contrast_mapper.apply(frame, out=out)
+            else:
+                self.map_full_range(frame, out)
+        else:
+            self.gray_buffer = reuse_buffer(self.gray_buffer, frame.shape, np.uint8)
+            if self.contrast_mapper is not None:
+                self.contrast_mapper.apply(frame, out=self.gray_buffer)
+            else:
+                self.map_full_range(frame, self.gray_buffer)
+            np.copyto(out, self.gray_buffer[:, :, np.newaxis])  # broadcasting gray values to 3 channels
+        return out
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Pacing of displaying frames acquired in the live stream mode faster than they can be shown.
+
+The consumer keeps only the latest received frame (latest frame wins), the frame is shown only if the display interval
+(1 / target FPS) has passed and the previous one is already drawn, all other frames are counted as skipped. So acquisition
+runs at the full rate, while displaying degrades gracefully. This module doesn't depend on any GUI library.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import time
+
+
+# %% Class def.
+class DisplayPacer():
+    """Decide which of the received frames are displayed and count displayed / skipped ones."""
+
+    def __init__(self, target_fps: float = 25.0):
+        """
+        Set the target display rate.
+
+        Parameters
+        ----------
+        target_fps : float, optional
+            Maximum rate of displaying frames. The default is 25.0.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.set_target_fps(target_fps); self.reset()
+
+    def set_target_fps(self, target_fps: float):
+        """
+        Change the target display rate.
+
+        Parameters
+        ----------
+        target_fps : float
+            Maximum rate of displaying frames, 0 or negative - not limited (only by the drawing time).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.target_fps = float(target_fps); self.interval_s = 1.0/self.target_fps if self.target_fps > 0.0 else 0.0
+
+    def reset(self):
+        """
+        Reset the counters and the pending frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.latest_frame = None; self.frames_received = 0; self.frames_displayed = 0; self.frames_skipped = 0
+        self.next_display_t = 0.0; self.t_started = time.perf_counter(); self.t_last_displayed = 0.0; self.display_fps = 0.0
+
+    def offer(self, frame):
+        """
+        Store the received frame replacing the not displayed one (it's counted as skipped).
+
+        Parameters
+        ----------
+        frame : Any
+            Frame or its descriptor.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.latest_frame is not None:
+            self.frames_skipped += 1
+        self.latest_frame = frame; self.frames_received += 1
+
+    def take(self, display_busy: bool = False):
+        """
+        Provide the latest frame, if it's the time to display it.
+
+        Parameters
+        ----------
+        display_busy : bool, optional
+            Flag that the previous frame is still drawn. The default is False.
+
+        Returns
+        -------
+        Any
+            Latest frame or None, if there is no frame or it isn't the time to display.
+
+        """
+        now = time.perf_counter()
+        if self.latest_frame is None or display_busy or now < self.next_display_t:
+            return None
+        frame = self.latest_frame; self.latest_frame = None; self.frames_displayed += 1
+        # Next moment is scheduled from the previous one (steady rate), after a long drawing or a pause - from now, so the
+        # missed moments aren't caught up by displaying frames in a row
+        self.next_display_t += self.interval_s
+        if self.next_display_t < now:
+            self.next_display_t = now + self.interval_s
+        if self.t_last_displayed > 0.0:  # exponential moving average of the display rate
+            self.display_fps = 0.9*self.display_fps + 0.1/max(now - self.t_last_displayed, 1E-6)
+        self.t_last_displayed = now
+        return frame
+
+    def discard(self):
+        """
+        Discard the pending frame (e.g., if it's not available anymore), it's counted as skipped.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.latest_frame is not None:
+            self.frames_skipped += 1; self.latest_frame = None
+
+    def stats(self) -> dict:
+        """
+        Provide counters of received, displayed and skipped frames.
+
+        Returns
+        -------
+        dict
+            Counters and the measured display rate.
+
+        """
+        return {"frames_received": self.frames_received, "frames_displayed": self.frames_displayed,
+                "frames_skipped": self.frames_skipped, "display_fps": round(self.display_fps, 1)}
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Per-frame timing of the display path: generation (acquisition), delivery to the GUI thread and painting.
+
+Timestamps (time.perf_counter() values) are stored in the preallocated array, so recording doesn't allocate anything per
+frame. At the end of a run min / mean / p95 / p99 of each stage and the jitter of intervals between painted frames are
+reported and can be saved to CSV for comparing display backends. This module doesn't depend on any GUI library.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import csv
+from pathlib import Path
+import numpy as np
+
+# %% Module parameters
+timestamps_names = ("generation_started", "generation_finished", "delivered", "painted")
+stages_names = ("generation", "delivery", "paint")  # differences between consecutive timestamps
+
+
+# %% Class def.
+class FramePerfRecorder():
+    """Store timestamps of frames passing the display path and summarize them."""
+
+    def __init__(self, capacity: int = 100_000):
+        """
+        Preallocate the array for timestamps.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            Maximum number of recorded frames, the following ones are counted but not stored. The default is 100_000.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.capacity = max(int(capacity), 1); self.timestamps = np.zeros((self.capacity, len(timestamps_names)), dtype=np.float64)
+        self.n_frames = 0; self.n_not_stored = 0
+
+    def reset(self):
+        """
+        Start the new run, the stored timestamps are discarded.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.n_frames = 0; self.n_not_stored = 0
+
+    def add(self, generation_started: float, generation_finished: float, delivered: float, painted: float):
+        """
+        Store the timestamps of the frame.
+
+        Parameters
+        ----------
+        generation_started : float
+            Start of generation / acquisition of the frame.
+        generation_finished : float
+            Moment, when the frame is available for the GUI (Signal emitted, frame published).
+        delivered : float
+            Moment, when the frame is taken by the GUI thread.
+        painted : float
+            Moment, when painting of the frame is finished.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.n_frames < self.capacity:
+            row = self.timestamps[self.n_frames]
+            row[0] = generation_started; row[1] = generation_finished; row[2] = delivered; row[3] = painted; self.n_frames += 1
+        else:
+            self.n_not_stored += 1
+
+    def summary(self) -> dict:
+        """
+        Summarize the stored timestamps.
+
+        Returns
+        -------
+        dict
+            For each stage and "interval" (between painted frames): min, mean, p95, p99, max in ms; "jitter_ms" - std of
+            intervals; "n_frames".
+
+        """
+        results = {"n_frames": self.n_frames, "n_not_stored": self.n_not_stored}
+        if self.n_frames == 0:
+            return results
+        timestamps = self.timestamps[:self.n_frames]; durations_ms = 1000.0*np.diff(timestamps, axis=1)
+        for i, stage in enumerate(stages_names):
+            results[stage] = summarize_durations(durations_ms[:, i])
+        if self.n_frames > 1:
+            intervals_ms = 1000.0*np.diff(timestamps[:, 3]); results["interval"] = summarize_durations(intervals_ms)
+            results["jitter_ms"] = round(float(np.std(intervals_ms)), 3)
+            results["display_fps"] = round(1000.0/max(float(np.mean(intervals_ms)), 1E-9), 2)
+        return results
+
+    def report(self) -> str:
+        """
+        Compose the summary as the text.
+
+        Returns
+        -------
+        str
+            One line per stage.
+
+        """
+        results = self.summary(); lines = [f"Recorded frames: {results['n_frames']}"]
+        for stage in stages_names + ("interval", ):
+            if stage in results:
+                stage_results = results[stage]
+                lines.append(f"{stage} [ms]: min {stage_results['min']} | mean {stage_results['mean']} | p95 {stage_results['p95']}"
+                             + f" | p99 {stage_results['p99']} | max {stage_results['max']}")
+        if "jitter_ms" in results:
+            lines.append(f"Jitter of intervals: {results['jitter_ms']} ms, display FPS: {results['display_fps']}")
+        return "\n".join(lines)
+
+    def save_csv(self, file_path: str) -> str:
+        """
+        Save timestamps and durations of each frame to the CSV file.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the file.
+
+        Returns
+        -------
+        str
+            Absolute path to the saved file.
+
+        """
+        file_path = Path(file_path).absolute(); timestamps = self.timestamps[:self.n_frames]
+        with open(file_path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(("frame", ) + timestamps_names + tuple(stage + "_ms" for stage in stages_names) + ("interval_ms", ))
+            for i, row in enumerate(timestamps):
+                interval_ms = round(1000.0*(row[3] - timestamps[i-1, 3]), 4) if i > 0 else ""
+                writer.writerow([i] + [f"{value:.6f}" for value in row] + [round(1000.0*(row[j+1] - row[j]), 4) for j in range(3)]
+                                + [interval_ms])
+        return str(file_path)
+
+
+def summarize_durations(durations_ms: np.ndarray) -> dict:
+    """
+    Compute min, mean, p95, p99 and max values.
+
+    Parameters
+    ----------
+    durations_ms : np.ndarray
+        Durations in ms.
+
+    Returns
+    -------
+    dict
+        Rounded values.
+
+    """
+    p95, p99 = np.percentile(durations_ms, (95, 99))
+    return {"min": round(float(np.min(durations_ms)), 3), "mean": round(float(np.mean(durations_ms)), 3), "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3), "max": round(float(np.max(durations_ms)), 3)}
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+Headless acquisition and recording from the command line, without any GUI library imported.
+
+The CameraWrapper Process is driven directly: the camera is opened, the settings from the profile are applied, the live
+stream mode is started and the frames are recorded by the camera Process to the file with the selected format until
+the duration or the number of frames is reached. This script only drains the descriptors of frames, so the acquisition
+isn't slowed down by transferring of images.
+
+Usage example: python headless_acq_mwpc.py --camera Simulated --settings profile.json --frames 500 --format raw
+Frames can be processed by the pool of Processes, e.g.: --processing threshold centroid --processing-output results.jsonl
+Settings profile is the JSON file with the camera settings, e.g.: {"Exposure Time": 20, "Image Size": [1024, 1024]},
+each setting is sent as the ("Set " + name, value) command to the CameraWrapper. Frames can be accumulated in the camera
+Process by the "Acquisition Mode" setting, e.g.: {"Acquisition Mode": ["Average N", 10]}.
+Time-lapse acquisition is executed by the scheduler in the camera Process: --plan plan.json, where the plan is the JSON file,
+e.g.: {"interval_s": 60, "duration_s": 3600, "steps": [{"exposure_ms": 10, "burst_length": 5}]}, see camera.acq_scheduler.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from queue import Empty
+import numpy as np
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    from camera.camera_wrapper import CameraWrapper, cameras_ctrl_types
+    from camera.camera_worker import CameraChannels
+    from camera.recorders import recording_formats
+    from camera.processing import ProcessingPipeline, create_processor
+else:
+    from .camera.camera_wrapper import CameraWrapper, cameras_ctrl_types
+    from .camera.camera_worker import CameraChannels
+    from .camera.recorders import recording_formats
+    from .camera.processing import ProcessingPipeline, create_processor
+
+
+# %% Acquisition class
+class HeadlessAcquisition():
+    """Control the CameraWrapper Process without UI: open camera, apply settings, acquire and record frames."""
+
+    def __init__(self, camera_type: str, timeout_s: float = 10.0):
+        self.camera_type = camera_type; self.timeout_s = timeout_s; self.channels = CameraChannels()
+        self.camera_process = None; self.n_frames = 0; self.stats = {}
+        self.pipeline = None; self.processing_file = None  # optional processing of frames by the pool of Processes
+
+    def wait_reply(self, reply_type: type, timeout_s: float = None):
+        """
+        Wait for the reply from the camera of the specified type, skipping frames descriptors.
+
+        Parameters
+        ----------
+        reply_type : type
+            Type of the expected reply (str or tuple).
+        timeout_s : float, optional
+            Timeout of waiting. The default is None (self.timeout_s is used).
+
+        Returns
+        -------
+        str or tuple or None
+            Reply or None if the timeout happened.
+
+        """
+        t_limit = time.perf_counter() + (self.timeout_s if timeout_s is None else timeout_s)
+        while time.perf_counter() < t_limit:
+            try:
+                reply = self.channels.data_from_camera.get(timeout=0.05)
+            except Empty:
+                continue
+            if isinstance(reply, reply_type):
+                return reply
+        return None
+
+    def open_camera(self) -> bool:
+        """
+        Start the CameraWrapper Process and open the camera.
+
+        Returns
+        -------
+        bool
+            True if the camera opened.
+
+        """
+        self.camera_process = CameraWrapper(camera_type=None, **self.channels.wrapper_kwargs())
+        self.camera_process.daemon = True; self.camera_process.start()
+        self.channels.send_command(("Open Camera", self.camera_type)); reply = self.wait_reply(str)
+        if reply != "Opened":
+            print(f"{self.camera_type} camera NOT opened, received:", reply, flush=True)
+            return False
+        print(f"{self.camera_type} camera opened", flush=True)
+        return True
+
+    def apply_settings(self, settings: dict):
+        """
+        Send the settings to the camera.
+
+        Parameters
+        ----------
+        settings : dict
+            Setting name (e.g., "Exposure Time") -> value.
+
+        Returns
+        -------
+        None.
+
+        """
+        for setting_name, value in settings.items():
+            if isinstance(value, list):
+                value = tuple(value)  # e.g. image size
+            self.channels.send_command(("Set " + setting_name, value)); time.sleep(0.02)
+        self.channels.clean()  # replies (triggers) of setting commands aren't used
+
+    def start_processing(self, specs: list, output_path: str = None, n_workers: int = None):
+        """
+        Start the pool of Processes for processing of acquired frames.
+
+        Parameters
+        ----------
+        specs : list
+            Specifications of built-in processors, see camera.processing.create_processor().
+        output_path : str, optional
+            Path to the file for saving results as JSON lines. The default is None (results aren't saved).
+        n_workers : int, optional
+            Number of worker Processes. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.pipeline = ProcessingPipeline(self.channels.frames_ring, [create_processor(spec) for spec in specs], n_workers)
+        if output_path is not None:
+            self.processing_file = open(output_path, "w")
+
+    def save_processed(self, processed: list):
+        """
+        Save results of processing (scalars and tuples as they are, arrays - as their shape and mean value).
+
+        Parameters
+        ----------
+        processed : list
+            ProcessingResult instances.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.processing_file is None:
+            return
+        for processing_result in processed:
+            record = {"frame_id": processing_result.descriptor.frame_id, "timestamp": processing_result.descriptor.timestamp}
+            for name, result in processing_result.results.items():
+                if isinstance(result, np.ndarray):
+                    record[name] = {"shape": list(result.shape), "mean": float(np.mean(result))}
+                else:
+                    record[name] = result
+            self.processing_file.write(json.dumps(record) + "\n")
+
+    def acquire(self, duration_s: float = None, n_frames: int = None, recording: dict = None):
+        """
+        Acquire frames in the live stream mode until the duration or number of frames reached, record them if requested.
+
+        Parameters
+        ----------
+        duration_s : float, optional
+            Duration of acquisition. The default is None.
+        n_frames : int, optional
+            Number of frames to acquire. The default is None.
+        recording : dict, optional
+            Parameters of recording: "path" and "format". The default is None (no recording).
+
+        Returns
+        -------
+        None.
+
+        """
+        if recording is not None:
+            self.channels.send_command(("Start Recording", recording))
+        self.channels.send_command("Start Live Stream")
+        t_start = time.perf_counter(); t_report = t_start + 1.0; n_reported = 0; self.n_frames = 0
+        try:
+            while True:
+                now = time.perf_counter()
+                if (duration_s is not None and now - t_start >= duration_s) or (n_frames is not None and self.n_frames >= n_frames):
+                    break
+                if now >= t_report:
+                    print(f"Acquired frames: {self.n_frames}, FPS: {round((self.n_frames - n_reported)/(now - t_report + 1.0), 1)}",
+                          flush=True)
+                    t_report = now + 1.0; n_reported = self.n_frames
+                    while not self.channels.data_from_camera.empty():  # replies are sent separately from frames
+                        try:
+                            print("Received from the camera:", self.channels.data_from_camera.get_nowait(), flush=True)
+                        except Empty:
+                            break
+                try:
+                    descriptor = self.channels.frames_from_camera.get(timeout=0.05)
+                except Empty:
+                    continue
+                self.n_frames += 1
+                if self.pipeline is not None:
+                    self.pipeline.submit(descriptor); self.save_processed(self.pipeline.collect())
+        except KeyboardInterrupt:
+            print("Acquisition interrupted", flush=True)
+        elapsed_s = time.perf_counter() - t_start
+        if self.pipeline is not None:
+            self.save_processed(self.pipeline.collect(wait=True))  # before cleaning channels, which discards frames
+        # The live stream is stopped and pending frames are discarded before requesting the final counters
+        self.channels.send_command("Stop Live Stream"); time.sleep(0.05); self.channels.clean()
+        if recording is not None:
+            self.channels.send_command("Stop Recording"); time.sleep(0.3)
+        self.channels.send_command("Get Stats"); reply = self.wait_reply(tuple)
+        if reply is not None and reply[0] == "Stats":
+            self.stats = reply[1]
+        self.stats["frames_received"] = self.n_frames; self.stats["elapsed_s"] = round(elapsed_s, 3)
+        self.stats["received_fps"] = round(self.n_frames/max(elapsed_s, 1E-9), 2)
+        if self.pipeline is not None:
+            self.stats["processing"] = self.pipeline.stats()
+
+    def run_plan(self, plan: dict, recording: dict = None):
+        """
+        Execute the time-lapse acquisition plan by the camera Process, which records frames, until it's finished.
+
+        Parameters
+        ----------
+        plan : dict
+            Acquisition plan (see camera.acq_scheduler.AcquisitionScheduler).
+        recording : dict, optional
+            Parameters of recording: "path" and "format". The default is None (the file is saved in the folder with the scripts).
+
+        Returns
+        -------
+        None.
+
+        """
+        plan = dict(plan)
+        if recording is not None:
+            plan.update(recording)
+        self.channels.send_command(("Start Schedule", plan)); t_start = time.perf_counter(); self.n_frames = 0; reply = None
+        try:
+            while reply is None:
+                try:
+                    received = self.channels.data_from_camera.get_nowait()
+                    if isinstance(received, tuple) and received[0] in ("Schedule Finished", "Schedule Failed"):
+                        reply = received
+                    else:
+                        print("Received from the camera:", received, flush=True)
+                except Empty:
+                    pass
+                try:
+                    descriptor = self.channels.frames_from_camera.get(timeout=0.05)  # preview frames of the plan
+                except Empty:
+                    continue
+                self.n_frames += 1
+                if self.pipeline is not None:
+                    self.pipeline.submit(descriptor); self.save_processed(self.pipeline.collect())
+        except KeyboardInterrupt:
+            print("Acquisition plan interrupted", flush=True); self.channels.send_command("Stop Schedule")
+            reply = self.wait_reply(tuple)
+        if self.pipeline is not None:
+            self.save_processed(self.pipeline.collect(wait=True))
+        self.stats = reply[1] if reply is not None and isinstance(reply[1], dict) else {"plan_error": reply}
+        self.stats["frames_recorded"] = self.stats.get("n_frames", 0)  # frames of the plan are written directly to the recorder
+        self.stats["frames_received"] = self.n_frames; self.stats["elapsed_s"] = round(time.perf_counter() - t_start, 3)
+        if self.pipeline is not None:
+            self.stats["processing"] = self.pipeline.stats()
+
+    def close(self):
+        """
+        Stop the CameraWrapper Process, the processing Processes and close the channels.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.pipeline is not None:
+            self.pipeline.shutdown(); self.pipeline = None
+        if self.processing_file is not None:
+            self.processing_file.close(); self.processing_file = None
+        if self.camera_process is not None and self.camera_process.is_alive():
+            self.channels.send_command("Quit"); self.camera_process.join(2.0)
+            if self.camera_process.is_alive():
+                self.camera_process.kill()
+        self.channels.close()
+
+
+# %% Launch acquisition
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless acquisition and recording of frames from a camera")
+    parser.add_argument("--camera", default="Simulated", choices=cameras_ctrl_types, help="camera type")
+    parser.add_argument("--settings", default=None, help="path to the JSON file with the camera settings profile")
+    parser.add_argument("--exposure", type=float, default=None, help="exposure time in ms (overrides the profile value)")
+    parser.add_argument("--duration", type=float, default=None, help="duration of acquisition in seconds")
+    parser.add_argument("--frames", type=int, default=None, help="number of frames to acquire")
+    parser.add_argument("--format", default="raw", choices=list(recording_formats.keys()) + ["none"],
+                        help="format of the recorded file, 'none' - acquisition without recording")
+    parser.add_argument("--output", default=None, help="path to the recorded file")
+    parser.add_argument("--codec", default=None, help="fourcc code of the video codec (e.g., MJPG, XVID, mp4v) for video formats")
+    parser.add_argument("--threads", type=int, default=None, help="number of Threads encoding frames of the 'mjpeg' format")
+    parser.add_argument("--quality", type=int, default=None, help="JPEG quality (1 - 100) of the 'mjpeg' format")
+    parser.add_argument("--stream", default=None, help="address ('host:port' or 'unix:/path') for streaming frames to viewers")
+    parser.add_argument("--processing", nargs="*", default=None,
+                        help="chain of processors: background:path.npy, flatfield:flat.npy[,dark.npy], threshold[:level], centroid")
+    parser.add_argument("--processing-output", default=None, help="path to the JSON lines file with results of processing")
+    parser.add_argument("--processing-workers", type=int, default=None, help="number of Processes for processing")
+    parser.add_argument("--plan", default=None, help="path to the JSON file with the time-lapse acquisition plan")
+    parser.add_argument("--stats", default=None, help="path to the JSON file for saving acquisition statistics")
+    args = parser.parse_args()
+    if args.duration is None and args.frames is None:
+        args.duration = 10.0  # default duration of acquisition
+    settings = {}
+    if args.settings is not None:
+        with open(args.settings) as file:
+            settings = json.load(file)
+    if args.exposure is not None:
+        settings["Exposure Time"] = args.exposure
+    recording = None
+    if args.format != "none":
+        output_path = args.output
+        if output_path is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            output_path = str(Path.cwd().joinpath(f"{args.camera}_{timestamp}{recording_formats[args.format][0]}"))
+        elif Path(output_path).suffix == "":
+            output_path += recording_formats[args.format][0]  # cv2 selects the video container by the extension
+        elif recording_formats[args.format][1] is not None and Path(output_path).suffix.lower() != recording_formats[args.format][0]:
+            parser.error(f"extension of the output file '{output_path}' doesn't match the format '{args.format}', "
+                         + f"use '{recording_formats[args.format][0]}' or omit it")
+        recording = {"path": str(Path(output_path).absolute()), "format": args.format, "codec": args.codec, "threads": args.threads,
+                     "quality": args.quality}
+    acquisition = HeadlessAcquisition(args.camera); exit_code = 0
+    try:
+        if acquisition.open_camera():
+            acquisition.apply_settings(settings)
+            if args.processing:
+                acquisition.start_processing(args.processing, args.processing_output, args.processing_workers)
+            if args.stream is not None:
+                acquisition.channels.send_command(("Start Streaming", {"address": args.stream}))
+            if args.plan is not None:
+                with open(args.plan) as file:
+                    acquisition.run_plan(json.load(file), recording)
+            else:
+                acquisition.acquire(duration_s=args.duration, n_frames=args.frames, recording=recording)
+            print("Acquisition statistics:", json.dumps(acquisition.stats, indent=2), flush=True)
+            if recording is not None and acquisition.stats.get("frames_recorded", 0) > 0:
+                print("Recorded file:", recording["path"], flush=True)
+            elif recording is not None:
+                print("No frames recorded", flush=True); exit_code = 1
+            if args.stats is not None:
+                with open(args.stats, "w") as file:
+                    json.dump(acquisition.stats, file, indent=2)
+        else:
+            exit_code = 1
+    finally:
+        acquisition.close()
+    sys.exit(exit_code)
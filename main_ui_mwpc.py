@@ -18,28 +18,30 @@ Main GUI script - visualization of images stream (based on tkinter GUI library).
 #       - requires exchanging all standard widgets to its counterparts;
 
 # %% Global imports
-from tkinter import Frame, Menu, Tk, font, LEFT, TOP, BOTH, StringVar
+from tkinter import Frame, Menu, Tk, font, LEFT, TOP, BOTH, StringVar, BooleanVar
 from tkinter.ttk import Button, Style, Label, OptionMenu
 from tkinter.ttk import Frame as ttkFrame
 import platform
 import ctypes
 from pathlib import Path
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg  # matplotlib canvas container for tkinter
-import matplotlib.figure as pltFigure   # matplotlib figure for showing images
 import time
 import inspect
 from datetime import datetime  # for getting current year
-from multiprocessing import Queue, Event
 from queue import Empty
 import numpy as np
 from typing import Union
 
-# Make tkinter Thread Safe. Ref. to the package: https://pypi.org/project/tkthread/  Note that the license is Apache Software License.
-try:
-    import tkthread; tkthread.patch()  # fix the errors reported after closing the GUI: "RuntimeError: main thread is not in main loop"
-except ModuleNotFoundError:
-    print("Please install 'tkthread' from https://pypi.org/project/tkthread/ for making tkinter thread-safe")
+# The camera Processes import this script as "__mp_main__" (spawn / forkserver start methods), they don't need the GUI libraries
+# imported below, so skipping them makes the start of the camera Processes faster
+if __name__ != "__mp_main__":
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg  # matplotlib canvas container for tkinter
+    import matplotlib.figure as pltFigure   # matplotlib figure for showing images
+    # Make tkinter Thread Safe. Ref. to the package: https://pypi.org/project/tkthread/  Note that the license is Apache Software License.
+    try:
+        import tkthread; tkthread.patch()  # fix the errors reported after closing the GUI: "RuntimeError: main thread is not in main loop"
+    except ModuleNotFoundError:
+        print("Please install 'tkthread' from https://pypi.org/project/tkthread/ for making tkinter thread-safe")
 
 # Testing pre-styled and configured 'ttkbootstrap' library - CHECK and import should be shifted after class declaration due to some
 # issue of importing it and after declaration of ttk Style below in the MainCtrlUI class. Stable fix - delete ttkbootstrap
@@ -49,11 +51,13 @@ test_ttkbootstrap = False  # in general, this library should improve styling, bu
 test_customtkinter = False  # testing 'customtkinter' library
 
 # Testing pre-styled and configured 'customtkinter' library
-try:
-    from customtkinter import CTk, CTkFrame
-    customtkinter_installed = True
-except ModuleNotFoundError:
-    customtkinter_installed = False
+customtkinter_installed = False
+if test_customtkinter and __name__ != "__mp_main__":
+    try:
+        from customtkinter import CTk, CTkFrame
+        customtkinter_installed = True
+    except ModuleNotFoundError:
+        customtkinter_installed = False
 
 # Below - main concept in customization of a style by using 'customtkinter' library: all standard widgets should be exchanged to
 # the counterparts from it, like base class before: CTkFrame instead of standard Frame class
@@ -66,16 +70,30 @@ else:
 if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
     from containers.adjust_sizes_ctrls_win import AdjustSizesWin
     from containers.camera_settings import CamSettings
-    from camera.utility_funcs import clean_mp_queue
-    from camera.camera_wrapper import CameraWrapper, cameras_ctrl_types
+    from containers.histogram_win import HistogramWin
+    from camera.camera_wrapper import cameras_ctrl_types
+    from camera.camera_worker import CameraWorkersPool
+    from camera.frames_transport import FrameDescriptor
+    from display.frame_preparation import FrameDisplayPreparer
+    from display.pacing import DisplayPacer
+    from camera.tracing import StageTracer, export_chrome_trace, summarize_snapshot
+    from camera.processing import ProcessingPipeline, IntensityCentroid
+    from camera.accumulators import acquisition_modes
 else:
     from .containers.adjust_sizes_ctrls_win import AdjustSizesWin
-    from .camera.utility_funcs import clean_mp_queue
-    from .camera.camera_wrapper import CameraWrapper, cameras_ctrl_types
+    from .camera.camera_wrapper import cameras_ctrl_types
+    from .camera.camera_worker import CameraWorkersPool
+    from .camera.frames_transport import FrameDescriptor
+    from .display.frame_preparation import FrameDisplayPreparer
+    from .display.pacing import DisplayPacer
+    from .camera.tracing import StageTracer, export_chrome_trace, summarize_snapshot
+    from .camera.processing import ProcessingPipeline, IntensityCentroid
+    from .camera.accumulators import acquisition_modes
     from .containers.camera_settings import CamSettings
+    from .containers.histogram_win import HistogramWin
 
 # Switch on interactive behaviour of matplotlib only if it's not switched on
-if not plt.isinteractive():
+if __name__ != "__mp_main__" and not plt.isinteractive():
     plt.ion()
 
 # %% Script-wide parameters
@@ -124,11 +142,34 @@ class MainCtrlUI(base_class):
         self.labels_actions_menu = []; self.labels_actions_menu.append("Adjust Sizes")
         for label in self.labels_actions_menu:
             self.actions_menu.add_command(label=label, command=self.adjust_sizes)
+        # Tracing of the stages of acquisition / displaying (enabled by the environment variable, see camera.tracing module)
+        self.tracer = StageTracer("MainCtrlUI"); self.frame_id = -1; self.draw_trace_start = 0
+        if self.tracer.enabled:
+            self.actions_menu.add_command(label="Export Trace", command=self.export_trace)
+        # Processing of frames by the pool of Processes (not in this thread), results are shown on the statistics label
+        self.processing_pipeline = None; self.processing_results = {}; self.centroid_processing = BooleanVar(value=False)
+        self.actions_menu.add_checkbutton(label="Centroid Processing", variable=self.centroid_processing,
+                                          command=self.toggle_processing)
+        # Acquisition modes with accumulation of frames in the camera Process (one image per N acquired ones is transferred)
+        self.acquisition_mode = StringVar(value=acquisition_modes[0]); self.n_accumulated_frames = 10
+        self.modes_menu = Menu(master=self.actions_menu, tearoff=0, font=self.menu_font)
+        for mode in acquisition_modes:
+            label = mode if mode == acquisition_modes[0] else mode.replace(" N", "") + f" ({self.n_accumulated_frames} frames)"
+            self.modes_menu.add_radiobutton(label=label, value=mode, variable=self.acquisition_mode, command=self.set_acquisition_mode)
+        self.actions_menu.add_cascade(label="Acquisition Mode", menu=self.modes_menu)
+        # Histogram and ROI statistics computed in the camera Process, requested each N acquired images if the window is opened
+        self.histogram_win = None; self.frame_stats_interval = 3
+        self.actions_menu.add_command(label="Histogram & ROI Statistics", command=self.open_histogram_win)
+        # Frames are mapped to uint8 by min / max of each frame or by smoothed percentiles (stable on noisy frames)
+        self.frame_preparer = FrameDisplayPreparer(contrast="minmax"); self.auto_contrast_flag = BooleanVar(value=False)
+        self.actions_menu.add_checkbutton(label="Auto Contrast (Percentiles)", variable=self.auto_contrast_flag,
+                                          command=self.switch_contrast_mode)
         self.menubar.add_cascade(label="Settings", menu=self.actions_menu)
 
         # Figure for showing of images
         self.image_figure = pltFigure.Figure(figsize=(self.figure_size_w, self.figure_size_h))  # empty figure with default sizes (WxH)
         self.image_canvas = FigureCanvasTkAgg(self.image_figure, master=self); self.plot_widget = self.image_canvas.get_tk_widget()
+        self.image_canvas.mpl_connect('draw_event', self.trace_canvas_draw)
         self.current_image = None; self.snap_image_obtained = False; self.image_figure_axes = None; self.display_image = False
         self.img_h = None; self.img_w = None; self.imshowing = None  # AxesImage instance
         # Assign subplot to the created figure
@@ -139,6 +180,10 @@ class MainCtrlUI(base_class):
 
         # Program parameters, variables
         self.snaps_stream_flag = False; self.snaps_stream_task = None; self.record_flag = False; self.block_btns_flag = False
+        # Live stream: frames acquired continuously by the camera Process, only the latest one is shown with the target display FPS
+        self.live_stream_flag = False; self.live_stream_task = None; self.live_poll_ms = 5; self.display_pacer = DisplayPacer(25.0)
+        self.live_queries_t = 0.0  # moment for requesting statistics from the camera without waiting for replies
+        self.draw_requested_t = 0.0  # moment of requesting the canvas update, reset by the 'draw_event' callback
         self.retain_resizable_flag = False; self.show_image_task = None; self.camera_settings_win = None
 
         # Select the camera from the list
@@ -180,6 +225,10 @@ class MainCtrlUI(base_class):
         self.snap_stream_btn = Button(master=self.buttons_frame, text=self.snap_stream_on_text, command=self.snap_stream,
                                       style=self.snap_stream_on_btn_style_name)
 
+        self.live_stream_on_text = "Start Live Stream"; self.live_stream_off_text = "Stop Live Stream"
+        self.live_stream_btn = Button(master=self.buttons_frame, text=self.live_stream_on_text, command=self.live_stream,
+                                      style=self.snap_stream_on_btn_style_name)
+
         self.record_stream_on_btn_style_name = 'RecordStreamOn.TButton'; self.record_stream_off_btn_style_name = 'RecordStreamOff.TButton'
         self.record_stream_on_text = "Start Recording"; self.record_stream_off_text = "Stop Recording"
         self.widgets_styles.configure(self.record_stream_on_btn_style_name, foreground='#e32818', background="#dadef5")
@@ -195,24 +244,29 @@ class MainCtrlUI(base_class):
         # FPS indicator reported after acquisition
         self.acquired_images = 0; self.fps = 0  # variables
         self.fps_label = Label(master=self.buttons_frame, text=f"Measured Acq. FPS: {self.fps}")  # label for showing measured FPS
+        # Counters reported by the watchdog of a camera and end-to-end latency (acquisition -> display) measured on this UI
+        self.camera_stats = {}; self.frame_timestamp = None; self.latency_ms = 0.0; self.discarded_frames = 0
+        self.stats_label = Label(master=self.buttons_frame, text=self.format_stats())
 
         # Placing GUI elements in the container (Frame) which in turn is placed below along with the plot_widget
         self.camera_selector_frame.pack(side=TOP, padx=self.padx, pady=self.pady//2)
         self.camera_status_label.pack(side=TOP, padx=self.padx, pady=self.pady)
         self.snap_image_btn.pack(side=TOP, padx=self.padx, pady=self.pady)
         self.snap_stream_btn.pack(side=TOP, padx=self.padx, pady=self.pady)
+        self.live_stream_btn.pack(side=TOP, padx=self.padx, pady=self.pady)
         self.record_stream_btn.pack(side=TOP, padx=self.padx, pady=self.pady)
         self.cam_settings_btn.pack(side=TOP, padx=self.padx, pady=self.pady)
         self.fps_label.pack(side=TOP, padx=self.padx, pady=self.pady)
+        self.stats_label.pack(side=TOP, padx=self.padx, pady=self.pady)
 
         # Pack plot widget with the image and Frame with buttons (grid layout removed)
         self.plot_widget.pack(side=LEFT, padx=self.padx, pady=self.pady)  # The biggest GUI element - image widget
         self.buttons_frame.pack(side=TOP, padx=self.padx, pady=self.pady)  # place container for buttons stick to the top
         self.pack(fill=BOTH); self.update()  # commands for finally show all packed widgets
 
-        # Initialize communication queues and triggers
-        self.commands2camera = Queue(maxsize=5); self.data_from_camera = Queue(maxsize=10)
-        self.trigger_commands = Event(); self.trigger_camera_data = Event()  # note that Event wraps condition and lock together
+        # Pre-started camera Processes, each one with own communication queues and triggers (note that Event wraps condition and lock)
+        self.workers_pool = CameraWorkersPool(); self.camera_process = None; self.camera_channels = None
+        self.camera_opened = False; self.camera_settings = {}
 
         # Disabling some buttons at the start
         self.record_stream_btn.configure(state="disabled"); self.lock_ui_btns()
@@ -228,13 +282,22 @@ class MainCtrlUI(base_class):
         None.
 
         """
-        # Initialization of the camera (Simulated at the start)
-        self.camera_process = CameraWrapper(camera_type=self.selected_camera.get(), commands2camera=self.commands2camera,
-                                            trigger_commands=self.trigger_commands, data_camera=self.data_from_camera,
-                                            trigger_data_camera=self.trigger_camera_data)
+        process_taken = False  # flag for replacing the taken from the pool Process
+        if self.camera_process is not None and self.camera_process.is_alive():
+            self.send_cmd2camera(("Open Camera", self.selected_camera.get()))  # hot switching of a camera on the running Process
+        else:
+            # Initialization of the camera (Simulated at the start) on the pre-started CameraWrapper Process
+            if self.camera_channels is not None:
+                self.camera_channels.close()  # queues of the previously used (stopped) Process
+            self.camera_process, self.camera_channels = self.workers_pool.acquire(self.selected_camera.get()); process_taken = True
+            self.commands2camera = self.camera_channels.commands2camera; self.trigger_commands = self.camera_channels.trigger_commands
+            self.data_from_camera = self.camera_channels.data_from_camera  # replies of the camera
+            self.frames_from_camera = self.camera_channels.frames_from_camera  # descriptors of frames
+            self.trigger_camera_data = self.camera_channels.trigger_camera_data
+            if self.processing_pipeline is not None:
+                self.toggle_processing()  # pipeline should read frames from the ring of the new Process
         if self.print_supported_cameras:
             print("Supported Cameras: ", self.camera_process.supported_cameras, flush=True); self.print_supported_cameras = False
-        self.camera_process.start(); time.sleep(self.sleep_time_actions_ms)  # starting the CameraWrapper Process loop
         self.camera_status_label.config(text=self.camera_transit_text, style=self.camera_transition_style); self.update()
         trigger_set = False  # for getting the confirmation that the trigger is set
         self.camera_opened = False  # flag for showing that the camera is initialized
@@ -249,7 +312,9 @@ class MainCtrlUI(base_class):
                 if camera_report == "Opened":
                     print(f"{self.selected_camera.get()} Camera Opened", flush=True); self.camera_opened = True
                     self.camera_status_label.config(text=self.camera_act_text, style=self.camera_init_status_style)
-                    self.camera_settings = self.camera_process.camera_settings.copy()
+                    self.retrieve_updated_settings()  # settings are provided by the opened camera on the Process
+                    if self.acquisition_mode.get() != acquisition_modes[0]:
+                        self.set_acquisition_mode()  # the selected mode is applied to the newly opened camera
                     if len(self.camera_settings.keys()) > 0:
                         print(f"Controllable {self.selected_camera.get()} Camera Parameters:", list(self.camera_settings.keys()), flush=True)
                     else:
@@ -261,6 +326,8 @@ class MainCtrlUI(base_class):
         if not trigger_set:
             print(f"Trigger from {self.selected_camera.get()} Camera Process not received, connection timeout", flush=True)
             self.camera_status_label.config(text=self.camera_inact_text, style=self.camera_error_status_style); self.update()
+        if process_taken:
+            self.after(200, self.workers_pool.prestart_async)  # replace the taken Process by the new idle one in the background
 
     # %% Acquisition
     def snap_image(self):
@@ -273,17 +340,33 @@ class MainCtrlUI(base_class):
 
         """
         # t1 = time.perf_counter()  # will be used for setting FPS setting
-        self.send_cmd2camera("Snap"); trigger_set = self.trigger_camera_data.wait(timeout=6.0)
+        t_trace = self.tracer.start(); self.send_cmd2camera("Snap"); trigger_set = self.trigger_camera_data.wait(timeout=6.0)
         time.sleep(self.sleep_time_actions_ms*0.25)  # Dev. Note: pausing by time.sleep() makes the snaps stream mode stable
         if trigger_set:
             self.trigger_camera_data.clear()  # set to the default state
             try:
                 # Guard the case that image is put into Queue but still not available even trigger was set
-                if self.data_from_camera.empty():
+                if self.frames_from_camera.empty():
                     n_checks = 1; max_n_checks = 500
-                    while self.data_from_camera.empty() and n_checks <= max_n_checks:
+                    while self.frames_from_camera.empty() and self.data_from_camera.empty() and n_checks <= max_n_checks:
                         n_checks += 1; time.sleep(self.sleep_time_actions_ms*0.25)
-                received_data = self.data_from_camera.get_nowait()  # extract image from Queue
+                # Image descriptor from the frames Queue or the reply (e.g., about the failed snap) from the data Queue
+                if not self.frames_from_camera.empty():
+                    received_data = self.frames_from_camera.get_nowait()
+                else:
+                    received_data = self.data_from_camera.get_nowait()
+                if isinstance(received_data, FrameDescriptor):
+                    self.frame_timestamp = received_data.timestamp; self.frame_id = received_data.frame_id; descriptor = received_data
+                    buffer = self.current_image if isinstance(self.current_image, np.ndarray) else None  # reused for the same shape
+                    received_data = self.camera_channels.frames_ring.read(received_data, out=buffer)  # None if the frame discarded
+                    if received_data is not None and self.processing_pipeline is not None:
+                        self.processing_pipeline.submit(descriptor)
+                        for processed in self.processing_pipeline.collect():
+                            if len(processed.results) > 0:
+                                self.processing_results = processed.results
+                    self.tracer.stop("snap_request", t_trace, self.frame_id)  # round trip: command -> frame read from shared memory
+                    if received_data is None:
+                        self.discarded_frames += 1
                 if isinstance(received_data, np.ndarray):
                     self.current_image = received_data; self.snap_image_obtained = True; self.display_image = True
                     # Check number of acquired images for retrieving measured FPS
@@ -293,8 +376,11 @@ class MainCtrlUI(base_class):
                     # Retrieve calculated on a camera controlling class FPS
                     if self.fps == 0:
                         self.query_fps()
-                    if self.acquired_images % 10 == 0:  # update FPS label each ... acquired images
-                        self.query_fps()
+                    if self.acquired_images % 10 == 0:  # update FPS and statistics labels each ... acquired images
+                        self.query_fps(); self.query_stats()
+                    if self.histogram_win is not None:  # statistics for each snapped image, each N-th one in the snaps stream
+                        if not self.snaps_stream_flag or self.acquired_images % self.frame_stats_interval == 0:
+                            self.query_frame_stats()
                     # schedule asynchronous call to show an image with some delays for making GUI more stable / responsive
                     if not self._image_ui_updating_lock:
                         self.show_image_task = self.after(1, self.show_image)
@@ -303,7 +389,7 @@ class MainCtrlUI(base_class):
                     self.current_image = None; self.display_image = False
             except Empty:
                 print("No Image received from Queue, but the trigger is set", flush=True)
-                time.sleep(5*self.sleep_time_actions_ms); self.data_from_camera = clean_mp_queue(self.data_from_camera)
+                time.sleep(5*self.sleep_time_actions_ms); self.camera_channels.clean()
                 self.current_image = None; self.display_image = False
         else:
             print("Something wrong with the Snap Image logic, the TIMEOUT happened in a trigger wait function", flush=True)
@@ -370,6 +456,91 @@ class MainCtrlUI(base_class):
         if self.snaps_stream_flag and not self.pause_snaps_stream:
             self.snaps_stream_task = self.after(25, self.run_snap_stream)  # it's only simulation of button clicks, not the real "Live" mode
 
+    def live_stream(self):
+        """
+        Start / stop the live stream: the camera Process acquires frames continuously, they are displayed with pacing.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.live_stream_flag = not self.live_stream_flag
+        if self.live_stream_flag:
+            self.lock_ui_btns(); self.live_stream_btn.configure(state="normal"); self.record_stream_btn.configure(state="normal")
+            self.live_stream_btn.configure(style=self.snap_stream_off_btn_style_name, text=self.live_stream_off_text)
+            self.menubar.entryconfig("Settings", state="disabled")  # changes of sizes and acquisition modes during the stream
+            self.display_pacer.reset(); self.camera_stats = {}; self.live_queries_t = time.perf_counter() + 0.5
+            self.send_cmd2camera("Start Live Stream"); self.live_stream_task = self.after(self.live_poll_ms, self.consume_live_stream)
+        else:
+            if self.record_flag:
+                self.record_stream()
+            if self.live_stream_task is not None:
+                self.after_cancel(self.live_stream_task); self.live_stream_task = None
+            self.send_cmd2camera("Stop Live Stream"); time.sleep(5*self.sleep_time_actions_ms)
+            self.clean_queues_events(); self.display_pacer.discard()  # frames and replies sent during stopping are discarded
+            print("Live stream finished:", self.display_pacer.stats(), flush=True)
+            self.query_stats()  # final counters of the camera watchdog (with the stopped stream, the reply is awaited)
+            self.record_stream_btn.configure(state="disabled"); self.menubar.entryconfig("Settings", state="normal")
+            self.live_stream_btn.configure(style=self.snap_stream_on_btn_style_name, text=self.live_stream_on_text)
+            self.unlock_ui_btns()
+
+    def consume_live_stream(self):
+        """
+        Drain the frames Queue keeping only the latest frame, display it if the pacing allows, handle replies of the camera.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.trigger_camera_data.clear()  # set by the camera for replies, not used in the live stream mode
+        while True:
+            try:
+                self.display_pacer.offer(self.frames_from_camera.get_nowait())
+            except Empty:
+                break
+        while True:
+            try:
+                received_data = self.data_from_camera.get_nowait()
+            except Empty:
+                break
+            if isinstance(received_data, tuple) and received_data[0] == "Stats":
+                self.camera_stats = received_data[1]
+                if self.camera_stats.get("mean_interval_ms", 0.0) > 0.0:
+                    self.fps = int(round(1000.0/self.camera_stats["mean_interval_ms"]))
+                    self.fps_label.config(text=f"Measured Acq. FPS: {self.fps}")
+                self.stats_label.config(text=self.format_stats())
+            elif isinstance(received_data, tuple) and received_data[0] == "Frame Stats":
+                if received_data[1] is not None and self.histogram_win is not None and self.histogram_win.winfo_exists():
+                    self.histogram_win.update_stats(received_data[1])
+            else:
+                print("Received from the camera during the live stream:", received_data, flush=True)
+        # Canvas is busy if the previous frame is being drawn (the flag is ignored after 0.5 sec. if the 'draw_event' is missed)
+        drawing = self.draw_requested_t > 0.0 and time.perf_counter() - self.draw_requested_t < 0.5
+        descriptor = self.display_pacer.take(display_busy=self._image_ui_updating_lock or drawing)
+        if descriptor is not None:
+            t_trace = self.tracer.start(); buffer = self.current_image if isinstance(self.current_image, np.ndarray) else None
+            image = self.camera_channels.frames_ring.read(descriptor, out=buffer)  # buffer reused if the shape and type are the same
+            self.tracer.stop("live_read", t_trace, descriptor.frame_id)
+            if image is None:
+                self.discarded_frames += 1  # overwritten by the camera before reading
+            else:
+                self.current_image = image; self.frame_timestamp = descriptor.timestamp; self.frame_id = descriptor.frame_id
+                if self.processing_pipeline is not None:
+                    self.processing_pipeline.submit(descriptor)
+                    for processed in self.processing_pipeline.collect():
+                        if len(processed.results) > 0:
+                            self.processing_results = processed.results
+                self.display_image = True; self.show_image()
+        if time.perf_counter() >= self.live_queries_t:  # replies are handled above by the next calls of this method
+            self.send_cmd2camera("Get Stats")
+            if self.histogram_win is not None and self.histogram_win.winfo_exists():
+                self.send_cmd2camera("Get Frame Stats")
+            self.live_queries_t = time.perf_counter() + 0.5
+        if self.live_stream_flag:
+            self.live_stream_task = self.after(self.live_poll_ms, self.consume_live_stream)
+
     # %% Recording
     def record_stream(self):
         """
@@ -425,6 +596,124 @@ class MainCtrlUI(base_class):
             self.fps = 0; self.fps_label.config(text=f"Measured FPS: {self.fps}")
         self.update()
 
+    def query_stats(self):
+        """
+        Get the counters of the acquisition watchdog from a camera wrapper.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.send_cmd2camera("Get Stats"); trigger_set = self.trigger_camera_data.wait(timeout=5.0); time.sleep(self.sleep_time_actions_ms/1.5)
+        if trigger_set:
+            self.trigger_camera_data.clear()  # set to the default state
+            try:
+                received_data = self.data_from_camera.get_nowait()
+                if isinstance(received_data, tuple) and received_data[0] == "Stats":
+                    self.camera_stats = received_data[1]; self.stats_label.config(text=self.format_stats())
+                else:
+                    print("Received from the camera (not statistics):", received_data, flush=True)
+            except Empty:
+                print("No statistics received from Queue, but the trigger is set", flush=True)
+        else:
+            print("Something wrong with querying statistics, the TIMEOUT happened in a trigger wait function", flush=True)
+
+    def query_frame_stats(self):
+        """
+        Get the histogram and ROI statistics of the last acquired image from a camera wrapper and show them.
+
+        Returns
+        -------
+        None.
+
+        """
+        if not self.histogram_win.winfo_exists():
+            self.histogram_win = None; return
+        self.send_cmd2camera("Get Frame Stats"); trigger_set = self.trigger_camera_data.wait(timeout=2.0)
+        time.sleep(self.sleep_time_actions_ms/1.5)
+        if trigger_set:
+            self.trigger_camera_data.clear()  # set to the default state
+            try:
+                received_data = self.data_from_camera.get_nowait()
+                if isinstance(received_data, tuple) and received_data[0] == "Frame Stats":
+                    if received_data[1] is not None:
+                        self.histogram_win.update_stats(received_data[1])
+                    else:
+                        print("Frame statistics not computed, check that ROI is inside of the image", flush=True)
+                else:
+                    print("Received from the camera (not frame statistics):", received_data, flush=True)
+            except Empty:
+                print("No frame statistics received from Queue, but the trigger is set", flush=True)
+        else:
+            print("Something wrong with querying frame statistics, the TIMEOUT happened in a trigger wait function", flush=True)
+
+    def open_histogram_win(self):
+        """
+        Open the window with the histogram and ROI statistics or focus on the opened one.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.histogram_win is not None and self.histogram_win.winfo_exists():
+            self.histogram_win.focus_set()
+        elif self.camera_opened:
+            self.histogram_win = HistogramWin(self)
+            if self.current_image is not None:
+                self.query_frame_stats()
+
+    def format_stats(self) -> str:
+        """
+        Compose text for the statistics label.
+
+        Returns
+        -------
+        str
+            Dropped frames, camera recoveries and latency.
+
+        """
+        dropped = self.camera_stats.get("frames_dropped", 0) + self.discarded_frames
+        stats_text = f"Dropped: {dropped} | Recovered: {self.camera_stats.get('recoveries', 0)} | Latency: {int(round(self.latency_ms))} ms"
+        if self.live_stream_flag or self.display_pacer.frames_received > 0:
+            pacer_stats = self.display_pacer.stats()
+            stats_text += (f"\nDisplayed: {pacer_stats['frames_displayed']} / Acquired: {self.camera_stats.get('frames_acquired', 0)}"
+                           + f" | Skipped: {pacer_stats['frames_skipped']} | Display FPS: {pacer_stats['display_fps']}")
+        if self.processing_pipeline is not None and self.processing_results.get("centroid", None) is not None:
+            row, col = self.processing_results["centroid"]; stats_text += f"\nCentroid (row, col): ({row:.1f}, {col:.1f})"
+        return stats_text
+
+    def set_acquisition_mode(self):
+        """
+        Send the selected acquisition mode to the camera.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.camera_opened:
+            self.send_cmd2camera(("Set Acquisition Mode", (self.acquisition_mode.get(), self.n_accumulated_frames)))
+            if self.trigger_camera_data.wait(timeout=2.0):
+                self.trigger_camera_data.clear()
+            self.fps = 0
+
+    def toggle_processing(self):
+        """
+        Start or stop the pool of Processes for processing of acquired frames according to the menu selection.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.processing_pipeline is not None:
+            self.processing_pipeline.shutdown(); self.processing_pipeline = None; self.processing_results = {}
+        if self.centroid_processing.get() and self.camera_channels is not None:
+            self.processing_pipeline = ProcessingPipeline(self.camera_channels.frames_ring, [("centroid", IntensityCentroid())],
+                                                          n_workers=1)
+
     def access_camera_settings(self):
         """
         Handle Open / Close of camera controls settings.
@@ -473,6 +762,17 @@ class MainCtrlUI(base_class):
             print("Something wrong with querying Updated Settings, the TIMEOUT happened in a trigger wait function", flush=True)
 
     # %% Show acquired image
+    def switch_contrast_mode(self):
+        """
+        Switch mapping of frames to uint8 between min / max values and smoothed percentiles.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.frame_preparer.set_contrast("auto" if self.auto_contrast_flag.get() else "minmax")
+
     def show_image(self):
         """
         Update image by direct request from function (not threaded).
@@ -486,29 +786,11 @@ class MainCtrlUI(base_class):
         if self.display_image:
             if self.current_image is not None and isinstance(self.current_image, np.ndarray):
                 img_shape_len = len(self.current_image.shape)  # length of image shape, assuming 2 for grayscaled image, 3 - for RGB (BGR)
-                # Convert originally acquired gray scaled image to uint16 - standard format for displaying
+                # Convert originally acquired gray scaled image to uint8 by the contrast lookup table (common display path)
                 if img_shape_len == 2:
-                    self.min_pixel_value = np.min(self.current_image); self.max_pixel_value = np.max(self.current_image)
-                    img2display = self.current_image.copy()
-                    if isinstance(self.current_image, np.floating):
-                        if self.min_pixel_value < 0.0:
-                            img2display += self.min_pixel_value
-                            if np.max(img2display) <= 1.0:
-                                img2display *= np.iinfo(np.uint16).max - 1  # autostretch range, keep it safe by -1
-                        else:
-                            if self.max_pixel_value <= 1.0:
-                                img2display *= np.iinfo(np.uint16).max - 1
-                    elif isinstance(self.current_image, np.integer):
-                        img2display = img2display.astype(dtype=np.float64)
-                        if self.min_pixel_value < 0:
-                            img2display += self.min_pixel_value
-                            if np.max(img2display) > np.iinfo(np.uint16).max:
-                                img2display /= np.max(img2display); img2display *= np.iinfo(np.uint16).max - 1
-                        else:
-                            if self.max_pixel_value > np.iinfo(np.uint16).max:
-                                img2display /= np.max(img2display); img2display *= np.iinfo(np.uint16).max - 1
-                    img2display = np.round(img2display, 0).astype(dtype=np.uint16)
-                    img2display_min = np.min(img2display); img2display_max = np.max(img2display)
+                    t_trace = self.tracer.start()
+                    img2display = self.frame_preparer.prepare(self.current_image); img2display_min = 0; img2display_max = 255
+                    self.tracer.stop("conversion", t_trace, self.frame_id)
                 # Check that the image sizes changed or not, and update the graph accordingly
                 if self.img_w is None and self.img_h is None:
                     if img_shape_len == 2:
@@ -549,10 +831,34 @@ class MainCtrlUI(base_class):
                         self.imshowing.set_clim(vmin=img2display_min, vmax=img2display_max)
                     else:
                         self.imshowing.set_data(self.current_image)
+                self.draw_trace_start = self.tracer.start()  # finished by the 'draw_event' callback
+                self.draw_requested_t = time.perf_counter()  # the live stream doesn't show the next frame until it's drawn
                 self.image_canvas.draw_idle()  # schedule only update, more responsive
+                if self.frame_timestamp is not None:  # exponential moving average of the latency acquisition -> display
+                    self.latency_ms = 0.9*self.latency_ms + 0.1*1000.0*(time.perf_counter() - self.frame_timestamp)
             self.display_image = False
         self._image_ui_updating_lock = False
 
+    def trace_canvas_draw(self, event):
+        """
+        Store the stage from scheduling the canvas update till finishing of drawing, mark the canvas as drawn.
+
+        Callback for the matplotlib 'draw_event'.
+
+        Parameters
+        ----------
+        event : matplotlib.backend_bases.DrawEvent
+            Provided by matplotlib.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.draw_requested_t = 0.0
+        if self.draw_trace_start > 0:
+            self.tracer.stop("canvas_draw", self.draw_trace_start, self.frame_id); self.draw_trace_start = 0
+
     def refresh_graph(self):
         """
         Functionality for refresh graph if image changed width / height.
@@ -588,14 +894,15 @@ class MainCtrlUI(base_class):
                 print(f"The required implementation for the '{selected_camera}' camera not found. \nThe previously active camera remained")
                 self.selected_camera.set(self.active_camera); self.unlock_ui_btns()  # set back the active camera and open it
             else:
-                # below - close + clean logic and after reinitialize everything
-                self.close_camera(); self.clean_queues_events(); self.open_camera()
+                # below - the running CameraWrapper Process closes the active camera and opens the selected one
+                if self.snaps_stream_flag:
+                    self.snap_stream()  # simulates click on stop stream button
+                self.clean_queues_events(); self.reinitialize_image_figure(True); self.fps = 0; self.discarded_frames = 0
+                self.latency_ms = 0.0; self.open_camera()
                 if not self.camera_opened:
                     print("\nCamera not opened, going back to the Simulated", flush=True)
-                    self.close_camera(); self.clean_queues_events()
-                    self.selected_camera.set(self.supported_cameras[0]); self.open_camera()
-                else:
-                    self.active_camera = self.selected_camera.get()
+                    self.clean_queues_events(); self.selected_camera.set(self.supported_cameras[0]); self.open_camera()
+                self.active_camera = self.selected_camera.get()
 
     def check_implementation(self, selected_camera) -> bool:
         """
@@ -634,16 +941,15 @@ class MainCtrlUI(base_class):
 
     def clean_queues_events(self):
         """
-        Clean up queues and set Events to the default state.
+        Discard pending frames, clean up queues and set Events to the default state.
 
         Returns
         -------
         None.
 
         """
-        self.data_from_camera = clean_mp_queue(self.data_from_camera)
-        self.commands2camera = clean_mp_queue(self.commands2camera)
-        self.trigger_commands.clear(); self.trigger_camera_data.clear()
+        if self.camera_channels is not None:
+            self.camera_channels.clean()
 
     def lock_ui_btns(self):
         """
@@ -656,6 +962,7 @@ class MainCtrlUI(base_class):
         """
         self.snap_image_btn.config(state="disabled"); self.camera_selector.config(state="disabled")
         self.snap_stream_btn.config(state="disabled"); self.cam_settings_btn.configure(state="disabled")
+        self.live_stream_btn.config(state="disabled")
         self.update(); self.block_btns_flag = True
         if self.camera_settings_win is not None and self.camera_settings_win.winfo_exists():
             self.camera_settings_win.lock_unlock_buttons()
@@ -671,7 +978,7 @@ class MainCtrlUI(base_class):
         """
         self.snap_image_btn.config(state="normal"); self.camera_selector.config(state="normal")
         self.snap_stream_btn.configure(state="normal"); self.cam_settings_btn.configure(state="normal")
-        self.update(); self.block_btns_flag = False
+        self.live_stream_btn.configure(state="normal"); self.update(); self.block_btns_flag = False
         if self.camera_settings_win is not None and self.camera_settings_win.winfo_exists():
             self.camera_settings_win.lock_unlock_buttons()
 
@@ -706,6 +1013,7 @@ class MainCtrlUI(base_class):
         del self.imshowing; del self.image_figure_axes; del self.image_figure
         self.image_figure = pltFigure.Figure(figsize=(self.figure_size_w, self.figure_size_h))  # empty figure with changed
         self.image_canvas = FigureCanvasTkAgg(self.image_figure, master=self); self.plot_widget = self.image_canvas.get_tk_widget()
+        self.image_canvas.mpl_connect('draw_event', self.trace_canvas_draw); self.draw_trace_start = 0
         self.plot_widget.pack(side=LEFT, padx=self.padx, pady=self.pady); self.buttons_frame.pack(side=TOP, padx=self.padx, pady=self.pady)
         self.image_figure.set_figwidth(self.figure_size_w); self.image_figure.set_figheight(self.figure_size_h)
         self.image_figure_axes = None; self.imshowing = None
@@ -737,6 +1045,35 @@ class MainCtrlUI(base_class):
         self._relaunch = True; self.after(40, self.master.destroy)
 
     # %% Close Main Win. / Camera
+    def export_trace(self):
+        """
+        Save the traced stages of this UI and of the camera Process to the JSON file in the Chrome trace format.
+
+        Returns
+        -------
+        None.
+
+        """
+        snapshots = [self.tracer.snapshot()]
+        if self.camera_opened and not self.snaps_stream_flag:
+            self.send_cmd2camera("Get Trace"); trigger_set = self.trigger_camera_data.wait(timeout=5.0)
+            if trigger_set:
+                self.trigger_camera_data.clear()
+                try:
+                    received_data = self.data_from_camera.get(timeout=1.0)
+                    if isinstance(received_data, tuple) and received_data[0] == "Trace":
+                        snapshots.append(received_data[1])
+                    else:
+                        print("Received from the camera (not trace):", received_data, flush=True)
+                except Empty:
+                    print("No trace received from Queue, but the trigger is set", flush=True)
+        timestamp = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
+        trace_path = export_chrome_trace(str(Path(__file__).parent.joinpath(f"trace_mwpc_{timestamp}.json")), snapshots)
+        print("Trace saved to:", trace_path, flush=True)
+        for snapshot in snapshots:
+            for stage, stage_summary in summarize_snapshot(snapshot).items():
+                print(f"{snapshot['process_name']} {stage}: {stage_summary}", flush=True)
+
     def close_camera(self):
         """
         Quit the CameraWrapper Process loop.
@@ -748,6 +1085,10 @@ class MainCtrlUI(base_class):
         """
         if self.snaps_stream_flag:
             self.snap_stream()  # simulates click on stop stream button
+        if self.live_stream_flag:
+            self.live_stream()
+        if not self.camera_opened and self.camera_process is not None and self.camera_process.is_alive():
+            self.send_cmd2camera("Quit"); self.camera_process.join(2.0)  # Process waiting for opening of another camera
         if self.camera_opened:
             self.camera_status_label.config(text=self.camera_act_text, style=self.camera_init_status_style); self.update(); self.fps = 0
             self.send_cmd2camera("Stop"); trigger_set = self.trigger_camera_data.wait(5.0); time.sleep(self.sleep_time_actions_ms)
@@ -779,12 +1120,21 @@ class MainCtrlUI(base_class):
         None.
 
         """
+        if self.tracer.enabled:
+            if self.snaps_stream_flag:
+                self.snap_stream()  # stop stream for requesting the trace from the camera
+            if self.live_stream_flag:
+                self.live_stream()
+            self.export_trace()
         self.close_camera()  # close of a camera logic
-        if self.camera_process.is_alive():  # for fallback logic
+        if self.camera_process is not None and self.camera_process.is_alive():  # for fallback logic
             print("CameraWrapper Process is still alive, check the closing logic in it.", flush=True)
             self.camera_process.join(0.2); self.camera_process.kill()
-        self.data_from_camera = clean_mp_queue(self.data_from_camera); self.data_from_camera.close()  # cleaning the queue
-        self.commands2camera = clean_mp_queue(self.commands2camera); self.commands2camera.close()
+        if self.processing_pipeline is not None:
+            self.processing_pipeline.shutdown()
+        if self.camera_channels is not None:
+            self.camera_channels.close()  # cleaning and closing the queues
+        self.workers_pool.shutdown()  # stop the pre-started idle Processes
 
 
 # %% Wrapper UI class
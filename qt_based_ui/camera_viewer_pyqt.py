@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+High FPS viewer (PyQt / PySide + pyqtgraph) on top of the CameraWrapper Process.
+
+Frames are transferred by the CameraWrapper through the shared memory ring, only their descriptors are sent through the
+frames Queue (separate from replies). The receiving QThread drains the Queues (latest frame wins), reads the frame and
+maps it to uint8 (smoothed percentiles) by the common FrameDisplayPreparer directly into the triple buffer, so the GUI
+thread only takes the latest buffer on its repaint timer and calls ImageItem.setImage(autoLevels=False) with the fixed
+levels. Snap, live stream and recording are supported.
+
+@author: sklykov
+
+@license: GPL v3 (as it is enforced by the license of PyQt5. If PySide is installed, the license could be different).
+
+"""
+# %% Global imports
+import sys
+import time
+from pathlib import Path
+from queue import Empty
+import numpy as np
+from qtpy.QtGui import QCloseEvent
+from qtpy.QtCore import QThread, QTimer, Signal
+from qtpy.QtWidgets import QApplication, QMainWindow, QPushButton, QWidget, QGridLayout, QSpinBox, QComboBox, QLabel
+import pyqtgraph
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    root_folder = str(Path(__file__).parent.parent)  # the camera and display packages are placed in the root of the repository
+    if root_folder not in sys.path:
+        sys.path.append(root_folder)
+    from utils.frames_buffer import TripleBuffer
+    from camera.camera_wrapper import CameraWrapper, cameras_ctrl_types
+    from camera.camera_worker import CameraChannels
+    from display.frame_preparation import FrameDisplayPreparer
+else:
+    from .utils.frames_buffer import TripleBuffer
+    from ..camera.camera_wrapper import CameraWrapper, cameras_ctrl_types
+    from ..camera.camera_worker import CameraChannels
+    from ..display.frame_preparation import FrameDisplayPreparer
+
+pyqtgraph.setConfigOptions(imageAxisOrder='row-major')  # numpy order of axes (rows, columns), no transposing of frames
+
+
+# %% Receiving frames
+class FramesReceiver(QThread):
+    """Drain the frames Queue of the CameraWrapper, put the latest frame into the triple buffer, send replies as Signal."""
+
+    # noinspection PyArgumentList
+    reply_received = Signal(object)  # replies of the camera (strings, statistics), should be the class attribute
+
+    def __init__(self, parent_object, channels: CameraChannels):
+        super().__init__(parent=parent_object)
+        self.channels = channels; self.frames = TripleBuffer(); self.frame_preparer = FrameDisplayPreparer(contrast="auto")
+        self._running = True; self.frame_buffer = None
+        self.frames_received = 0; self.frames_skipped = 0; self.frames_discarded = 0; self.latest_timestamp = 0.0
+
+    def run(self):
+        """
+        Specify the thread task (loop).
+
+        Returns
+        -------
+        None.
+
+        """
+        while self._running:
+            while True:
+                try:
+                    self.reply_received.emit(self.channels.data_from_camera.get_nowait())
+                except (Empty, OSError, ValueError):
+                    break  # OSError, ValueError - the Queue is closed
+            try:
+                latest = self.channels.frames_from_camera.get(timeout=0.02); self.frames_received += 1
+            except (Empty, OSError, ValueError):
+                continue
+            while True:
+                try:
+                    latest = self.channels.frames_from_camera.get_nowait(); self.frames_received += 1
+                    self.frames_skipped += 1  # only the latest frame is read from the shared memory
+                except (Empty, OSError, ValueError):
+                    break
+            if latest is not None:
+                frame = self.channels.frames_ring.read(latest, out=self.frame_buffer)
+                if frame is None:
+                    self.frames_discarded += 1; continue
+                self.frame_buffer = frame  # reused for reading the next frames with the same shape
+                buffer = self.frames.write_buffer(self.frame_preparer.output_shape(frame.shape), np.uint8)
+                self.frame_preparer.prepare(frame, out=buffer)
+                self.frames.publish((latest.frame_id, (0, 255))); self.latest_timestamp = latest.timestamp
+
+    def stop(self):
+        """
+        Stop the loop and wait for the thread finishing.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._running = False; self.wait()
+
+
+# %% Viewer
+class CameraViewer(QMainWindow):
+    """Controls of the CameraWrapper Process and displaying of frames by the pyqtgraph ImageItem."""
+
+    def __init__(self, display_fps: int = 60):
+        """Create overall UI inside the QMainWindow widget and start the CameraWrapper Process."""
+        super().__init__(None)
+        self.setWindowTitle("Camera Viewer (pyqtgraph)"); self.setGeometry(200, 200, 900, 760)
+        wid = QWidget(self); self.setCentralWidget(wid)
+        self.live_flag = False; self.record_flag = False; self.camera_opened = False; self.frames_displayed = 0
+        self.camera_stats = {}; self.latency_ms = 0.0
+
+        # Central plot - Image display initialization
+        self.graphics_widget = pyqtgraph.GraphicsLayoutWidget(); self.view_box = self.graphics_widget.addViewBox()
+        self.view_box.setAspectLocked(True); self.view_box.invertY(True)  # first row on the top
+        self.image_item = pyqtgraph.ImageItem(); self.view_box.addItem(self.image_item)
+
+        # Buttons creation
+        self.camera_selector = QComboBox(self); self.camera_selector.addItems(cameras_ctrl_types)
+        self.snap_btn = QPushButton("Snap"); self.live_btn = QPushButton("Start Live"); self.live_btn.setCheckable(True)
+        self.record_btn = QPushButton("Start Recording"); self.record_btn.setCheckable(True)
+        self.exp_time_ctrl = QSpinBox(self); self.exp_time_ctrl.setPrefix("Exposure time: "); self.exp_time_ctrl.setSuffix(" ms")
+        self.exp_time_ctrl.setMinimum(1); self.exp_time_ctrl.setMaximum(2000); self.exp_time_ctrl.setValue(20)
+        self.quit_btn = QPushButton("Quit"); self.quit_btn.setStyleSheet("color: red")
+        self.status_label = QLabel("Camera Inactive"); self.stats_label = QLabel("")
+
+        # Grid layout below - the main layout pattern for all buttons and windows on the Main Window
+        grid = QGridLayout(); wid.setLayout(grid)
+        grid.addWidget(self.camera_selector, 0, 0, 1, 1); grid.addWidget(self.snap_btn, 0, 1, 1, 1)
+        grid.addWidget(self.live_btn, 0, 2, 1, 1); grid.addWidget(self.record_btn, 0, 3, 1, 1)
+        grid.addWidget(self.exp_time_ctrl, 0, 4, 1, 1); grid.addWidget(self.quit_btn, 0, 5, 1, 1)
+        grid.addWidget(self.status_label, 1, 0, 1, 2); grid.addWidget(self.stats_label, 1, 2, 1, 4)
+        grid.addWidget(self.graphics_widget, 2, 0, 5, 6)
+
+        # Set event handlers for buttons
+        self.camera_selector.currentTextChanged.connect(self.open_camera); self.snap_btn.clicked.connect(self.snap)
+        self.live_btn.clicked.connect(self.toggle_live); self.record_btn.clicked.connect(self.toggle_recording)
+        self.exp_time_ctrl.valueChanged.connect(self.change_exp_time); self.quit_btn.clicked.connect(self.close)
+        self.set_controls_enabled(False)
+
+        # CameraWrapper Process without opened camera (it's opened by the command) and the QThread receiving frames
+        self.channels = CameraChannels()
+        self.camera_process = CameraWrapper(camera_type=None, **self.channels.wrapper_kwargs())
+        self.camera_process.daemon = True; self.camera_process.start()
+        self.receiver = FramesReceiver(self, self.channels); self.receiver.reply_received.connect(self.handle_reply)
+        self.receiver.start()
+
+        # Repaint timer - the GUI takes the latest frame at most with the display rate, statistics are requested each second
+        self.display_timer = QTimer(parent=self); self.display_timer.timeout.connect(self.update_displayed_image)
+        self.display_timer.start(max(int(round(1000.0/display_fps)), 1))
+        self.stats_timer = QTimer(parent=self); self.stats_timer.timeout.connect(self.request_stats); self.stats_timer.start(1000)
+        self.open_camera(self.camera_selector.currentText())
+
+    def set_controls_enabled(self, enabled: bool):
+        """
+        Enable / disable controls depending on the camera state.
+
+        Parameters
+        ----------
+        enabled : bool
+            Flag for enabling controls.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.snap_btn.setEnabled(enabled and not self.live_flag); self.live_btn.setEnabled(enabled)
+        self.record_btn.setEnabled(enabled); self.exp_time_ctrl.setEnabled(enabled)
+        self.camera_selector.setEnabled(not self.live_flag and not self.record_flag)
+
+    def open_camera(self, camera_type: str):
+        """
+        Open the selected camera on the CameraWrapper Process (the previously opened one is closed by the Process).
+
+        Parameters
+        ----------
+        camera_type : str
+            Selected camera type.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.camera_opened = False; self.set_controls_enabled(False); self.status_label.setText("Waiting...")
+        self.channels.send_command(("Open Camera", camera_type))
+
+    def handle_reply(self, reply):
+        """
+        Handle the reply from the camera received by the QThread.
+
+        Parameters
+        ----------
+        reply : Any
+            Reply from the CameraWrapper.
+
+        Returns
+        -------
+        None.
+
+        """
+        if reply == "Opened":
+            self.camera_opened = True; self.status_label.setText(f"{self.camera_selector.currentText()} Camera Active")
+            self.set_controls_enabled(True); self.change_exp_time(); self.channels.send_command("Get Updated Settings")
+        elif isinstance(reply, str) and "NOT Opened" in reply:
+            self.status_label.setText("Camera Inactive"); print(reply, flush=True)
+            self.camera_selector.setEnabled(True)
+        elif isinstance(reply, dict):  # updated settings
+            if "Exposure Time" in reply:
+                self.exp_time_ctrl.blockSignals(True)
+                self.exp_time_ctrl.setMinimum(int(reply["Exposure Time"]["min"]))
+                self.exp_time_ctrl.setMaximum(int(reply["Exposure Time"]["max"]))
+                self.exp_time_ctrl.blockSignals(False)
+        elif isinstance(reply, tuple) and reply[0] == "Stats":
+            self.camera_stats = reply[1]; self.update_stats_label()
+        elif reply == "Stopped":
+            self.camera_opened = False
+        elif not isinstance(reply, int):  # FPS replies aren't requested by this viewer
+            print("Received from the camera:", reply, flush=True)
+
+    def snap(self):
+        """
+        Acquire single frame, it's shown by the repaint timer.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.channels.send_command("Snap")
+
+    def toggle_live(self):
+        """
+        Start / stop the live stream in the CameraWrapper Process.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.live_flag = self.live_btn.isChecked()
+        if self.live_flag:
+            self.channels.send_command("Start Live Stream"); self.live_btn.setText("Stop Live")
+        else:
+            self.channels.send_command("Stop Live Stream"); self.live_btn.setText("Start Live")
+        self.set_controls_enabled(self.camera_opened)
+
+    def toggle_recording(self):
+        """
+        Start / stop recording of frames by the CameraWrapper Process (snapped or acquired in the live stream).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.record_flag = self.record_btn.isChecked()
+        if self.record_flag:
+            self.channels.send_command("Start Recording"); self.record_btn.setText("Stop Recording")
+        else:
+            self.channels.send_command("Stop Recording"); self.record_btn.setText("Start Recording")
+        self.set_controls_enabled(self.camera_opened)
+
+    def change_exp_time(self):
+        """
+        Send the exposure time to the camera.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.camera_opened:
+            self.channels.send_command(("Set Exposure Time", self.exp_time_ctrl.value()))
+
+    def request_stats(self):
+        """
+        Request counters of the camera watchdog, the reply is handled by the handle_reply() method.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.camera_opened:
+            self.channels.send_command("Get Stats")
+
+    def update_displayed_image(self):
+        """
+        Show the latest frame from the triple buffer (called by the repaint timer).
+
+        Returns
+        -------
+        None.
+
+        """
+        frame, metadata = self.receiver.frames.take()
+        if frame is None:
+            return
+        _, levels = metadata
+        self.image_item.setImage(frame, autoLevels=False, levels=levels); self.frames_displayed += 1
+        if self.receiver.latest_timestamp > 0.0:  # exponential moving average of the latency acquisition -> display
+            self.latency_ms = 0.9*self.latency_ms + 0.1*1000.0*(time.perf_counter() - self.receiver.latest_timestamp)
+
+    def update_stats_label(self):
+        """
+        Show acquisition and displaying counters.
+
+        Returns
+        -------
+        None.
+
+        """
+        mean_interval_ms = self.camera_stats.get("mean_interval_ms", 0.0)
+        fps = round(1000.0/mean_interval_ms, 1) if mean_interval_ms > 0.0 else 0.0
+        self.stats_label.setText(f"Acq. FPS: {fps} | Acquired: {self.camera_stats.get('frames_acquired', 0)} | "
+                                 + f"Received: {self.receiver.frames_received} | Displayed: {self.frames_displayed} | "
+                                 + f"Dropped: {self.camera_stats.get('frames_dropped', 0) + self.receiver.frames_discarded} | "
+                                 + f"Latency: {int(round(self.latency_ms))} ms")
+
+    # noinspection PyMethodOverriding
+    def closeEvent(self, qt_event: QCloseEvent):
+        """
+        Stop the CameraWrapper Process and the receiving QThread.
+
+        Parameters
+        ----------
+        qt_event : QCloseEvent
+            Needed by the API.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.display_timer.stop(); self.stats_timer.stop()
+        if self.camera_process.is_alive():
+            self.channels.send_command("Quit"); self.camera_process.join(2.0)
+            if self.camera_process.is_alive():
+                self.camera_process.kill()
+        self.receiver.stop(); self.channels.close(); qt_event.accept()
+
+
+# %% Launch the GUI
+if __name__ == "__main__":
+    my_app = QApplication([])  # application without any command-line arguments
+    my_app.setQuitOnLastWindowClosed(True)
+    main_window = CameraViewer(); main_window.show()
+    my_app.exec()
@@ -10,17 +10,25 @@ Simple GUI for representing of generated noisy image using PyQT.
 # %% Global imports
 import numpy as np
 import time
+import sys
+from datetime import datetime
+from pathlib import Path
 # Switching below to qtpy - the library that decides which actual backend is installed - pyqt or pyside
 # 'qtpy' has MIT license, allowing to use it in any project
 # Launching of this program has been tested successfully in Python 3.9 env with pyside2 installed
 from qtpy.QtGui import QCloseEvent
-from qtpy.QtCore import QTimer
+from qtpy.QtCore import QTimer, QEvent
 from qtpy.QtWidgets import QApplication, QMainWindow, QPushButton, QWidget, QGridLayout, QSpinBox, QCheckBox, QVBoxLayout
 # pyqtgraph should automatically resolve the actual backend (pyqt or pyside)
 import pyqtgraph
 
 # %% Local imports (modules)
+root_folder = str(Path(__file__).parent.parent)  # the display package is placed in the root of the repository
+if root_folder not in sys.path:
+    sys.path.append(root_folder)
 from utils.acq_img_worker import ImagingThread
+from display.perf_recorder import FramePerfRecorder
+from display.frame_preparation import FrameDisplayPreparer
 
 
 # %% Initially, SimUscope means Simulated Microscope control. Remained for limited image display below
@@ -34,12 +42,15 @@ class SimUscope(QMainWindow):
         super().__init__(None)  # None - default parameter for the parent variable (it's the main window)
         self.setWindowTitle("Display UI - Camera Image"); self.setGeometry(200, 200, 800, 700)
         wid = QWidget(self); self.setCentralWidget(wid)  # setting central widget
-        self.update_img_task = QTimer(parent=self)   # update task for continuous imaging
-        self.start_time = time.perf_counter()  # for recording time measurements for performance evaluation
-        self.n_performance_counts = 0  # for counting number of timing measurements
-        self.mean_acq_time_ms = 0  # for counting time required for estimating of continuous snaps stream
+        self.perf_recorder = FramePerfRecorder()  # timings of continuously generated frames, if the performance test is checked
+        # Frame is delivered when the GUI thread receives the Signal, painted - when the paint event of the view is handled
+        self.frame_delivered_t = 0.0; self.frame_timings = None  # timings of the frame waiting for painting
         self.update_img_on_display_task = QTimer(parent=self)
+        # Continuous generation: the GUI takes the latest frame from the ImagingThread buffers on this repaint timer
+        self.display_fps = 60; self.repaint_timer = QTimer(parent=self); self.repaint_timer.setSingleShot(True)
+        self.repaint_timer.setInterval(int(round(1000/self.display_fps))); self.repaint_timer.timeout.connect(self.repaint_latest_image)
         self.current_img = np.zeros((img_height, img_width), dtype=np.uint8)  # storing current image
+        self.frame_preparer = FrameDisplayPreparer(contrast="range")  # common display path, uint8 frames are only copied
 
         # Central plot - Image display initialization
         self.img_height = img_height; self.img_width = img_width
@@ -83,6 +94,8 @@ class SimUscope(QMainWindow):
         # Reimplementation of logic for getting images from pure Thread
         self.img_acq_thr = ImagingThread(self, img_height, img_width); self.img_acq_thr.start()
         self.img_acq_thr.acquired_image.connect(self.get_updated_image)
+        self.img_acq_thr.new_frame_available.connect(self.schedule_repaint)
+        self.image_widget.ui.graphicsView.viewport().installEventFilter(self)  # paint events are used for the performance test
 
     def generate_single_pic(self):
         """
@@ -110,30 +123,70 @@ class SimUscope(QMainWindow):
 
         """
         # self.image_widget.setImage(img)   # update displayed image - direct updating task
-        self.current_img = img.copy()   # store current image received from the acquisition thread
+        self.current_img = img   # the emitted image is generated for each request, so it isn't copied
         self.update_img_on_display_task.singleShot(1, self.update_displayed_image)  # async request updating of displayed image
         self.img_acq_thr.pause_work()  # pause the internal loop for the next execution (acquisition)
-        if self.__generation_flag:
+
+    def schedule_repaint(self):
+        """
+        Handle the "new frame available" Signal in the continuous mode: start the repaint timer if it isn't started yet.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.frame_delivered_t = time.perf_counter()  # the Signal of the latest frame, which is taken on the repaint timer
+        if not self.repaint_timer.isActive():
+            self.repaint_timer.start()  # frames generated before its timeout are replaced by the latest one
+
+    def repaint_latest_image(self):
+        """
+        Show the latest frame generated in the continuous mode, record its timings if the performance test is checked.
+
+        Returns
+        -------
+        None.
+
+        """
+        frame, generation_times = self.img_acq_thr.frames.take()
+        if frame is not None and self.__generation_flag:
+            self.image_widget.setImage(frame, autoLevels=False, levels=(0, 255))  # the view is painted by the event loop
             if self.toggle_performance_test.isChecked():
-                # Calculate mean acquisition time
-                if self.n_performance_counts == 0:
-                    self.mean_acq_time_ms = int(np.round((time.perf_counter() - self.start_time)*1000))
-                else:
-                    self.mean_acq_time_ms += int(np.round((time.perf_counter() - self.start_time)*1000))
-                    self.mean_acq_time_ms = int(round(0.5*self.mean_acq_time_ms, 0))
-                # Printing out simple report on the performance
-                if self.n_performance_counts != 0 and self.n_performance_counts % 10 == 0 and self.exp_time_ctrl.value() > 59:
-                    print("Mean acquisition time [ms]:", self.mean_acq_time_ms, flush=True)
-                elif (self.n_performance_counts != 0 and self.n_performance_counts % 20 == 0
-                      and 25 <= self.exp_time_ctrl.value() <= 59):
-                    print("Mean acquisition time [ms]:", self.mean_acq_time_ms, flush=True)
-                elif (self.n_performance_counts != 0 and self.n_performance_counts % 40 == 0
-                      and self.exp_time_ctrl.value() < 25):
-                    print("Mean acquisition time [ms]:", self.mean_acq_time_ms, flush=True)
-                if self.n_performance_counts > 50E6:  # prevent unnecessary huge counts number
-                    self.n_performance_counts = 1
-                self.n_performance_counts += 1; self.start_time = time.perf_counter()
-            self.update_img_task.singleShot(1, self.generate_single_pic)  # assign single update task (snaps stream)
+                self.frame_timings = (generation_times[0], generation_times[1], self.frame_delivered_t)  # replaces not painted one
+
+    def eventFilter(self, watched, event) -> bool:
+        """
+        Register painting of the frame waiting for it (the performance test), events aren't filtered out.
+
+        Parameters
+        ----------
+        watched : QObject
+            Viewport of the image view.
+        event : QEvent
+            Event sent to the viewport.
+
+        Returns
+        -------
+        bool
+            False - the event is handled by the viewport.
+
+        """
+        if event.type() == QEvent.Paint and self.frame_timings is not None:
+            QTimer.singleShot(0, self.frame_painted)  # called after the paint event is handled
+        return super().eventFilter(watched, event)
+
+    def frame_painted(self):
+        """
+        Record timings of the painted frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.frame_timings is not None:
+            self.perf_recorder.add(*self.frame_timings, time.perf_counter()); self.frame_timings = None
 
     def generate_continuous_pics(self):
         """
@@ -150,14 +203,18 @@ class SimUscope(QMainWindow):
         if self.__generation_flag:
             self.toggle_performance_test.setDisabled(True)  # Disable the checkbox for preventing test on during continuous generation
             self.exp_time_ctrl.setDisabled(True)  # Disable the exposure time control
-            self.width_ctrl.setDisabled(True); self.height_ctrl.setDisabled(True); self.snap_single_img_btn.setDisabled(True)
-            if self.toggle_performance_test.isChecked():
-                self.start_time = time.perf_counter(); self.n_performance_counts = 0
-            self.update_img_task.singleShot(1, self.generate_single_pic)   # assign single update task (snaps stream)
+            self.snap_single_img_btn.setDisabled(True)  # sizes can be changed during generation (applied by the running thread)
+            self.perf_recorder.reset()
+            self.img_acq_thr.start_continuous()  # frames generated without the pause / resume handshake
         else:
+            self.img_acq_thr.stop_continuous(); self.repaint_timer.stop(); self.frame_timings = None
             time.sleep((self.exp_time_ctrl.value()*2)/1000); self.exp_time_ctrl.setEnabled(True)
             self.toggle_performance_test.setEnabled(True); self.snap_single_img_btn.setEnabled(True)
-            self.width_ctrl.setEnabled(True); self.height_ctrl.setEnabled(True); self.n_performance_counts = 0
+            if self.toggle_performance_test.isChecked() and self.perf_recorder.n_frames > 0:
+                print(self.perf_recorder.report(), flush=True)
+                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                csv_path = self.perf_recorder.save_csv(str(Path(__file__).parent.joinpath(f"perf_qt_{timestamp}.csv")))
+                print("Timings of frames saved to:", csv_path, flush=True)
 
     def change_exp_time(self):
         """
@@ -179,7 +236,7 @@ class SimUscope(QMainWindow):
         None.
 
         """
-        self.image_widget.setImage(self.current_img)
+        self.image_widget.setImage(self.frame_preparer.prepare(self.current_img), autoLevels=False, levels=(0, 255))
 
     # noinspection PyMethodOverriding
     def closeEvent(self, qt_event: QCloseEvent):
@@ -229,9 +286,8 @@ class SimUscope(QMainWindow):
 
         """
         self.img_width = self.width_ctrl.value(); self.img_height = self.height_ctrl.value()
-        self.img_acq_thr.stop(); del self.img_acq_thr  # clean up previous instance of an image generator
-        self.img_acq_thr = ImagingThread(self, self.img_height, self.img_width); self.img_acq_thr.start()
-        self.img_acq_thr.acquired_image.connect(self.get_updated_image)
+        self.img_acq_thr.set_image_size(self.img_height, self.img_width)  # the running thread reallocates its buffers
+        self.plot.setXRange(0, self.img_width); self.plot.setYRange(0, self.img_height)
 
 
 # %% Launch the GUI
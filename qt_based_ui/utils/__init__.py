@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
 """Export from this folder."""
 
-__all__ = ['acq_img_worker']
+__all__ = ['acq_img_worker', 'frames_buffer']
 
@@ -2,20 +2,27 @@
 """
 Generate noisy image on the QThread.
 
+Single images are generated on request (resume_work() -> image sent by the Signal -> pause_work()). In the continuous mode
+images are generated without any handshake into the triple buffer, only the "new frame available" Signal is emitted and
+the GUI takes the latest frame from the buffer when it repaints.
+
 @author: sklykov
 
 @license: GPL v3 (as it is enforced by the license of PyQt5).
 
 """
 # %% Imports
+import time
 import numpy as np
 from qtpy.QtCore import QThread, Signal, QMutex, QWaitCondition
 
 # Local import resolving if this module imported by the main one
 if __name__ == '__main__':
     from generate_noise_pic import generate_noise_picture
+    from frames_buffer import TripleBuffer
 else:
     from .generate_noise_pic import generate_noise_picture
+    from .frames_buffer import TripleBuffer
 
 
 # %% Class def.
@@ -23,6 +30,8 @@ class ImagingThread(QThread):
     # comment below is for preventing wrong inspection results for Signal
     # noinspection PyArgumentList
     acquired_image = Signal(np.ndarray)  # actual image shared as Signal, should be the class attribute, not instance one
+    # noinspection PyArgumentList
+    new_frame_available = Signal()  # continuous mode: the frame is published in the triple buffer, no data sent by the Signal
 
     def __init__(self, parent_object, img_h: int, img_w: int):
         super().__init__(parent=parent_object)  # provide parent for auto managing by PyQt, can be QMainWindow
@@ -31,6 +40,8 @@ class ImagingThread(QThread):
         self._wait_condition = QWaitCondition()  # it hasn't internal lock for checking
         self._paused = True; self._running = True; self.pause_ms = 100
         self.img_h, self.img_w = img_h, img_w
+        self._continuous = False; self.frames = TripleBuffer()  # buffers for the continuous mode, taken by the GUI
+        self.scratch = np.empty((0, 0), dtype=np.float32)  # reused for the noise generation in the continuous mode
 
     def run(self):
         """
@@ -42,14 +53,26 @@ class ImagingThread(QThread):
         """
         while self._running:
             self._mutex.lock()  # locking any changing of variables to this worker (if other thread call resume or pause simultaneously)
-            if self._paused:
+            if self._paused and not self._continuous:
                 self._wait_condition.wait(self._mutex)  # release lock on mutex and goes to sleep automatically
+            continuous = self._continuous; img_h, img_w = self.img_h, self.img_w  # size can be changed by the GUI
             self._mutex.unlock()  # when it's running continuously, it allows main Thread to call pause / stop methods and set flags
+            if not self._running:
+                break  # woken up by the stop() method
 
             # Acquiring an image
-            img = generate_noise_picture(height=self.img_h, width=self.img_w)
-            self.acquired_image.emit(img)  # will send the generated data to the specified handler method
-            # The binding of the Signal and handling method done in the calling class (SimUscope) by Signal.connect(self.method)
+            if continuous:
+                # Frame is written into the buffer not used by the GUI, start and end of generation are published with it
+                t_started = time.perf_counter()
+                frame = self.frames.write_buffer((img_h, img_w), np.uint8)  # reallocated only if the size changed
+                if self.scratch.shape != (img_h, img_w):
+                    self.scratch = np.empty((img_h, img_w), dtype=np.float32)
+                generate_noise_picture(height=img_h, width=img_w, out=frame, scratch=self.scratch)  # generated in place
+                self.frames.publish((t_started, time.perf_counter())); self.new_frame_available.emit()
+            else:
+                img = generate_noise_picture(height=img_h, width=img_w)
+                self.acquired_image.emit(img)  # will send the generated data to the specified handler method
+                # The binding of the Signal and handling method done in the calling class (SimUscope) by Signal.connect(self.method)
 
             # Some pause (instead of exposure time - for Simulation of image acquisition)
             self.msleep(self.pause_ms)
@@ -81,6 +104,53 @@ class ImagingThread(QThread):
         self._paused = True
         self._mutex.unlock()  # release lock
 
+    def start_continuous(self):
+        """
+        Start generation of images without waiting for the GUI (continuous mode).
+
+        Returns
+        -------
+        None.
+
+        """
+        self._mutex.lock()
+        self._continuous = True
+        self._wait_condition.wakeOne()  # if loop waits for a notification
+        self._mutex.unlock()
+
+    def stop_continuous(self):
+        """
+        Stop continuous generation, the loop waits for requests of single images afterwards.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._mutex.lock()
+        self._continuous = False; self._paused = True
+        self._mutex.unlock()
+
+    def set_image_size(self, img_h: int, img_w: int):
+        """
+        Change the size of generated images, buffers are reallocated by the loop for the next image (no new thread started).
+
+        Parameters
+        ----------
+        img_h : int
+            Height of images.
+        img_w : int
+            Width of images.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._mutex.lock()
+        self.img_h, self.img_w = img_h, img_w
+        self._mutex.unlock()
+
     def set_pause_ms(self, pause_ms: int):
         """
         Set pause before image acquiring (generation).
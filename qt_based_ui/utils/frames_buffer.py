@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Triple buffer for exchanging frames between the producer Thread and the GUI without copying and waiting.
+
+The producer writes into its own buffer and publishes it (swapping with the "ready" one), the GUI takes the ready buffer
+(swapping with the "displayed" one), so the displayed frame isn't overwritten until the GUI takes the next one, and
+the producer never waits for the GUI. Only indices are swapped under the lock.
+
+@author: sklykov
+
+@license: GPL v3 (as it is enforced by the license of PyQt5).
+
+"""
+# %% Imports
+from threading import Lock
+import numpy as np
+
+
+# %% Class def.
+class TripleBuffer():
+    """Preallocated write / ready / read buffers, the latest published frame wins."""
+
+    def __init__(self):
+        self._lock = Lock(); self._buffers = [None, None, None]; self._metadata = [None, None, None]
+        self._write = 0; self._ready = 1; self._read = 2; self._new_frame = False
+        self.frames_published = 0; self.frames_taken = 0; self.frames_overwritten = 0
+
+    def write_buffer(self, shape: tuple, dtype) -> np.ndarray:
+        """
+        Provide the buffer for writing the next frame (only for the producer Thread).
+
+        Parameters
+        ----------
+        shape : tuple
+            Shape of the frame.
+        dtype : numpy dtype or str
+            Type of pixels.
+
+        Returns
+        -------
+        np.ndarray
+            Buffer, allocated again only if the shape or type of frames changed.
+
+        """
+        buffer = self._buffers[self._write]
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != np.dtype(dtype):
+            buffer = np.empty(shape, dtype=dtype); self._buffers[self._write] = buffer
+        return buffer
+
+    def publish(self, metadata=None):
+        """
+        Make the written buffer available for the GUI (only for the producer Thread).
+
+        Parameters
+        ----------
+        metadata : Any, optional
+            Data associated with the frame (e.g., frame id, display levels). The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._metadata[self._write] = metadata
+        with self._lock:
+            if self._new_frame:
+                self.frames_overwritten += 1  # the GUI hasn't taken the previous frame
+            self._write, self._ready = self._ready, self._write; self._new_frame = True; self.frames_published += 1
+
+    def take(self) -> tuple:
+        """
+        Take the latest published frame (only for the GUI Thread), it stays valid until the next call.
+
+        Returns
+        -------
+        tuple
+            (frame, metadata) or (None, None) if there is no new frame.
+
+        """
+        with self._lock:
+            if not self._new_frame:
+                return None, None
+            self._read, self._ready = self._ready, self._read; self._new_frame = False; self.frames_taken += 1
+        return self._buffers[self._read], self._metadata[self._read]
+
+    def has_new_frame(self) -> bool:
+        """Check without locking that the new frame is published."""
+        return self._new_frame
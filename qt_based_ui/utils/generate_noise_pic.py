@@ -9,9 +9,13 @@ Simulation of some picture with noise.
 import numpy as np
 import matplotlib.pyplot as plt
 
+# %% Module parameters
+rng = np.random.default_rng()  # generates the noise into preallocated images
+
 
 # %% Noise generation
-def generate_noise_picture(height: int, width: int, pixel_type: str = 'uint8') -> np.ndarray:
+def generate_noise_picture(height: int, width: int, pixel_type: str = 'uint8', out: np.ndarray = None,
+                           scratch: np.ndarray = None) -> np.ndarray:
     """
     Generate of a noise image with even distribution of noise (pixel values) on that.
 
@@ -23,6 +27,12 @@ def generate_noise_picture(height: int, width: int, pixel_type: str = 'uint8') -
         Width of a generated image.
     pixel_type : str, optional
         Type of pixels in an image. The default is 'uint8'.
+    out : np.ndarray, optional
+        Preallocated image (uint8 or float64) with the shape (height, width), the noise is generated into it without
+        allocation of a new image. The default is None.
+    scratch : np.ndarray, optional
+        Preallocated float32 array with the shape (height, width) for generation of the uint8 noise into the "out" image,
+        allocated if it isn't provided. The default is None.
 
     Raises
     ------
@@ -35,6 +45,13 @@ def generate_noise_picture(height: int, width: int, pixel_type: str = 'uint8') -
         Generate image with even noise.
 
     """
+    if out is not None:
+        if out.dtype == np.uint8:
+            scratch = np.empty(out.shape, dtype=np.float32) if scratch is None else scratch
+            rng.random(out=scratch, dtype=np.float32); np.multiply(scratch, 255.0, out=out, casting='unsafe')
+        else:
+            rng.random(out=out)
+        return out
     image = np.zeros((1, 1), dtype='uint8')
     if (height >= 2) and (width >= 2):
         if pixel_type == 'uint8':
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight viewer of frames streamed by the camera Process over the local TCP / Unix socket.
+
+The viewer connects to the server started by the ("Start Streaming", parameters) command of the CameraWrapper, prints the
+received frame rate and bandwidth, and optionally shows frames by matplotlib (--show flag).
+For testing, the --loopback flag starts the CameraWrapper with the Simulated camera streaming to this viewer.
+
+Usage example: python stream_viewer_mwpc.py --loopback --subsample 2 --compression 1 --duration 5
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import argparse
+import time
+from pathlib import Path
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    from camera.frames_streaming import FramesStreamClient
+else:
+    from .camera.frames_streaming import FramesStreamClient
+
+
+# %% Loopback camera
+def start_loopback_camera(address: str, exposure_ms: int = 10) -> tuple:
+    """
+    Start the CameraWrapper Process with the Simulated camera, live stream mode and streaming server.
+
+    Parameters
+    ----------
+    address : str
+        Address of the streaming server.
+    exposure_ms : int, optional
+        Exposure time of the Simulated camera. The default is 10.
+
+    Returns
+    -------
+    tuple
+        (CameraWrapper, CameraChannels).
+
+    """
+    if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+        from camera.camera_wrapper import CameraWrapper
+        from camera.camera_worker import CameraChannels
+    else:
+        from .camera.camera_wrapper import CameraWrapper
+        from .camera.camera_worker import CameraChannels
+    channels = CameraChannels(); camera_process = CameraWrapper(camera_type=None, **channels.wrapper_kwargs())
+    camera_process.daemon = True; camera_process.start()
+    channels.send_command(("Open Camera", "Simulated")); channels.send_command(("Set Exposure Time", exposure_ms))
+    channels.send_command(("Start Streaming", {"address": address})); channels.send_command("Start Live Stream")
+    time.sleep(0.5)  # waiting for the server start
+    return camera_process, channels
+
+
+def drain_loopback_camera(channels):
+    """Discard the descriptors of frames sent to the (absent) UI, so the data Queue doesn't overflow."""
+    channels.clean()
+
+
+def stop_loopback_camera(camera_process, channels):
+    """Stop the loopback CameraWrapper Process."""
+    channels.clean(); channels.send_command("Quit"); camera_process.join(2.0)
+    if camera_process.is_alive():
+        camera_process.kill()
+    channels.close()
+
+
+# %% Launch viewer
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Viewer of frames streamed by the camera Process")
+    parser.add_argument("--address", default="127.0.0.1:5555", help="'host:port' or 'unix:/path/to/socket'")
+    parser.add_argument("--subsample", type=int, default=1, help="take each n-th pixel along both axes on the server side")
+    parser.add_argument("--compression", type=int, default=0, help="zlib compression level (0 - no compression)")
+    parser.add_argument("--max-fps", type=float, default=0.0, help="maximum frame rate of the viewer (0 - not limited)")
+    parser.add_argument("--duration", type=float, default=None, help="duration of viewing in seconds (not limited by default)")
+    parser.add_argument("--show", action="store_true", help="show frames by matplotlib")
+    parser.add_argument("--loopback", action="store_true", help="start the Simulated camera streaming to this viewer")
+    args = parser.parse_args()
+    loopback = start_loopback_camera(args.address) if args.loopback else None
+    client = FramesStreamClient(args.address, subsample=args.subsample, compression_level=args.compression, max_fps=args.max_fps)
+    client.connect(); imshowing = None
+    if args.show:
+        import matplotlib.pyplot as plt
+        plt.ion(); figure, axes = plt.subplots(); axes.axis('off')
+    t_start = time.perf_counter(); t_report = t_start + 1.0; n_frames = 0; n_bytes = 0; n_reported = 0; n_bytes_reported = 0
+    try:
+        while args.duration is None or time.perf_counter() - t_start < args.duration:
+            if loopback is not None:
+                drain_loopback_camera(loopback[1])
+            received = client.receive(timeout_s=0.5)
+            if received is None:
+                continue
+            metadata, image = received; n_frames += 1; n_bytes += image.nbytes; now = time.perf_counter()
+            if now >= t_report:
+                # Latency is valid only for the viewer on the same host (time.perf_counter() of the camera Process)
+                print(f"Received FPS: {round((n_frames - n_reported)/(now - t_report + 1.0), 1)}, "
+                      + f"{round((n_bytes - n_bytes_reported)/(now - t_report + 1.0)/1E6, 2)} MB/s, frame {metadata['frame_id']}, "
+                      + f"shape {image.shape}, latency (same host) {round(1000.0*(now - metadata['timestamp']), 2)} ms", flush=True)
+                t_report = now + 1.0; n_reported = n_frames; n_bytes_reported = n_bytes
+            if args.show:
+                if imshowing is None:
+                    imshowing = axes.imshow(image, cmap='gray', interpolation='none')
+                else:
+                    imshowing.set_data(image); imshowing.autoscale()
+                plt.pause(0.001)
+    except (KeyboardInterrupt, ConnectionError):
+        pass
+    finally:
+        client.close()
+        if loopback is not None:
+            stop_loopback_camera(*loopback)
+    print(f"Received frames: {n_frames}", flush=True)
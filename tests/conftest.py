@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Configuration of the tests: the folder with the scripts is added to the import paths, so the modules are imported as in the scripts.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import sys
+from pathlib import Path
+
+# %% Import paths
+repository_path = str(Path(__file__).parent.parent.absolute())
+if repository_path not in sys.path:
+    sys.path.insert(0, repository_path)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the accumulation of frames in the camera Process.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import numpy as np
+import pytest
+from camera.accumulators import FrameAccumulator
+
+
+# %% Tests
+def test_single_mode_returns_frame():
+    accumulator = FrameAccumulator(); image = np.ones((4, 4), dtype=np.uint16)
+    assert accumulator.add(image) is image
+
+
+def test_average_n():
+    accumulator = FrameAccumulator("Average N", 3)
+    assert accumulator.add(np.full((4, 4), 10, dtype=np.uint16)) is None
+    assert accumulator.add(np.full((4, 4), 20, dtype=np.uint16)) is None
+    result = accumulator.add(np.full((4, 4), 30, dtype=np.uint16))
+    assert result.dtype == np.float32 and np.allclose(result, 20.0)
+    assert accumulator.add(np.full((4, 4), 30, dtype=np.uint16)) is None  # the next accumulation started
+
+
+def test_max_projection():
+    accumulator = FrameAccumulator("Max Projection", 2); first = np.zeros((3, 3), dtype=np.uint8); first[0, 0] = 200
+    second = np.full((3, 3), 5, dtype=np.uint8)
+    assert accumulator.add(first) is None
+    result = accumulator.add(second)
+    assert result[0, 0] == 200 and result[1, 1] == 5
+
+
+def test_running_mean():
+    accumulator = FrameAccumulator("Running Mean", 2)
+    results = [accumulator.add(np.full((2, 2), value, dtype=np.uint16)) for value in (0, 100, 100, 100)]
+    assert results[0] is None and results[2] is None  # result each 2 added frames
+    assert np.allclose(results[1], 50.0) and np.allclose(results[3], 87.5)
+
+
+def test_shape_change_restarts_average():
+    accumulator = FrameAccumulator("Average N", 2)
+    assert accumulator.add(np.full((4, 4), 100, dtype=np.uint16)) is None
+    assert accumulator.add(np.full((2, 2), 200, dtype=np.uint16)) is None  # partial sum of the previous shape is discarded
+    result = accumulator.add(np.full((2, 2), 200, dtype=np.uint16))
+    assert result.shape == (2, 2) and np.allclose(result, 200.0)
+
+
+def test_shape_change_restarts_max_projection():
+    accumulator = FrameAccumulator("Max Projection", 3)
+    accumulator.add(np.full((4, 4), 1, dtype=np.uint8)); accumulator.add(np.full((4, 4), 2, dtype=np.uint8))
+    assert accumulator.add(np.full((2, 2), 3, dtype=np.uint8)) is None  # only 1 of 3 frames with the new shape
+    assert accumulator.add(np.full((2, 2), 4, dtype=np.uint8)) is None
+    assert np.all(accumulator.add(np.full((2, 2), 5, dtype=np.uint8)) == 5)
+
+
+@pytest.mark.parametrize("n_frames, expected_dtype", [(65537, np.uint32), (65538, np.int64)])
+def test_average_accumulator_dtype_switch(n_frames, expected_dtype):
+    accumulator = FrameAccumulator("Average N", n_frames); accumulator.add(np.full((2, 2), 65535, dtype=np.uint16))
+    assert accumulator.accumulator.dtype == expected_dtype
+
+
+def test_average_without_overflow():
+    accumulator = FrameAccumulator("Average N", 70000); frame = np.full((2, 2), 65535, dtype=np.uint16); result = None
+    while result is None:
+        result = accumulator.add(frame)
+    assert np.allclose(result, 65535.0, rtol=1E-5)
+
+
+def test_not_supported_mode():
+    with pytest.raises(ValueError):
+        FrameAccumulator("Median", 3)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the scheduler of the time-lapse acquisition.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import time
+import pytest
+from camera.acq_scheduler import AcquisitionScheduler
+
+
+# %% Tests
+def test_plan_parsing():
+    scheduler = AcquisitionScheduler({"interval_s": 0.5, "duration_s": 2.0, "steps": [{"exposure_ms": 10, "burst_length": 3},
+                                                                                     {"burst_length": 1}]})
+    assert scheduler.n_bursts == 4 and scheduler.steps == [(10, 3), (None, 1)]
+    scheduler = AcquisitionScheduler({"interval_s": 1.0, "n_bursts": 2, "exposure_ms": 5})
+    assert scheduler.n_bursts == 2 and scheduler.steps == [(5, 1)]
+
+
+@pytest.mark.parametrize("plan", [[1, 2], {"duration_s": 1.0}, {"interval_s": 0.0, "n_bursts": 1},
+                                  {"interval_s": 1.0, "n_bursts": 1, "burst_length": 0},
+                                  {"interval_s": 1.0, "n_bursts": 1, "exposure_ms": -1.0}])
+def test_wrong_plan(plan):
+    with pytest.raises(ValueError):
+        AcquisitionScheduler(plan)
+
+
+def test_starts_computed_from_plan_start():
+    scheduler = AcquisitionScheduler({"interval_s": 0.02, "n_bursts": 3}); scheduler.start()
+    starts = []
+    while True:
+        scheduled_t = scheduler.next_burst_t()
+        if scheduled_t is None:
+            break
+        assert scheduler.wait_until(scheduled_t)
+        scheduler.burst_started(scheduled_t, time.perf_counter()); starts.append(scheduled_t)
+    assert [round(t - starts[0], 6) for t in starts] == [0.0, 0.02, 0.04]
+    stats = scheduler.stats()
+    assert stats["n_executed"] == 3 and stats["n_missed"] == 0 and 0.0 <= stats["lateness_max_ms"] < 50.0
+
+
+def test_overrunning_burst_skips_missed_starts():
+    scheduler = AcquisitionScheduler({"interval_s": 0.01, "n_bursts": 10}); scheduler.start(time.perf_counter() - 0.035)
+    scheduled_t = scheduler.next_burst_t(); scheduler.burst_started(scheduled_t, scheduled_t + 0.035)
+    next_t = scheduler.next_burst_t()
+    assert scheduler.n_missed == 3 and next_t == pytest.approx(scheduler.start_t + 0.04)
+
+
+def test_stop_interrupts_waiting():
+    scheduler = AcquisitionScheduler({"interval_s": 10.0, "n_bursts": 2}); scheduler.start(); scheduler.stop()
+    assert not scheduler.wait_until(time.perf_counter() + 5.0) and scheduler.next_burst_t() is None
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the percentile auto-contrast of displayed frames.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import numpy as np
+import pytest
+from display.auto_contrast import AutoContrast
+
+
+# %% Tests
+def test_uint16_frame_mapped_by_percentiles():
+    contrast = AutoContrast(low_percentile=0.0, high_percentile=100.0, subsample=1)
+    image = np.linspace(1000, 2000, 100*100).astype(np.uint16).reshape(100, 100)
+    out, low, high = contrast.apply(image)
+    assert (low, high) == (0, 255) and out.dtype == np.uint8
+    assert out.min() == 0 and out.max() == 255 and contrast.levels == (1000.0, 2000.0)
+
+
+def test_float_frame_mapped_into_provided_buffer():
+    contrast = AutoContrast(low_percentile=0.0, high_percentile=100.0, subsample=1)
+    image = np.array([[0.0, 0.5], [1.0, 0.25]], dtype=np.float32); out = np.empty((2, 2), dtype=np.uint8)
+    result, _, _ = contrast.apply(image, out=out)
+    assert result is out and out[0, 0] == 0 and out[1, 0] == 255 and out[0, 1] == 127
+
+
+def test_levels_smoothed_and_updated_each_n_frames():
+    contrast = AutoContrast(low_percentile=0.0, high_percentile=100.0, update_interval=2, smoothing=0.5, subsample=1)
+    dark = np.zeros((10, 10), dtype=np.uint8); dark[0, 0] = 100
+    bright = np.zeros((10, 10), dtype=np.uint8); bright[0, 0] = 200
+    contrast.apply(dark); contrast.apply(bright)
+    assert contrast.levels == (0.0, 100.0)  # the second frame isn't used for estimation
+    contrast.apply(bright)
+    assert contrast.levels == pytest.approx((0.0, 150.0))
+
+
+def test_uniform_frame_and_dtype_change():
+    contrast = AutoContrast(subsample=1); contrast.apply(np.full((4, 4), 7, dtype=np.uint8))
+    assert contrast.levels[1] > contrast.levels[0]
+    contrast.apply(np.full((4, 4), 7, dtype=np.uint16))
+    assert contrast.dtype == np.uint16 and contrast.n_frames == 1  # levels estimated again for another pixel type
+
+
+def test_wrong_percentiles():
+    with pytest.raises(ValueError):
+        AutoContrast(low_percentile=50.0, high_percentile=10.0)
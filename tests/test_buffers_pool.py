@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the pool of frame buffers with the memory budget.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import pickle
+import numpy as np
+import pytest
+from camera.buffers_pool import FrameBuffersPool
+
+
+# %% Tests
+def test_buffer_reused_after_release():
+    pool = FrameBuffersPool(1.0); buffer = pool.acquire((10, 10), np.uint16)
+    assert buffer.shape == (10, 10) and buffer.dtype == np.uint16 and pool.release(buffer)
+    assert pool.acquire((10, 10), "uint16") is buffer
+    stats = pool.stats()
+    assert (stats["n_allocated"], stats["n_reused"], stats["buffers_in_use"]) == (1, 1, 1)
+
+
+def test_retained_buffer_returns_after_all_releases():
+    pool = FrameBuffersPool(1.0); buffer = pool.acquire((4, 4), np.uint8)
+    assert pool.retain(buffer) and pool.release(buffer)
+    assert pool.acquire((4, 4), np.uint8) is not buffer  # still held by the second holder
+    pool.release(buffer)
+    assert pool.stats()["buffers_free"] == 1
+
+
+def test_foreign_arrays_ignored():
+    pool = FrameBuffersPool(1.0); array = np.zeros((4, 4))
+    assert not pool.retain(array) and not pool.release(array)
+
+
+def test_budget_exhausted_and_free_buffers_discarded():
+    pool = FrameBuffersPool(0.002)  # 2000 bytes
+    first = pool.acquire((1000, ), np.uint8); second = pool.acquire((1000, ), np.uint8)
+    assert first is not None and second is not None and pool.acquire((1000, ), np.uint8) is None
+    assert pool.stats()["n_exhausted"] == 1
+    pool.release(first); pool.release(second)
+    assert pool.acquire((1500, ), np.uint8) is not None  # free buffers of another shape are discarded for the new one
+
+
+def test_decreased_budget():
+    pool = FrameBuffersPool(1.0); buffer = pool.acquire((1000, ), np.uint8); pool.set_budget(0.0005)
+    pool.release(buffer)
+    assert pool.stats()["allocated_mb"] == 0.0 and pool.stats()["buffers_free"] == 0
+    with pytest.raises(ValueError):
+        pool.set_budget(0)
+
+
+def test_pickled_pool_starts_empty():
+    pool = FrameBuffersPool(1.0); pool.acquire((4, 4), np.uint8)
+    restored = pickle.loads(pickle.dumps(pool))
+    assert restored.stats()["buffers_in_use"] == 0 and restored.acquire((4, 4), np.uint8) is not None
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the histogram and ROI statistics of frames.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import numpy as np
+import pytest
+from camera.accumulators import FrameAccumulator
+from camera.frame_stats import FrameStatistics
+
+
+# %% Tests
+def test_uint8_statistics():
+    image = np.zeros((10, 10), dtype=np.uint8); image[:5, :] = 255
+    stats = FrameStatistics().compute(image)
+    assert stats["range"] == (0, 256) and stats["histogram"].sum() == 100
+    assert stats["mean"] == pytest.approx(127.5) and stats["std"] == pytest.approx(127.5)
+    assert (stats["min"], stats["max"]) == (0, 255) and stats["saturated_fraction"] == pytest.approx(0.5)
+
+
+def test_uint16_bit_depth_estimation():
+    image = np.zeros((8, 8), dtype=np.uint16); image[0, :] = 4095  # 12 bit camera
+    stats = FrameStatistics(n_bins=64).compute(image)
+    assert stats["range"] == (0, 4096) and stats["histogram"].size == 64
+    assert stats["saturated_fraction"] == pytest.approx(1/8)
+
+
+def test_roi_and_subsample():
+    image = np.arange(100, dtype=np.uint8).reshape(10, 10)
+    stats = FrameStatistics(roi=(2, 2, 4, 4), subsample=2).compute(image)
+    assert stats["n_pixels"] == 4 and (stats["min"], stats["max"]) == (22, 44)
+    assert FrameStatistics(roi=(20, 20, 2, 2)).compute(image) is None  # ROI outside of the frame
+
+
+def test_wrong_parameters():
+    with pytest.raises(ValueError):
+        FrameStatistics(n_bins=0)
+    with pytest.raises(ValueError):
+        FrameStatistics(roi=(0, 0, 0, 5))
+
+
+def test_normalized_float_frame():
+    image = np.full((4, 4), 0.5, dtype=np.float32); image[0, 0] = 1.0
+    stats = FrameStatistics().compute(image)
+    assert stats["saturated_fraction"] == pytest.approx(1/16) and stats["histogram"].sum() == 16
+
+
+def test_averaged_frame_saturation():
+    accumulator = FrameAccumulator("Average N", 2); image = np.full((4, 4), 100, dtype=np.uint8); image[0, :] = 255
+    accumulator.add(image); result = accumulator.add(image)
+    assert result.dtype == np.float32 and accumulator.source_dtype == np.uint8
+    frame_stats = FrameStatistics()
+    assert frame_stats.compute(result, accumulator.source_dtype)["saturated_fraction"] == pytest.approx(0.25)
+    assert frame_stats.compute(result)["saturated_fraction"] == pytest.approx(0.25)  # level estimated from the values
+    result[0, :] = 200.0
+    assert frame_stats.compute(result, accumulator.source_dtype)["saturated_fraction"] == 0.0
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the shared memory ring transferring frames between the camera Process and the main script.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import numpy as np
+import pytest
+from camera.frames_transport import SharedFramesRing
+
+
+# %% Fixtures
+@pytest.fixture
+def ring():
+    frames_ring = SharedFramesRing(n_slots=3)
+    yield frames_ring
+    frames_ring.close(); frames_ring.release()
+
+
+# %% Tests
+def test_publish_and_read(ring):
+    image = np.arange(12, dtype=np.uint16).reshape(3, 4); descriptor = ring.publish(image, 1.5)
+    assert descriptor.frame_id == 1 and descriptor.timestamp == 1.5 and descriptor.offset % ring.header_alignment == 0
+    frame = ring.read(descriptor)
+    assert np.array_equal(frame, image) and frame.dtype == np.uint16
+    out = np.empty((3, 4), dtype=np.uint16)
+    assert ring.read(descriptor, out=out) is out and np.array_equal(out, image)
+
+
+def test_overwritten_slot_is_discarded(ring):
+    descriptors = [ring.publish(np.full((2, 2), i, dtype=np.uint8)) for i in range(4)]  # the first slot is overwritten
+    assert ring.read(descriptors[0]) is None
+    assert ring.read(descriptors[3])[0, 0] == 3 and ring.read(descriptors[1])[0, 0] == 1
+
+
+def test_reset_discards_published_frames(ring):
+    descriptor = ring.publish(np.ones((2, 2), dtype=np.uint8)); ring.reset()
+    assert ring.read(descriptor) is None
+    assert ring.read(ring.publish(np.ones((2, 2), dtype=np.uint8))) is not None
+
+
+def test_larger_frame_reallocates_ring(ring):
+    small = ring.publish(np.ones((2, 2), dtype=np.uint8)); large = ring.publish(np.ones((8, 8), dtype=np.float64))
+    assert large.shm_name != small.shm_name and ring.read(small) is None
+    assert ring.read(large).shape == (8, 8)
+
+
+def test_view_without_copy(ring):
+    descriptor = ring.publish(np.full((2, 3), 7, dtype=np.int32)); view = ring.read(descriptor, copy=False)
+    assert view.shape == (2, 3) and np.all(view == 7)
+    del view
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of pacing of displayed frames in the live stream mode.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import time
+from display.pacing import DisplayPacer
+
+
+# %% Tests
+def test_latest_frame_wins():
+    pacer = DisplayPacer(0)
+    for i in range(3):
+        pacer.offer(i)
+    assert pacer.take() == 2 and pacer.take() is None
+    stats = pacer.stats()
+    assert (stats["frames_received"], stats["frames_displayed"], stats["frames_skipped"]) == (3, 1, 2)
+
+
+def test_busy_display_keeps_frame():
+    pacer = DisplayPacer(0); pacer.offer("frame")
+    assert pacer.take(display_busy=True) is None and pacer.take() == "frame"
+
+
+def test_display_rate_limited():
+    pacer = DisplayPacer(20.0); pacer.offer(1)
+    assert pacer.take() == 1
+    pacer.offer(2)
+    assert pacer.take() is None  # 50 ms interval isn't passed
+    time.sleep(0.06)
+    assert pacer.take() == 2
+
+
+def test_discard():
+    pacer = DisplayPacer(); pacer.offer(1); pacer.discard()
+    assert pacer.take() is None and pacer.stats()["frames_skipped"] == 1
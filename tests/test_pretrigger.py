@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the pre-trigger ring of frames.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import numpy as np
+import pytest
+from camera.pretrigger import PreTriggerRing
+
+
+# %% Fixtures
+@pytest.fixture
+def ring():
+    pretrigger = PreTriggerRing(pre_trigger_s=0.25, post_trigger_frames=2, budget_mb=0.0001)  # 100 bytes - 6 frames 4x4
+    yield pretrigger
+    pretrigger.release()
+
+
+def flush(pretrigger: PreTriggerRing) -> list:
+    values = []
+    while True:
+        next_frame = pretrigger.next_frame()
+        if next_frame is None:
+            return values
+        values.append(int(next_frame[0][0, 0])); pretrigger.frame_flushed()
+
+
+# %% Tests
+def test_pre_and_post_trigger_frames(ring):
+    for i in range(10):
+        ring.add(np.full((4, 4), i, dtype=np.uint8), 0.1*i)
+    assert ring.n_slots == 6 and ring.trigger(0.93)
+    assert flush(ring) == [7, 8, 9]  # acquired during 0.25 s before the trigger
+    assert ring.saving
+    for i in range(10, 13):
+        ring.add(np.full((4, 4), i, dtype=np.uint8), 0.1*i)
+    assert flush(ring) == [10, 11] and not ring.saving
+    stats = ring.stats()
+    assert (stats["n_triggers"], stats["n_pre"], stats["n_flushed"], stats["n_dropped"]) == (1, 3, 5, 0)
+
+
+def test_not_flushed_slots_not_overwritten(ring):
+    ring.post_trigger_frames = 10
+    for i in range(6):
+        ring.add(np.full((4, 4), i, dtype=np.uint8), 0.01*i)
+    ring.trigger(0.1)
+    assert not ring.add(np.full((4, 4), 6, dtype=np.uint8), 0.06)  # the recorder falls behind
+    assert ring.stats()["n_dropped"] == 1 and flush(ring)[0] == 0
+
+
+def test_trigger_ignored(ring):
+    assert not ring.trigger()  # no frames
+    ring.add(np.zeros((4, 4), dtype=np.uint8), 0.0); ring.trigger(0.0)
+    assert not ring.trigger(0.0)  # still saving
+    ring.finish(); flush(ring)
+    assert not ring.saving and ring.trigger(0.0)
+
+
+def test_shape_change_reallocates_ring(ring):
+    ring.add(np.zeros((4, 4), dtype=np.uint8), 0.0); ring.add(np.zeros((2, 2), dtype=np.uint16), 0.1)
+    assert ring.frames.shape[1:] == (2, 2) and ring.n_added == 1
+
+
+def test_wrong_parameters():
+    with pytest.raises(ValueError):
+        PreTriggerRing(pre_trigger_s=-1.0)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the processors and the pipeline processing frames from the shared memory ring.
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import numpy as np
+import pytest
+from camera.frames_transport import SharedFramesRing
+from camera.processing import (BackgroundSubtraction, FlatFieldCorrection, ThresholdMask, IntensityCentroid, create_processor,
+                               ProcessingPipeline)
+
+
+# %% Tests
+def test_background_subtraction():
+    result = BackgroundSubtraction(np.full((2, 2), 10.0))(np.array([[5, 10], [15, 20]], dtype=np.uint16))
+    assert result.dtype == np.float32 and np.array_equal(result, [[0.0, 0.0], [5.0, 10.0]])
+
+
+def test_flat_field_correction():
+    flat = np.array([[1.0, 2.0], [3.0, 4.0]]); dark = np.full((2, 2), 1.0)
+    result = FlatFieldCorrection(flat + 1.0, dark)(flat + 1.0)
+    assert np.allclose(result, 2.5)  # the flat image is corrected to its mean
+
+
+def test_threshold_and_centroid():
+    image = np.zeros((5, 5), dtype=np.uint8); image[1, 3] = 100
+    mask = ThresholdMask()(image)
+    assert mask.dtype == np.uint8 and mask.sum() == 1
+    assert IntensityCentroid()(mask) == (1.0, 3.0) and IntensityCentroid()(np.zeros((3, 3))) is None
+
+
+def test_create_processor(tmp_path):
+    background_path = str(tmp_path.joinpath("background.npy")); np.save(background_path, np.zeros((2, 2)))
+    assert isinstance(create_processor("background:" + background_path)[1], BackgroundSubtraction)
+    name, processor = create_processor("threshold:5")
+    assert name == "threshold" and processor.level == 5.0
+    with pytest.raises(ValueError):
+        create_processor("unknown")
+
+
+def test_pipeline_preserves_order():
+    frames_ring = SharedFramesRing(n_slots=8)
+    pipeline = ProcessingPipeline(frames_ring, [("threshold", ThresholdMask(0)), ("centroid", IntensityCentroid())], n_workers=2)
+    try:
+        for i in range(4):
+            image = np.zeros((6, 6), dtype=np.uint8); image[i, 5 - i] = 1
+            assert pipeline.submit(frames_ring.publish(image, float(i)))
+        processed = pipeline.collect(wait=True)
+        assert [result.results["centroid"] for result in processed] == [(float(i), float(5 - i)) for i in range(4)]
+        assert [result.descriptor.timestamp for result in processed] == [0.0, 1.0, 2.0, 3.0]
+        assert pipeline.stats()["frames_submitted"] == 4 and pipeline.stats()["frames_in_flight"] == 0
+    finally:
+        pipeline.shutdown(); frames_ring.release()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the recorders of frames (raw, JPEG stream and video formats).
+
+@author: sklykov, @license: MIT license
+
+"""
+# %% Global imports
+import json
+import numpy as np
+import pytest
+from camera.buffers_pool import FrameBuffersPool
+from camera.recorders import create_recorder, range_max
+
+cv2 = pytest.importorskip("cv2")
+
+
+# %% Tests
+def test_range_max():
+    assert range_max(np.array([0, 200], dtype=np.uint16)) == 255.0
+    assert range_max(np.array([0, 4000], dtype=np.uint16)) == 4095.0
+    assert range_max(np.array([0, 300], dtype=np.uint16), 4095.0) == 4095.0  # the range isn't narrowed
+    assert range_max(np.array([0.2, 0.9], dtype=np.float32)) == 1.0
+
+
+def test_raw_recorder(tmp_path):
+    file_path = tmp_path.joinpath("frames.raw"); recorder = create_recorder("raw", str(file_path), 10)
+    frames = [np.full((4, 6), i, dtype=np.uint16) for i in range(3)]
+    for i, frame in enumerate(frames):
+        recorder.write(frame, f"00:00:0{i}.000", 0.1*i)
+    recorder.write(np.zeros((5, 5), dtype=np.uint16), "skipped", 1.0)  # changed shape
+    recorder.close()
+    metadata = json.loads(file_path.with_suffix(".json").read_text())
+    assert metadata["n_frames"] == 3 and metadata["frame_shape"] == [4, 6] and metadata["measured_fps"] == pytest.approx(10.0)
+    recorded = np.fromfile(str(file_path), dtype=np.dtype(metadata["dtype"])).reshape(-1, 4, 6)
+    assert np.array_equal(recorded, np.stack(frames))
+
+
+def test_jpeg_stream_scale_is_stable(tmp_path):
+    file_path = tmp_path.joinpath("frames.mjpeg"); pool = FrameBuffersPool(16.0)
+    recorder = create_recorder("mjpeg", str(file_path), 10, buffers_pool=pool, n_threads=2)
+    recorder.draw_timestamps = False
+    for max_value in (4000, 1000):  # 12 bit frames, the dark one isn't stretched to the full range
+        frame = pool.acquire((32, 32), np.uint16); frame.fill(max_value)
+        recorder.write(frame, "00:00:00.000"); pool.release(frame)
+    recorder.close()
+    metadata = json.loads(file_path.with_suffix(".json").read_text()); data = file_path.read_bytes()
+    means = []
+    for offset, size in zip(metadata["offsets"], metadata["sizes"]):
+        decoded = cv2.imdecode(np.frombuffer(data[offset:offset+size], dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        means.append(float(np.mean(decoded)))
+    assert metadata["n_frames"] == 2 and means[0] == pytest.approx(249, abs=2) and means[1] == pytest.approx(62, abs=2)
+    assert pool.stats()["buffers_in_use"] == 0
+
+
+def test_jpeg_stream_shared_rgb_frame_not_modified(tmp_path):
+    pool = FrameBuffersPool(16.0); recorder = create_recorder("mjpeg", str(tmp_path.joinpath("rgb.mjpeg")), 10,
+                                                              buffers_pool=pool, n_threads=1)
+    frame = pool.acquire((64, 96, 3), np.uint8); frame.fill(255); recorder.write(frame, "12:00:00.000")
+    recorder.close()
+    assert np.all(frame == 255)  # the timestamp is drawn on the copy
+
+
+@pytest.mark.parametrize("file_format", ["avi", "mp4"])
+def test_video_recorder(tmp_path, file_format):
+    file_path = tmp_path.joinpath("video." + file_format); recorder = create_recorder(file_format, str(file_path), 10)
+    for i in range(5):
+        recorder.write(np.full((48, 64), 1000*i, dtype=np.uint16), f"00:00:0{i}.000", 0.1*i)
+    recorder.close()
+    capture = cv2.VideoCapture(str(file_path)); n_frames = 0
+    while capture.read()[0]:
+        n_frames += 1
+    capture.release()
+    assert n_frames == 5 and json.loads(file_path.with_suffix(".json").read_text())["n_frames"] == 5
+
+
+def test_video_recorder_wrong_codec():
+    with pytest.raises(ValueError):
+        create_recorder("avi", "video.avi", 10, codec="MJPEG")
+    with pytest.raises(ValueError):
+        create_recorder("tiff", "video.tiff", 10)
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+"""
+Live camera viewer (wxPython) on top of the CameraWrapper Process with the fast display path.
+
+Frames are transferred by the CameraWrapper through the shared memory ring, only their descriptors are sent through the
+frames Queue (separate from replies), which is drained by the wx.Timer (latest frame wins, the display rate is paced).
+Displayed frame isn't converted to float64 and normalized: the common FrameDisplayPreparer decimates it to the panel size,
+maps it to uint8 by the contrast lookup table and expands it to RGB into the preallocated buffer, which is copied into
+the wx.Bitmap reused across frames (Bitmap.CopyFromBuffer), so only the bitmap is blitted on painting.
+
+@author: sklykov
+
+@license: MIT license, ref.: https://github.com/sklykov/multip_wins_bpc/blob/main/LICENSE
+
+"""
+# %% Global imports
+import sys
+import time
+from pathlib import Path
+from queue import Empty
+import numpy as np
+import wx
+
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    root_folder = str(Path(__file__).parent.parent)  # the camera and display packages are placed in the root of the repository
+    if root_folder not in sys.path:
+        sys.path.append(root_folder)
+    from camera.camera_wrapper import CameraWrapper, cameras_ctrl_types
+    from camera.camera_worker import CameraChannels
+    from display.frame_preparation import FrameDisplayPreparer
+    from display.pacing import DisplayPacer
+else:
+    from ..camera.camera_wrapper import CameraWrapper, cameras_ctrl_types
+    from ..camera.camera_worker import CameraChannels
+    from ..display.frame_preparation import FrameDisplayPreparer
+    from ..display.pacing import DisplayPacer
+
+
+# %% Image panel
+class BitmapImagePanel(wx.Panel):
+    """Panel showing frames through the wx.Bitmap reused across frames."""
+
+    def __init__(self, parent, size: tuple = (640, 480)):
+        super().__init__(parent, size=size)
+        self.SetBackgroundStyle(wx.BG_STYLE_PAINT)  # all painting is made in the handler, no flickering by erasing background
+        self.frame_preparer = FrameDisplayPreparer(contrast="auto", rgb_output=True, max_size=(size[1], size[0]))
+        self.bitmap = None; self.paint_requested_t = 0.0  # moment of requesting the painting, reset by the paint handler
+        self.Bind(wx.EVT_PAINT, self.on_paint); self.Bind(wx.EVT_SIZE, self.on_size)
+
+    def set_frame(self, image: np.ndarray):
+        """
+        Convert the frame to the RGB bitmap and request its painting.
+
+        Parameters
+        ----------
+        image : np.ndarray
+            Gray scaled or RGB frame.
+
+        Returns
+        -------
+        None.
+
+        """
+        rgb_image = self.frame_preparer.prepare(image); height, width = rgb_image.shape[0], rgb_image.shape[1]
+        if self.bitmap is None or self.bitmap.GetWidth() != width or self.bitmap.GetHeight() != height:
+            self.bitmap = wx.Bitmap(width, height, 24)
+        self.bitmap.CopyFromBuffer(rgb_image, wx.BitmapBufferFormat_RGB)
+        self.paint_requested_t = time.perf_counter(); self.Refresh(eraseBackground=False)
+
+    def on_paint(self, event):
+        """
+        Blit the bitmap scaled to fit the panel with preserved aspect ratio.
+
+        Parameters
+        ----------
+        event : wx.PaintEvent
+            Needed by the API.
+
+        Returns
+        -------
+        None.
+
+        """
+        dc = wx.AutoBufferedPaintDC(self); dc.SetBackground(wx.Brush("black")); dc.Clear()
+        if self.bitmap is not None:
+            panel_w, panel_h = self.GetClientSize(); bitmap_w, bitmap_h = self.bitmap.GetWidth(), self.bitmap.GetHeight()
+            scale = min(panel_w/bitmap_w, panel_h/bitmap_h)
+            if scale > 0.0:
+                dc.SetUserScale(scale, scale)
+                dc.DrawBitmap(self.bitmap, int((panel_w/scale - bitmap_w)/2), int((panel_h/scale - bitmap_h)/2))
+        self.paint_requested_t = 0.0
+
+    @property
+    def paint_pending(self) -> bool:
+        """Previous frame isn't painted yet (ignored after 0.5 sec., e.g. the paint event isn't sent to the minimized window)."""
+        return self.paint_requested_t > 0.0 and time.perf_counter() - self.paint_requested_t < 0.5
+
+    def on_size(self, event):
+        """
+        Limit the size of prepared frames by the panel size and repaint it.
+
+        Parameters
+        ----------
+        event : wx.SizeEvent
+            Needed by the API.
+
+        Returns
+        -------
+        None.
+
+        """
+        panel_w, panel_h = self.GetClientSize()
+        if panel_w > 0 and panel_h > 0:
+            self.frame_preparer.set_max_size((panel_h, panel_w))
+        self.Refresh(eraseBackground=False); event.Skip()
+
+
+# %% Viewer
+class CameraViewerFrame(wx.Frame):
+    """Controls of the CameraWrapper Process and displaying of frames by the BitmapImagePanel."""
+
+    def __init__(self, parent=None, title: str = "Camera Viewer (wx)", size: tuple = (900, 760), display_fps: int = 30):
+        super().__init__(parent, title=title, size=size)
+        self.Centre(); self.live_flag = False; self.camera_opened = False; self.camera_stats = {}; self.latency_ms = 0.0
+        self.frames_discarded = 0; self.frame_buffer = None; self.pacer = DisplayPacer(display_fps)
+
+        # Controls and image panel
+        self.widget_panel = wx.Panel(parent=self)
+        self.camera_selector = wx.Choice(parent=self.widget_panel, choices=list(cameras_ctrl_types)); self.camera_selector.SetSelection(0)
+        self.snap_btn = wx.Button(parent=self.widget_panel, label="Snap")
+        self.live_btn = wx.ToggleButton(parent=self.widget_panel, label="Start Live")
+        self.exp_time_ctrl = wx.SpinCtrl(parent=self.widget_panel, min=1, max=2000, initial=20)
+        self.exp_time_label = wx.StaticText(parent=self.widget_panel, label="Exposure time [ms]:")
+        self.status_label = wx.StaticText(parent=self.widget_panel, label="Camera Inactive")
+        self.stats_label = wx.StaticText(parent=self.widget_panel, label="")
+        self.image_panel = BitmapImagePanel(self.widget_panel)
+
+        # Layout for placing widgets
+        self.main_grid = wx.GridBagSizer(vgap=4, hgap=4)
+        self.main_grid.Add(self.camera_selector, pos=(0, 0)); self.main_grid.Add(self.snap_btn, pos=(0, 1))
+        self.main_grid.Add(self.live_btn, pos=(0, 2)); self.main_grid.Add(self.exp_time_label, pos=(0, 3), flag=wx.ALIGN_CENTER_VERTICAL)
+        self.main_grid.Add(self.exp_time_ctrl, pos=(0, 4)); self.main_grid.Add(self.status_label, pos=(1, 0), span=(1, 2))
+        self.main_grid.Add(self.stats_label, pos=(1, 2), span=(1, 3))
+        self.main_grid.Add(self.image_panel, pos=(2, 0), span=(6, 5), flag=wx.EXPAND)
+        self.main_grid.AddGrowableCol(4); self.main_grid.AddGrowableRow(2)
+        self.widget_panel.SetSizer(self.main_grid)
+
+        # Event handlers
+        self.camera_selector.Bind(wx.EVT_CHOICE, self.open_camera); self.snap_btn.Bind(wx.EVT_BUTTON, self.snap)
+        self.live_btn.Bind(wx.EVT_TOGGLEBUTTON, self.toggle_live); self.exp_time_ctrl.Bind(wx.EVT_SPINCTRL, self.change_exp_time)
+        self.Bind(wx.EVT_CLOSE, self.on_close); self.set_controls_enabled(False)
+
+        # CameraWrapper Process without opened camera (it's opened by the command)
+        self.channels = CameraChannels()
+        self.camera_process = CameraWrapper(camera_type=None, **self.channels.wrapper_kwargs())
+        self.camera_process.daemon = True; self.camera_process.start()
+
+        # Timers: draining the Queue and displaying the latest frame, requesting statistics each second
+        self.receive_timer = wx.Timer(self); self.Bind(wx.EVT_TIMER, self.consume_data, self.receive_timer)
+        self.stats_timer = wx.Timer(self); self.Bind(wx.EVT_TIMER, self.request_stats, self.stats_timer)
+        self.receive_timer.Start(5); self.stats_timer.Start(1000); self.open_camera()
+
+    def set_controls_enabled(self, enabled: bool):
+        """
+        Enable / disable controls depending on the camera state.
+
+        Parameters
+        ----------
+        enabled : bool
+            Flag for enabling controls.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.snap_btn.Enable(enabled and not self.live_flag); self.live_btn.Enable(enabled)
+        self.exp_time_ctrl.Enable(enabled); self.camera_selector.Enable(not self.live_flag)
+
+    def open_camera(self, event=None):
+        """
+        Open the selected camera on the CameraWrapper Process (the previously opened one is closed by the Process).
+
+        Parameters
+        ----------
+        event : wx.CommandEvent, optional
+            Needed by the API. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.camera_opened = False; self.set_controls_enabled(False); self.status_label.SetLabel("Waiting...")
+        self.image_panel.frame_preparer.reset(); self.channels.send_command(("Open Camera", self.camera_selector.GetStringSelection()))
+
+    def handle_reply(self, reply):
+        """
+        Handle the reply from the camera.
+
+        Parameters
+        ----------
+        reply : Any
+            Reply from the CameraWrapper.
+
+        Returns
+        -------
+        None.
+
+        """
+        if reply == "Opened":
+            self.camera_opened = True; self.status_label.SetLabel(f"{self.camera_selector.GetStringSelection()} Camera Active")
+            self.set_controls_enabled(True); self.change_exp_time()
+        elif isinstance(reply, str) and "NOT Opened" in reply:
+            self.status_label.SetLabel("Camera Inactive"); print(reply, flush=True); self.camera_selector.Enable(True)
+        elif isinstance(reply, tuple) and reply[0] == "Stats":
+            self.camera_stats = reply[1]; self.update_stats_label()
+        elif reply == "Stopped":
+            self.camera_opened = False
+        elif not isinstance(reply, (int, dict)):  # FPS replies and settings aren't requested by this viewer
+            print("Received from the camera:", reply, flush=True)
+
+    def snap(self, event=None):
+        """
+        Acquire single frame, it's shown by the receiving timer.
+
+        Parameters
+        ----------
+        event : wx.CommandEvent, optional
+            Needed by the API. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.channels.send_command("Snap")
+
+    def toggle_live(self, event=None):
+        """
+        Start / stop the live stream in the CameraWrapper Process.
+
+        Parameters
+        ----------
+        event : wx.CommandEvent, optional
+            Needed by the API. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.live_flag = self.live_btn.GetValue()
+        if self.live_flag:
+            self.pacer.reset(); self.channels.send_command("Start Live Stream"); self.live_btn.SetLabel("Stop Live")
+        else:
+            self.channels.send_command("Stop Live Stream"); self.live_btn.SetLabel("Start Live")
+        self.set_controls_enabled(self.camera_opened)
+
+    def change_exp_time(self, event=None):
+        """
+        Send the exposure time to the camera.
+
+        Parameters
+        ----------
+        event : wx.SpinEvent, optional
+            Needed by the API. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.camera_opened:
+            self.channels.send_command(("Set Exposure Time", self.exp_time_ctrl.GetValue()))
+
+    def consume_data(self, event=None):
+        """
+        Drain the Queues: dispatch replies, keep the latest frame and display it if the pacer allows.
+
+        Parameters
+        ----------
+        event : wx.TimerEvent, optional
+            Needed by the API. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        while True:
+            try:
+                self.handle_reply(self.channels.data_from_camera.get_nowait())
+            except (Empty, OSError, ValueError):
+                break  # OSError, ValueError - the Queue is closed
+        while True:
+            try:
+                self.pacer.offer(self.channels.frames_from_camera.get_nowait())
+            except (Empty, OSError, ValueError):
+                break
+        descriptor = self.pacer.take(display_busy=self.image_panel.paint_pending)
+        if descriptor is None:
+            return
+        if self.frame_buffer is None or self.frame_buffer.shape != tuple(descriptor.shape) or self.frame_buffer.dtype != descriptor.dtype:
+            self.frame_buffer = np.empty(descriptor.shape, dtype=descriptor.dtype)
+        frame = self.channels.frames_ring.read(descriptor, out=self.frame_buffer)
+        if frame is None:
+            self.frames_discarded += 1; return  # overwritten in the ring by the newer frames
+        self.image_panel.set_frame(frame)
+        self.latency_ms = 0.9*self.latency_ms + 0.1*1000.0*(time.perf_counter() - descriptor.timestamp)
+
+    def request_stats(self, event=None):
+        """
+        Request counters of the camera watchdog, the reply is handled by the handle_reply() method.
+
+        Parameters
+        ----------
+        event : wx.TimerEvent, optional
+            Needed by the API. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.camera_opened:
+            self.channels.send_command("Get Stats")
+
+    def update_stats_label(self):
+        """
+        Show acquisition and displaying counters.
+
+        Returns
+        -------
+        None.
+
+        """
+        mean_interval_ms = self.camera_stats.get("mean_interval_ms", 0.0); pacer_stats = self.pacer.stats()
+        fps = round(1000.0/mean_interval_ms, 1) if mean_interval_ms > 0.0 else 0.0
+        self.stats_label.SetLabel(f"Acq. FPS: {fps} | Received: {pacer_stats['frames_received']} | "
+                                  + f"Displayed: {pacer_stats['frames_displayed']} | Skipped: {pacer_stats['frames_skipped']} | "
+                                  + f"Display FPS: {pacer_stats['display_fps']} | Latency: {int(round(self.latency_ms))} ms")
+
+    def on_close(self, event):
+        """
+        Stop timers and the CameraWrapper Process before destroying the Frame.
+
+        Parameters
+        ----------
+        event : wx.CloseEvent
+            Needed by the API.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.receive_timer.Stop(); self.stats_timer.Stop()
+        if self.camera_process.is_alive():
+            self.channels.send_command("Quit"); self.camera_process.join(2.0)
+            if self.camera_process.is_alive():
+                self.camera_process.kill()
+        self.channels.close(); self.Destroy()
+
+
+# %% Launch the GUI
+if __name__ == "__main__":
+    wxapp = wx.App(); main_frame = CameraViewerFrame(); main_frame.Show(); wxapp.MainLoop()
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 """
-Experimenting with wxpython and wxmplot libraries for replicating features of an app based on tkinter.
+Experimenting with wxpython library for replicating features of an app based on tkinter (wxmplot was used for showing images).
 
 @author: sklykov
 
@@ -9,16 +9,27 @@ Experimenting with wxpython and wxmplot libraries for replicating features of an
 """
 # %% Dev comments
 # Some keywords, tricks, bypassing are suggested by AI chat. It speeds up development but makes to avoid reading the whole documentation.
-# Even simple task to show noisy uint8 image is difficult on wxmplot (ver. 2025.1.3)
+# Even simple task to show noisy uint8 image is difficult on wxmplot (ver. 2025.1.3): it needed the conversion to float64 and
+# normalization of each frame, so the image is shown by the BitmapImagePanel with the common FrameDisplayPreparer instead.
 
 # %% Global imports
+import sys
+from pathlib import Path
 import numpy as np
 import wx  # main GUI library, wrapper around C++ library
-import wxmplot  # additional library providing wrapper around matplotlib to add its plots into the wx widget
 import matplotlib.cm as cmap
 import matplotlib.pyplot as plt
 import time
 
+# %% Local imports
+if __name__ == "__main__" or __name__ == Path(__file__).stem or __name__ == "__mp_main__":
+    script_folder = str(Path(__file__).parent)
+    if script_folder not in sys.path:
+        sys.path.append(script_folder)
+    from camera_viewer_wx import BitmapImagePanel
+else:
+    from .camera_viewer_wx import BitmapImagePanel
+
 
 # %% Custom implementation of UI classes
 class MainWxApp(wx.App):
@@ -43,22 +54,11 @@ class MainFrame(wx.Frame):
         self.action_btn = wx.Button(parent=self.widget_panel, label="Action")
         self.action_btn2 = wx.Button(parent=self.widget_panel, label="Another Action")
 
-        # Creating image container
+        # Creating image container: the frame is mapped to uint8 by the contrast lookup table and shown by the reused wx.Bitmap
         img_size = (300, 300)
-        self.img_container = wxmplot.ImagePanel(parent=self.widget_panel, messenger=messanger_overwrite)
+        self.img_container = BitmapImagePanel(self.widget_panel, size=img_size)
         self.current_img = np.random.randint(0, high=255, size=img_size, dtype=np.uint8)  # dummy image - just noise
-        # Note: flag isn't easily retrievable from source code / documentation, and it doesn't work properly for uint8
-        # self.img_container.display(self.current_img, auto_contrast=True)
-        # self.img_container.display(self.current_img, clim=(0, 255))  # doesn't work as well, wrong contrast
-        # self.img_container.display(self.current_img.copy().astype(np.float64), auto_contrast=True)  # doesn't work as well, wrong contrast
-        # self.img_container.display(self.current_img.copy().astype(float), auto_contrast=True)  # doesn't work properly
-        self.converted_img = self.current_img.copy().astype(np.float64)  # explicit conversion for referring to it below
-        # self.img_container.display(self.converted_img, clim=(np.min(self.converted_img), np.max(self.converted_img)))  # doesn't help
-        self.converted_img /= np.max(self.converted_img)  # normalizing to the max value
-        self.img_container.display(self.converted_img, auto_contrast=True)  # this solution finally works for making a good contrast
-        # self.img_container.axes.set_position([0, 0, 1, 1])  # removes all paddings in a plot
-        self.img_container.axes.set_aspect('auto')  # fits image to a container
-        self.img_container.conf.cmap = cmap.gray; self.img_container.redraw()
+        self.img_container.set_frame(self.current_img)
 
         # Layout for placing widgets
         self.main_grid = wx.GridBagSizer(vgap=4, hgap=4)  # flexible grid, no borders from edge of Frame made
@@ -74,25 +74,6 @@ class MainFrame(wx.Frame):
         self.Raise(); self.SetFocus()
 
 
-def messanger_overwrite(*args, **kwargs):
-    """
-    Empty function for replacing standard messanger for preventing in stdout cursor moving.
-
-    Parameters
-    ----------
-    *args : list with arguments
-        List as a generic container.
-    **kwargs : list with key arguments
-        List as a generic container.
-
-    Returns
-    -------
-    None.
-
-    """
-    pass
-
-
 # %% Test as the main script
 if __name__ == "__main__":
     # Confirm that noisy uint8 image can be easily shown on matplotlib figure